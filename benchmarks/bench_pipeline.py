@@ -0,0 +1,568 @@
+r""" benchmarks.bench_pipeline module
+
+offline benchmarks of the fetch -> parse -> model pipeline
+
+- usage:
+    python benchmarks/bench_pipeline.py --output results.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --quick --save-baseline \
+        benchmarks/baseline.json
+
+- notes:
+    - every result is a rate or a size, tagged with its unit and whether
+    higher is better; a result worse than the baseline by more than
+    '--tolerance' is reported as a regression and the exit status is 1
+    - end-to-end runs go through 'AsyncNetworkClient' to a local
+    'ReplayServer' answering with synthetic result pages
+"""
+
+
+# importing standard modules ==================================================
+from typing import Any, Callable, Dict, List, Optional
+import sys, os, argparse, asyncio, concurrent.futures, datetime, gc, gzip, \
+    json, multiprocessing, platform, random, resource, subprocess, tempfile, \
+    time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# importing custom modules ====================================================
+from py_google_patents.core.data_parsers import \
+    parse_parse_endpoint_response_data, parse_result_endpoint_response_data
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.core.archive import PageArchive, train_dictionary
+from py_google_patents.core.cpc import CpcIndex
+from py_google_patents.core.export import JsonlSink, ParquetSink
+from py_google_patents.core.index import PatentIndex
+from py_google_patents.api.data import getPatentDataMany
+from py_google_patents.testing.replay import ReplayServer
+from py_google_patents.testing.synthetic import build_result_page
+
+
+# module variables ============================================================
+SAMPLES_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "research", "api_sample_responses.json"
+)
+
+PAGE_SIZES: Dict[str, Dict[str, int]] = {
+    "small": dict(claims=3, paragraphs=5, citations=2, cited_by=2),
+    "typical": dict(claims=20, paragraphs=60, citations=25, cited_by=25),
+    "huge": dict(claims=200, paragraphs=2000, citations=500, cited_by=500),
+}
+""" 'build_result_page' arguments of the benchmarked result pages """
+
+CONCURRENCY_LEVELS: List[int] = [1, 8, 32, 64]
+
+IMPORT_TARGETS: List[str] = [
+    "py_google_patents",
+    "py_google_patents.core.data_parsers",
+    "py_google_patents.api.data",
+    "py_google_patents.core.network",
+]
+""" modules whose cold import time is measured, each in a fresh interpreter """
+
+
+# helper definitions ==========================================================
+def _result(
+    value: float,
+    unit: str,
+    higher_is_better: bool = True,
+    **details: Any
+    ) -> Dict[str, Any]:
+    return dict(
+        value=value, unit=unit, higher_is_better=higher_is_better, **details
+    )
+
+
+def _rate(
+    func: Callable[[], Any],
+    operations: int,
+    repeat: int
+    ) -> float:
+    r""" returns operations per second of the fastest of 'repeat' runs """
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        started: float = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return operations / min(timings)
+
+
+def _rss_kib(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_kib() -> int:
+    peak: Optional[int] = _rss_kib("VmHWM")
+    if peak is not None:
+        return peak
+    rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macos, kibibytes elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _measure_rss(size: str) -> int:
+    r""" runs in a fresh process; returns the peak rss growth, in KiB, of
+    parsing one page of 'size' """
+    page: str = build_result_page("patent/US1000000B2/en", **PAGE_SIZES[size])
+    parse_result_endpoint_response_data(build_result_page(
+        "patent/US1B2/en", **PAGE_SIZES["small"]
+    ))      # warms imports and lxml up
+    gc.collect()
+    try:
+        # linux only: resets the peak (VmHWM) to the current rss
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+    before: int = _rss_kib("VmRSS") or _peak_rss_kib()
+    parse_result_endpoint_response_data(page)
+    return max(0, _peak_rss_kib() - before)
+
+
+def _import_seconds(module: str) -> float:
+    root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output: bytes = subprocess.check_output([
+        sys.executable, "-c",
+        "import time; started = time.perf_counter(); import {}; "
+        "print(time.perf_counter() - started)".format(module)
+    ], cwd=root)
+    return float(output)
+
+
+# method definitions ==========================================================
+def bench_import(quick: bool) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for module in IMPORT_TARGETS:
+        seconds: float = min(
+            _import_seconds(module) for _ in range(3 if quick else 10)
+        )
+        results["import.{}".format(module)] = _result(
+            seconds * 1000, "ms", higher_is_better=False
+        )
+    return results
+
+
+def bench_parse_endpoint(quick: bool) -> Dict[str, Dict[str, Any]]:
+    with open(SAMPLES_PATH, "r", encoding="utf-8") as file:
+        samples: List[Dict[str, Any]] = [
+            sample["response"] for sample in json.load(file)
+            if "/xhr/parse" in sample["url"]
+        ]
+    batch: List[Dict[str, Any]] = [
+        samples[index % len(samples)] for index in range(
+            2000 if quick else 20000
+        )
+    ]
+
+    def _run() -> None:
+        for data in batch:
+            parse_parse_endpoint_response_data(data)
+        return None
+
+    bodies: List[bytes] = [json.dumps(data).encode("utf-8") for data in batch]
+
+    def _run_trusted() -> None:
+        for body in bodies:
+            parse_parse_endpoint_response_data(body, trusted=True)
+        return None
+
+    return {
+        "parse_endpoint.batch": _result(
+            _rate(_run, len(batch), 3), "docs/s", batch=len(batch)
+        ),
+        "parse_endpoint.batch.trusted": _result(
+            _rate(_run_trusted, len(batch), 3), "docs/s", batch=len(batch),
+            note="decoded from bytes, built without validation"
+        ),
+    }
+
+
+def bench_result_endpoint(quick: bool) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size, arguments in PAGE_SIZES.items():
+        page: str = build_result_page("patent/US1000000B2/en", **arguments)
+        number: int = max(1, (200 if quick else 2000) * 1024 // len(page))
+
+        def _run() -> None:
+            for _ in range(number):
+                parse_result_endpoint_response_data(page)
+            return None
+
+        rate: float = _rate(_run, number, 3)
+        results["result_endpoint.{}".format(size)] = _result(
+            rate, "docs/s", bytes=len(page)
+        )
+        results["result_endpoint.{}.throughput".format(size)] = _result(
+            rate * len(page) / (1024 * 1024), "MiB/s"
+        )
+    return results
+
+
+def bench_export(quick: bool) -> Dict[str, Dict[str, Any]]:
+    response = parse_result_endpoint_response_data(
+        build_result_page("patent/US1000000B2/en", **PAGE_SIZES["typical"])
+    )
+    number: int = 500 if quick else 5000
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def _scan_jsonl(path: str) -> None:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as file:
+            for line in file:
+                json.loads(line)["publication_number"]
+        return None
+
+    def _scan_parquet(path: str) -> None:
+        import pyarrow.parquet
+        pyarrow.parquet.read_table(path, columns=["publication_number"])
+        return None
+
+    formats: List[Any] = [
+        ("jsonl", "patents.jsonl", JsonlSink, _scan_jsonl),
+        ("jsonl_gzip", "patents.jsonl.gz", JsonlSink, _scan_jsonl),
+    ]
+    try:
+        import pyarrow
+        formats.append(
+            ("parquet", "patents.parquet", ParquetSink, _scan_parquet)
+        )
+    except ImportError:
+        pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, filename, sink_class, scan in formats:
+            path: str = os.path.join(directory, filename)
+
+            def _write() -> None:
+                with sink_class(path) as sink:
+                    for _ in range(number):
+                        sink.write(response)
+                return None
+
+            results["export.{}.write".format(name)] = _result(
+                _rate(_write, number, 1), "docs/s", batch=number
+            )
+            results["export.{}.bytes_per_doc".format(name)] = _result(
+                os.path.getsize(path) / number, "bytes", False
+            )
+            results["export.{}.scan".format(name)] = _result(
+                _rate(lambda: scan(path), number, 3), "docs/s",
+                note="reads the 'publication_number' column"
+            )
+    return results
+
+
+def bench_index(quick: bool) -> Dict[str, Dict[str, Any]]:
+    responses: List[Any] = [
+        parse_result_endpoint_response_data(build_result_page(
+            "patent/US{}B2/en".format(1000000 + index), **PAGE_SIZES["small"]
+        ))
+        for index in range(500 if quick else 5000)
+    ]
+    queries: List[str] = [
+        "hybrid engine", "torque sensor", "us1000", "cpc:", "clutch gear valve"
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        index: PatentIndex = PatentIndex(directory, cache_size=0)
+
+        def _build() -> None:
+            index.addMany(responses)
+            index.commit()
+            return None
+
+        build_rate: float = _rate(_build, len(responses), 1)
+
+        def _search() -> None:
+            for query in queries * 20:
+                index.search(query)
+            return None
+
+        search_rate: float = _rate(_search, len(queries) * 20, 3)
+        index.close()
+        index = PatentIndex(directory)
+        cached_rate: float = _rate(_search, len(queries) * 20, 3)
+        index.close()
+    return {
+        "index.build": _result(build_rate, "docs/s", documents=len(responses)),
+        "index.search": _result(
+            search_rate, "queries/s", documents=len(responses)
+        ),
+        "index.search.repeat": _result(
+            cached_rate, "queries/s", documents=len(responses),
+            note="repeated queries, answered from the results cache"
+        ),
+    }
+
+
+def bench_archive(quick: bool) -> Dict[str, Dict[str, Any]]:
+    pages: List[str] = [
+        build_result_page(
+            "patent/US{}B2/en".format(1000000 + index), **PAGE_SIZES["typical"]
+        )
+        for index in range(100 if quick else 1000)
+    ]
+    raw_bytes: int = sum(len(page.encode("utf-8")) for page in pages)
+    dictionary: bytes = train_dictionary(pages[:100])
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "pages.pgar")
+
+        def _write() -> None:
+            for name in (path, path + ".idx"):
+                if os.path.exists(name):
+                    os.remove(name)
+            with PageArchive(path, "a", dictionary) as archive:
+                for index, page in enumerate(pages):
+                    archive.add(str(index), page)
+            return None
+
+        write_rate: float = _rate(_write, len(pages), 1)
+        with PageArchive(path) as archive:
+            stats: Dict[str, int] = archive.getStats()
+            keys: List[str] = archive.keys()
+            lookup_rate: float = _rate(
+                lambda: [archive.get(key) for key in keys], len(keys), 3
+            )
+    return {
+        "archive.write": _result(
+            write_rate * raw_bytes / len(pages) / (1024 * 1024), "MiB/s"
+        ),
+        "archive.ratio": _result(
+            raw_bytes / stats["stored_bytes"], "x",
+            dictionary_bytes=stats["dictionary_bytes"]
+        ),
+        "archive.lookup": _result(lookup_rate, "docs/s", records=len(keys)),
+    }
+
+
+def bench_cpc(quick: bool) -> Dict[str, Dict[str, Any]]:
+    rng: random.Random = random.Random(0)
+    codes: List[str] = [
+        "{}{:02d}{}{}/{:02d}".format(
+            rng.choice("ABCDEFGH"), rng.randrange(1, 100),
+            rng.choice("ABCDFGHJKLMNPQRSTW"), rng.randrange(1, 100),
+            rng.randrange(0, 100, 2)
+        )
+        for _ in range(20000)
+    ]
+    documents: List[List[str]] = [
+        rng.sample(codes, rng.randint(1, 8))
+        for _ in range(20000 if quick else 200000)
+    ]
+    prefixes: List[str] = [code[:rng.choice((1, 3, 4))] for code in codes[:20]]
+    index: CpcIndex = CpcIndex()
+
+    def _build() -> None:
+        for number, document in enumerate(documents):
+            index.addCodes(str(number), document)
+        index.select("A")
+        return None
+
+    build_rate: float = _rate(_build, len(documents), 1)
+    query_rate: float = _rate(
+        lambda: [index.select(prefix) for prefix in prefixes], len(prefixes), 3
+    )
+
+    def _scan() -> None:
+        for prefix in prefixes:
+            [
+                number for number, document in enumerate(documents)
+                if any(code.startswith(prefix) for code in document)
+            ]
+        return None
+
+    scan_rate: float = _rate(_scan, len(prefixes), 1)
+    return {
+        "cpc.build": _result(build_rate, "docs/s", documents=len(documents)),
+        "cpc.select": _result(
+            query_rate, "queries/s", documents=len(documents),
+            speedup_over_scan=round(query_rate / scan_rate, 1)
+        ),
+    }
+
+
+def bench_rss() -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in PAGE_SIZES:
+        with concurrent.futures.ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+            growth: int = pool.submit(_measure_rss, size).result()
+        results["peak_rss.{}".format(size)] = _result(
+            growth, "KiB/doc", higher_is_better=False
+        )
+    return results
+
+
+async def _fetch_all(
+    server: ReplayServer,
+    executor: ParseExecutor,
+    concurrency: int,
+    documents: int,
+    offset: int
+    ) -> float:
+    async with server.createClient(limit_per_host=concurrency) as client:
+        started: float = time.perf_counter()
+        async for item in getPatentDataMany(
+            [
+                "patent/US{}B2/en".format(offset + index)
+                for index in range(documents)
+            ],
+            client, concurrency=concurrency, executor=executor
+            ):
+            if not item.ok:
+                raise item.error
+        return documents / (time.perf_counter() - started)
+
+
+async def _bench_end_to_end(
+    quick: bool,
+    executor_kind: str,
+    latency: float
+    ) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    documents: int = 64 if quick else 512
+    with ParseExecutor(executor_kind) as executor:
+        async with ReplayServer(synthesize=True, latency=latency) as server:
+            # warms the worker pool up
+            await _fetch_all(server, executor, 8, 8, 0)
+            for level, concurrency in enumerate(CONCURRENCY_LEVELS):
+                # distinct ids, so that nothing is coalesced between levels
+                rate: float = await _fetch_all(
+                    server, executor, concurrency, documents,
+                    (level + 1) * 1000000
+                )
+                results["end_to_end.c{}".format(concurrency)] = _result(
+                    rate, "docs/s", documents=documents,
+                    executor=executor_kind, latency=latency
+                )
+    return results
+
+
+def bench_end_to_end(
+    quick: bool,
+    executor_kind: str = "process",
+    latency: float = 0.01
+    ) -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_bench_end_to_end(quick, executor_kind, latency))
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float
+    ) -> List[str]:
+    r""" Functional Requirement - COMPARE
+    - arguments:
+        - results: the 'results' of a run
+        - baseline: the 'results' of the baseline run
+        - tolerance: relative change, ex: 0.25, tolerated before a result is
+        reported as a regression
+    - returns:
+        - the names of the regressed results
+    """
+    regressions: List[str] = []
+    for name, result in results.items():
+        reference: Optional[Dict[str, Any]] = baseline.get(name)
+        if not reference or not reference["value"]:
+            print("{:<40} {:>14.2f} {:<8}".format(
+                name, result["value"], result["unit"]
+            ))
+            continue
+        change: float = result["value"] / reference["value"] - 1.0
+        regressed: bool = change < -tolerance if result["higher_is_better"] \
+            else change > tolerance
+        if regressed:
+            regressions.append(name)
+        print("{:<40} {:>14.2f} {:<8} {:+8.1%}{}".format(
+            name, result["value"], result["unit"], change,
+            "  REGRESSION" if regressed else ""
+        ))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="offline benchmarks of the py_google_patents pipeline"
+    )
+    parser.add_argument("--quick", action="store_true",
+        help="smaller batches, for a fast sanity run")
+    parser.add_argument("--only", action="append", choices=[
+        "import", "parse_endpoint", "result_endpoint", "export", "index",
+        "archive", "cpc", "end_to_end", "peak_rss"
+    ], help="benchmarks to run; every benchmark when omitted")
+    parser.add_argument("--executor", default="process",
+        choices=["process", "thread", "inline"],
+        help="'ParseExecutor' kind of the end-to-end runs")
+    parser.add_argument("--latency", type=float, default=0.01,
+        help="seconds the replay server delays every response by")
+    parser.add_argument("--output", help="file the json results are written to")
+    parser.add_argument("--baseline", help="json results to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH",
+        help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    selected: List[str] = arguments.only or [
+        "import", "parse_endpoint", "result_endpoint", "export", "index",
+        "archive", "cpc", "end_to_end", "peak_rss"
+    ]
+    results: Dict[str, Dict[str, Any]] = {}
+    if "import" in selected:
+        results.update(bench_import(arguments.quick))
+    if "parse_endpoint" in selected:
+        results.update(bench_parse_endpoint(arguments.quick))
+    if "result_endpoint" in selected:
+        results.update(bench_result_endpoint(arguments.quick))
+    if "export" in selected:
+        results.update(bench_export(arguments.quick))
+    if "index" in selected:
+        results.update(bench_index(arguments.quick))
+    if "archive" in selected:
+        results.update(bench_archive(arguments.quick))
+    if "cpc" in selected:
+        results.update(bench_cpc(arguments.quick))
+    if "end_to_end" in selected:
+        results.update(bench_end_to_end(
+            arguments.quick, arguments.executor, arguments.latency
+        ))
+    if "peak_rss" in selected:
+        results.update(bench_rss())
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc)\
+                .isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": arguments.quick,
+        },
+        "results": results,
+    }
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if arguments.baseline:
+        with open(arguments.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    regressions: List[str] = compare(results, baseline, arguments.tolerance)
+    report["regressions"] = regressions
+
+    for path in filter(None, (arguments.output, arguments.save_baseline)):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+            file.write("\n")
+    return 1 if regressions else 0
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,59 @@
-r""" py_goole_patents.__init__ module """
+r""" py_google_patents.__init__ module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, List
+import importlib
+
+
+# module variables ============================================================
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    "getTextRecommendations": ".api.data",
+    "getPatentData": ".api.data",
+    "getTextRecommendationsMany": ".api.data",
+    "getPatentDataMany": ".api.data",
+    "getQueryResults": ".api.data",
+    "getQueryPatentDataMany": ".api.data",
+    "exportPatentDataMany": ".api.data",
+    "refreshPatentDataMany": ".api.data",
+    "SyncClient": ".api.sync",
+    "PatentGraphCrawler": ".api.crawl",
+    "TypeaheadSession": ".api.typeahead",
+    "AsyncNetworkClient": ".core.network",
+    "DiskResponseCache": ".core.cache",
+    "PageArchive": ".core.archive",
+    "CpcIndex": ".core.cpc",
+    "FingerprintStore": ".core.refresh",
+    "TokenBucketRateLimiter": ".core.throttle",
+    "RetryPolicy": ".core.throttle",
+    "AdaptiveConcurrencyLimiter": ".core.throttle",
+    "ParseExecutor": ".core.executor",
+    "JsonlSink": ".core.export",
+    "PatentIndex": ".core.index",
+    "ParquetSink": ".core.export",
+    "InMemoryMetrics": ".core.metrics",
+    "set_metrics": ".core.metrics",
+    "GoogleParseResponse": ".models.response_models",
+    "GooglePatentResponse": ".models.response_models",
+}
+""" public names, by the module defining them; a module is only imported
+when one of its names is first accessed (PEP 562), so that importing the
+package does not pull in pydantic, aiohttp or lxml """
+
+__all__: List[str] = sorted(_LAZY_ATTRIBUTES)
+
+
+# method definitions ==========================================================
+def __getattr__(name: str) -> Any:
+    module_name: str = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    value: Any = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value     # later accesses skip '__getattr__'
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
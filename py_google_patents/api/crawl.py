@@ -0,0 +1,329 @@
+r""" py_google_patents.api.crawl module """
+
+
+# importing standard modules ==================================================
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, \
+    Optional, Set, Tuple, Union, TYPE_CHECKING
+import asyncio, json, logging, os, re
+
+
+# importing custom modules ====================================================
+from ..common.config import getLibraryLogger
+from ..models.response_models import GooglePatentResponse, PatentPublication
+from ..core.bloom import BloomFilter
+from ..core.bulk import DEFAULT_CONCURRENCY
+from .data import getPatentData
+
+if TYPE_CHECKING:
+    from ..core.network import AsyncNetworkClient
+
+
+# module variables ============================================================
+RELATION_SECTIONS: Dict[str, str] = {
+    "family": "family",
+    "cites": "citations",
+    "cited_by": "citations",
+}
+""" relations the crawler can follow, with the page section holding them """
+
+DEFAULT_CHECKPOINT_EVERY: int = 500
+""" fetched documents between two checkpoints """
+
+_CHECKPOINT_VERSION: int = 1
+
+_ID_URL_PATTERN = re.compile(r"patent/(?P<number>[^/]+)")
+
+
+# class definitions ===========================================================
+class CrawlEdge(NamedTuple):
+    r""" record describing one edge of the crawled graph """
+
+    source: str
+    """ publication number of the fetched document """
+
+    target: str
+    """ publication number of the document it references """
+
+    relation: str
+    """ one of 'RELATION_SECTIONS'; ex: 'cites' """
+
+    depth: int
+    """ hops between the seeds and 'source' """
+
+    pass # end of CrawlEdge
+
+
+# -----------------------------------------------------------------------------
+class PatentGraphCrawler:
+    r""" class walking the family and citation graph breadth-first from seed
+    documents, with a pool of concurrent workers fetching '/xhr/result'
+    pages
+
+    - usage:
+        crawler = PatentGraphCrawler(
+            ["patent/US9145048B2/en"], max_depth=2,
+            checkpoint_path="crawl.json"
+        )
+        with open("edges.tsv", "a") as file:
+            async for edge in crawler.crawl():
+                file.write("{}\t{}\t{}\n".format(*edge[:3]))
+
+    - notes:
+        - documents are identified by publication number, so a document is
+        fetched once whatever language its links point to
+        - the frontier is deduplicated with a set, or with a 'BloomFilter'
+        when 'expected_nodes' is given; a false positive then skips a
+        document that was never fetched
+        - with 'checkpoint_path', the frontier is saved every
+        'checkpoint_every' documents and a later crawler with the same path
+        resumes from it instead of the seeds; edges of the documents fetched
+        after the last checkpoint are emitted again on resume
+        - documents that fail to download are skipped, see 'getFailures'
+    """
+
+
+    def __init__(
+        self,
+        seeds: Iterable[str],
+        max_depth: int = 1,
+        relations: Iterable[str] = tuple(RELATION_SECTIONS),
+        client: Optional["AsyncNetworkClient"] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        expected_nodes: Optional[int] = None,
+        error_rate: float = 0.001,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY
+        ):
+        r""" Constructor
+        - arguments:
+            - seeds: patent urls the crawl starts from; ex:
+            'patent/US9145048B2/en'
+            - max_depth: hops walked from the seeds; documents closer than
+            'max_depth' are fetched, edges reach documents 'max_depth' away
+            - relations: names, from 'RELATION_SECTIONS', of the edges
+            followed
+            - client: an 'AsyncNetworkClient' shared by every request; a
+            single client is opened for the crawl when omitted
+            - concurrency: number of workers fetching pages
+            - expected_nodes: if given, documents seen are tracked in a
+            'BloomFilter' sized for that many documents
+            - error_rate: false positive rate of the 'BloomFilter'
+            - checkpoint_path: json file the crawl state is saved to and
+            resumed from
+            - checkpoint_every: documents fetched between two checkpoints
+        - raises:
+            - ValueError: for an unknown relation, a 'max_depth' or a
+            'concurrency' smaller than 1
+        """
+        relations = tuple(relations)
+        unknown: Set[str] = set(relations).difference(RELATION_SECTIONS)
+        if unknown:
+            raise ValueError("unknown relations {}, expected some of {}"\
+                .format(sorted(unknown), list(RELATION_SECTIONS)))
+        if max_depth < 1 or concurrency < 1:
+            raise ValueError(
+                "max_depth and concurrency must be >= 1, got max_depth={} "
+                "concurrency={}".format(max_depth, concurrency)
+            )
+        self._max_depth: int = max_depth
+        self._relations: Tuple[str, ...] = relations
+        self._sections: frozenset = frozenset(
+            RELATION_SECTIONS[relation] for relation in relations
+        )
+        self._client: Optional["AsyncNetworkClient"] = client
+        self._concurrency: int = concurrency
+        self._checkpoint_path: Optional[str] = checkpoint_path
+        self._checkpoint_every: int = checkpoint_every
+
+        self._seen: Union[Set[str], BloomFilter] = set() \
+            if expected_nodes is None \
+            else BloomFilter(expected_nodes, error_rate)
+        """ publication numbers of the documents queued so far """
+        self._pending: Dict[str, int] = {}
+        """ id_urls queued or in flight, with their depth, in queue order """
+        self._failures: List[str] = []
+        self.stats: Dict[str, int] = dict.fromkeys((
+            "fetched", "failed", "edges", "checkpoints"
+        ), 0)
+
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self._loadCheckpoint()
+        else:
+            for id_url in seeds:
+                self._enqueue(id_url, 0)
+        return
+
+
+    def getFailures(self) -> List[str]:
+        r""" Instance Method - Get Failures
+        - returns:
+            - the id_urls that could not be fetched, ex: to retry them
+        """
+        return list(self._failures)
+
+
+    def getPendingCount(self) -> int:
+        return len(self._pending)
+
+
+    def _enqueue(self, id_url: str, depth: int) -> bool:
+        match = _ID_URL_PATTERN.search(id_url)
+        key: str = (match.group("number") if match else id_url).upper()
+        if isinstance(self._seen, set):
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+        elif not self._seen.add(key):
+            return False
+        self._pending[id_url] = depth
+        return True
+
+
+    def _extractEdges(
+        self,
+        id_url: str,
+        depth: int,
+        response: GooglePatentResponse
+        ) -> List[Tuple[CrawlEdge, Optional[str]]]:
+        match = _ID_URL_PATTERN.search(id_url)
+        source: str = response.publication_number \
+            or (match.group("number") if match else id_url)
+        references: Dict[str, List[PatentPublication]] = {
+            "family": response.family.members if response.family else [],
+            "cites": response.citations,
+            "cited_by": response.cited_by,
+        }
+        edges: List[Tuple[CrawlEdge, Optional[str]]] = []
+        for relation in self._relations:
+            for publication in references[relation]:
+                if not publication.publication_number:
+                    continue
+                edges.append((
+                    CrawlEdge(
+                        source, publication.publication_number, relation,
+                        depth
+                    ),
+                    publication.id or "patent/{}/en".format(
+                        publication.publication_number
+                    )
+                ))
+        return edges
+
+
+    async def crawl(self) -> AsyncIterator[CrawlEdge]:
+        r""" Instance Method - Crawl
+        - arguments:
+        - returns:
+            - an async iterator of 'CrawlEdge' objects, yielded as documents
+            are fetched
+        - notes:
+            - the crawl ends when the frontier is exhausted; closing the
+            iterator early cancels the workers, and the last checkpoint still
+            allows resuming
+        """
+        if self._client is None:
+            from ..core.network import AsyncNetworkClient
+            async with AsyncNetworkClient() as client:
+                self._client = client
+                try:
+                    async for edge in self.crawl():
+                        yield edge
+                finally:
+                    self._client = None
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        done: asyncio.Queue = asyncio.Queue()
+        for id_url, depth in self._pending.items():
+            queue.put_nowait((id_url, depth))
+
+        async def _work() -> None:
+            while True:
+                id_url, depth = await queue.get()
+                try:
+                    response: GooglePatentResponse = await getPatentData(
+                        id_url, self._client, sections=self._sections
+                    )
+                except Exception as error:
+                    done.put_nowait((id_url, depth, None, error))
+                else:
+                    done.put_nowait((id_url, depth, response, None))
+
+        workers: List[asyncio.Task] = [
+            asyncio.ensure_future(_work()) for _ in range(self._concurrency)
+        ]
+        logger: logging.Logger = getLibraryLogger()
+        try:
+            while self._pending:
+                id_url, depth, response, error = await done.get()
+                del self._pending[id_url]
+                if error is not None:
+                    self.stats["failed"] += 1
+                    self._failures.append(id_url)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "crawl skipped %s: %r", id_url, error,
+                            extra={"url": id_url}
+                        )
+                    continue
+
+                edges = self._extractEdges(id_url, depth, response)
+                if depth + 1 < self._max_depth:
+                    for _, target_url in edges:
+                        if self._enqueue(target_url, depth + 1):
+                            queue.put_nowait((target_url, depth + 1))
+                self.stats["fetched"] += 1
+                for edge, _ in edges:
+                    self.stats["edges"] += 1
+                    yield edge
+
+                if self.stats["fetched"] % self._checkpoint_every == 0:
+                    self.saveCheckpoint()
+            self.saveCheckpoint()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+    def saveCheckpoint(self) -> None:
+        r""" Instance Method - Save Checkpoint
+        - arguments:
+        - returns:
+        - notes:
+            - atomically replaces 'checkpoint_path' with the frontier, the
+            documents seen and the failures; a no-op without a path
+        """
+        if self._checkpoint_path is None:
+            return None
+        state: Dict[str, Any] = {
+            "version": _CHECKPOINT_VERSION,
+            "pending": list(self._pending.items()),
+            "seen": sorted(self._seen) if isinstance(self._seen, set)
+                else self._seen.dump(),
+            "failures": self._failures,
+            "stats": self.stats,
+        }
+        temporary_path: str = self._checkpoint_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temporary_path, self._checkpoint_path)
+        self.stats["checkpoints"] += 1
+        return None
+
+
+    def _loadCheckpoint(self) -> None:
+        with open(self._checkpoint_path, "r", encoding="utf-8") as file:
+            state: Dict[str, Any] = json.load(file)
+        if state.get("version") != _CHECKPOINT_VERSION:
+            raise ValueError("unsupported checkpoint version {!r} in {}"\
+                .format(state.get("version"), self._checkpoint_path))
+        self._pending = {id_url: depth for id_url, depth in state["pending"]}
+        self._seen = set(state["seen"]) if isinstance(state["seen"], list) \
+            else BloomFilter.load(state["seen"])
+        self._failures = state["failures"]
+        self.stats.update(state["stats"])
+        return None
+
+
+    pass # end of PatentGraphCrawler
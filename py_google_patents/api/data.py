@@ -2,33 +2,102 @@ r""" py_google_patents.api.data module """
 
 
 # importing standard modules ==================================================
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Iterable, AsyncIterable, \
+    AsyncIterator, List, Union, Tuple, TYPE_CHECKING
+import asyncio, collections, urllib.parse
 
 
 # importing custom modules ====================================================
-from ..common.config import getLibraryLogger
-from ..models.response_models import GoogleParseResponse, GooglePatentResponse
-from ..core.network import http_get_parse_endpoint_response, \
-    http_get_result_endpoint_response
+from ..models.response_models import GoogleParseResponse, \
+    GooglePatentResponse, GoogleParseQueryResult, GoogleQueryResponse, \
+    PatentMetaData
+from ..core.memo import MemoryLRUCache, SingleFlight
+from ..core.bulk import BulkItemResult, bounded_map, DEFAULT_CONCURRENCY
 from ..core.data_parsers import parse_parse_endpoint_response_data, \
-    parse_result_endpoint_response_data
+    parse_query_endpoint_response_data, parse_result_endpoint_response_data
+
+if TYPE_CHECKING:
+    from ..core.network import AsyncNetworkClient
+    from ..core.executor import ParseExecutor
+    from ..core.export import ResponseSink
+    from ..core.refresh import FingerprintStore
+
+# the network stack (aiohttp), the html stack (lxml) and the worker pools are
+# imported on first use, so that importing this module stays cheap for
+# processes that only parse cached json or never fetch
+
+
+# module variables ============================================================
+RECOMMENDATIONS_CACHE: MemoryLRUCache = MemoryLRUCache(maxsize=4096, ttl=300.0)
+""" parsed 'GoogleParseResponse' objects, by (base url, text) """
+
+_RECOMMENDATIONS_FLIGHTS: SingleFlight = SingleFlight()
+_PATENT_DATA_FLIGHTS: SingleFlight = SingleFlight()
 
 
 # method definitions ==========================================================
-async def getTextRecommendations(text: str) -> GoogleParseResponse:
+def _flight_key(
+    client: Optional["AsyncNetworkClient"],
+    *values: Any
+    ) -> Tuple:
+    from ..core.network import GOOGLE_PATENTS_BASE_URL
+    return (
+        client.getBaseUrl() if client is not None else GOOGLE_PATENTS_BASE_URL,
+    ) + values
+
+
+async def getTextRecommendations(
+    text: str,
+    client: Optional["AsyncNetworkClient"] = None,
+    memoize: bool = True,
+    trusted: bool = False
+    ) -> GoogleParseResponse:
     r""" Feature Function - Get Text Recommendations 
     - arguments:
         - text: a string to send to patents.google.com to get recommendations
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused
+        across calls; a short-lived one is opened when omitted
+        - memoize: if True, answers from 'RECOMMENDATIONS_CACHE' when possible
+        and stores the parsed response in it
+        - trusted: if True, the response is turned into models without
+        validation; see 'parse_parse_endpoint_response_data'
     - returns:
         - an object of type 'GoogleParseResponse'
+    - notes:
+        - concurrent calls made with the same arguments share one outstanding
+        request
+        - memoized responses are shared between callers and must be treated
+        as read-only
     """
 
-    raw_data: Dict[str, Any] = await http_get_parse_endpoint_response( text )
+    key: Tuple = _flight_key(client, text, trusted)
+    if memoize:
+        cached: Optional[GoogleParseResponse] = RECOMMENDATIONS_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    from ..core.network import http_get_parse_endpoint_response
+
+    async def _fetch() -> GoogleParseResponse:
+        raw_data: Dict[str, Any] = await http_get_parse_endpoint_response(
+            text, client
+        )
+        result: GoogleParseResponse = \
+            parse_parse_endpoint_response_data( raw_data, trusted )
+        if memoize:
+            RECOMMENDATIONS_CACHE.put(key, result)
+        return result
 
-    return parse_parse_endpoint_response_data( raw_data )
+    return await _RECOMMENDATIONS_FLIGHTS.do(key + (memoize,), _fetch)
 
 
-async def getPatentData(id_url: str) -> GooglePatentResponse:
+async def getPatentData(
+    id_url: str,
+    client: Optional["AsyncNetworkClient"] = None,
+    executor: Optional["ParseExecutor"] = None,
+    sections: Optional[Iterable[str]] = None,
+    lazy: bool = False
+    ) -> GooglePatentResponse:
     r""" Feature Function - Get Patent Data 
     - arguments:
         - id_url: a string containing the url of the patent to be extracted 
@@ -36,10 +105,417 @@ async def getPatentData(id_url: str) -> GooglePatentResponse:
             - examples:
                 - 'patent/WO2022109623A1/fr' 
                 - 'patent/<number>/<lang code>'
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused
+        across calls; a short-lived one is opened when omitted
+        - executor: the 'ParseExecutor' the html is handed to for parsing;
+        the process-wide default executor (a process pool) when omitted
+        - sections: names of the sections to extract, from 'RESULT_SECTIONS';
+        when given, the page is parsed while it downloads and reading stops
+        once these sections are complete
+        - lazy: if True, returns a 'LazyGooglePatentResponse' that keeps the
+        html and parses each section on first access; ignored when
+        'sections' is given
     - returns:
-        - an object of type 'GooglePatentResponse'
+        - an object of type 'GooglePatentResponse'; sections that were not
+        requested are left empty
+    - raises:
+        - ValueError: if a section name is unknown
+    - notes:
+        - concurrent calls made with the same arguments (ex: duplicates
+        inside a bulk batch) share one outstanding request and its parsed
+        response
+        - a section-restricted page is parsed incrementally on the event
+        loop, chunk by chunk, instead of on the executor
+        - a lazy response only pre-scans the page and parses its metadata, on
+        the event loop
     """
 
-    raw_data: str = await http_get_result_endpoint_response( id_url )
+    from ..core.network import http_get_result_endpoint_response, \
+        http_stream_result_endpoint_response
+
+    if sections is not None:
+        from ..core.html_parsers import ResultPageBuilder, RESULT_SECTIONS
+        sections = frozenset(sections)
+        unknown = sections.difference(RESULT_SECTIONS)
+        if unknown:
+            raise ValueError("unknown sections {}".format(sorted(unknown)))
+
+        async def _stream() -> GooglePatentResponse:
+            return await http_stream_result_endpoint_response(
+                id_url, lambda: ResultPageBuilder(sections), client
+            )
+
+        return await _PATENT_DATA_FLIGHTS.do(
+            _flight_key(client, id_url, sections), _stream
+        )
+
+    async def _fetch() -> GooglePatentResponse:
+        raw_data: str = await http_get_result_endpoint_response(
+            id_url, client
+        )
+        if lazy:
+            return parse_result_endpoint_response_data( raw_data, lazy=True )
+        from ..core.executor import get_default_parse_executor
+        return await (executor or get_default_parse_executor())\
+            .parseResult( raw_data )
+
+    return await _PATENT_DATA_FLIGHTS.do(
+        _flight_key(client, id_url, lazy, None if lazy else executor), _fetch
+    )
+
+
+# -----------------------------------------------------------------------------
+async def getTextRecommendationsMany(
+    texts: Union[Iterable[str], AsyncIterable[str]],
+    client: Optional["AsyncNetworkClient"] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    trusted: bool = False
+    ) -> AsyncIterator[BulkItemResult]:
+    r""" Feature Function - Get Text Recommendations Many
+    - arguments:
+        - texts: an iterable (or async iterable) of strings to send to
+        patents.google.com to get recommendations
+        - client: an 'AsyncNetworkClient' shared by every request; a single
+        client is opened for the whole batch when omitted
+        - concurrency: maximum number of requests in flight at once
+        - ordered: if True, results are yielded in input order; otherwise as
+        soon as they complete
+        - trusted: if True, responses are turned into models without
+        validation; see 'getTextRecommendations'
+    - returns:
+        - an async iterator of 'BulkItemResult' objects whose 'result' field
+        holds a 'GoogleParseResponse' and whose 'error' field holds the
+        exception raised for that text, if any
+    """
+
+    if client is None:
+        from ..core.network import AsyncNetworkClient
+        async with AsyncNetworkClient() as _client:
+            async for result in getTextRecommendationsMany(
+                texts, _client, concurrency, ordered, trusted
+            ):
+                yield result
+        return
+
+    async def _fetch(text: str) -> GoogleParseResponse:
+        return await getTextRecommendations(
+            text, client, trusted=trusted
+        )
+
+    async for result in bounded_map(_fetch, texts, concurrency, ordered):
+        yield result
+
+
+async def getPatentDataMany(
+    id_urls: Union[Iterable[str], AsyncIterable[str]],
+    client: Optional["AsyncNetworkClient"] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    executor: Optional["ParseExecutor"] = None,
+    sections: Optional[Iterable[str]] = None,
+    lazy: bool = False
+    ) -> AsyncIterator[BulkItemResult]:
+    r""" Feature Function - Get Patent Data Many
+    - arguments:
+        - id_urls: an iterable (or async iterable) of patent urls; ex:
+        'patent/<number>/<lang code>'
+        - client: an 'AsyncNetworkClient' shared by every request; a single
+        client is opened for the whole batch when omitted
+        - concurrency: maximum number of requests in flight at once
+        - ordered: if True, results are yielded in input order; otherwise as
+        soon as they complete
+        - executor: the 'ParseExecutor' pages are parsed on; the process-wide
+        default executor when omitted
+        - sections: names of the sections to extract; see 'getPatentData'
+        - lazy: if True, yields responses parsed on access; see 'getPatentData'
+    - returns:
+        - an async iterator of 'BulkItemResult' objects whose 'result' field
+        holds a 'GooglePatentResponse' and whose 'error' field holds the
+        exception raised for that id_url, if any
+    """
+
+    if sections is not None:
+        sections = frozenset(sections)
+
+    if client is None:
+        from ..core.network import AsyncNetworkClient
+        async with AsyncNetworkClient() as _client:
+            async for result in getPatentDataMany(
+                id_urls, _client, concurrency, ordered, executor, sections,
+                lazy
+            ):
+                yield result
+        return
+
+    async def _fetch(id_url: str) -> GooglePatentResponse:
+        return await getPatentData(
+            id_url, client, executor, sections, lazy
+        )
+
+    async for result in bounded_map(_fetch, id_urls, concurrency, ordered):
+        yield result
+
+
+async def getQueryResults(
+    query: Union[str, GoogleParseQueryResult],
+    client: Optional["AsyncNetworkClient"] = None,
+    max_results: Optional[int] = None,
+    page_size: Optional[int] = None,
+    prefetch: int = 1,
+    raw_params: bool = False
+    ) -> AsyncIterator[PatentMetaData]:
+    r""" Feature Function - Get Query Results
+    - arguments:
+        - query: search text, sent as the 'q' parameter, or a
+        'GoogleParseQueryResult' received from 'getTextRecommendations'
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused;
+        a short-lived one is opened for the whole enumeration when omitted
+        - max_results: number of documents after which the enumeration stops;
+        every page the server serves when omitted
+        - page_size: results per page; the server's default when omitted
+        - prefetch: pages requested ahead of the one being consumed
+        - raw_params: if True, a string 'query' is a prebuilt, url-encoded
+        parameter string, as in 'GoogleParseQueryResult.query_url' (ex:
+        'q=(hybrid+AND+engine)&oq=(hybrid+AND+engine)')
+    - returns:
+        - an async iterator of 'PatentMetaData' objects, in rank order
+    - raises:
+        - the exceptions of the page requests, when the page is reached
+    - notes:
+        - the first page gives the number of pages; later pages are then
+        requested 'prefetch' at a time ahead of the caller, so downloads
+        overlap with whatever the caller does with the results
+        - the server serves at most 100 pages of a query, whatever its
+        'total_num_results'
+        - closing the iterator early cancels the pages in flight
+    """
+
+    if isinstance(query, GoogleParseQueryResult):
+        query = query.query_url or ""
+    elif not raw_params:
+        query = "q=" + urllib.parse.quote_plus(query, safe="()")
+
+    if client is None:
+        from ..core.network import AsyncNetworkClient
+        # 'query' is already a parameter string: it must not be encoded twice
+        async with AsyncNetworkClient() as _client:
+            async for result in getQueryResults(
+                query, _client, max_results, page_size, prefetch,
+                raw_params=True
+            ):
+                yield result
+        return
+
+    from ..core.network import http_get_query_endpoint_response
+
+    async def _page(page: int) -> GoogleQueryResponse:
+        return parse_query_endpoint_response_data(
+            await http_get_query_endpoint_response(
+                query, page, page_size, client
+            )
+        )
+
+    pending: collections.deque = collections.deque([
+        asyncio.ensure_future(_page(0))
+    ])
+    next_page: int = 1
+    last_page: Optional[int] = None
+    count: int = 0
+    try:
+        while pending:
+            response: GoogleQueryResponse = await pending.popleft()
+            if last_page is None:
+                last_page = response.total_num_pages
+                if max_results is not None and response.results:
+                    last_page = min(
+                        last_page, -(-max_results // len(response.results))
+                    )
+            while next_page < last_page and len(pending) < prefetch:
+                pending.append(asyncio.ensure_future(_page(next_page)))
+                next_page += 1
+
+            for result in response.results:
+                if max_results is not None and count >= max_results:
+                    return
+                count += 1
+                yield result
+            if not response.results:
+                return
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def getQueryPatentDataMany(
+    query: Union[str, GoogleParseQueryResult],
+    client: Optional["AsyncNetworkClient"] = None,
+    max_results: Optional[int] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    executor: Optional["ParseExecutor"] = None,
+    sections: Optional[Iterable[str]] = None,
+    lazy: bool = False,
+    page_size: Optional[int] = None,
+    raw_params: bool = False
+    ) -> AsyncIterator[BulkItemResult]:
+    r""" Feature Function - Get Query Patent Data Many
+    - arguments:
+        - query, max_results, page_size, raw_params: see 'getQueryResults'
+        - client, concurrency, ordered, executor, sections, lazy: see
+        'getPatentDataMany'
+    - returns:
+        - an async iterator of 'BulkItemResult' objects whose 'item' is the
+        id_url of a result and whose 'result' holds its
+        'GooglePatentResponse'
+    - notes:
+        - documents are requested while the later result pages are still
+        downloading; 'concurrency' bounds the document requests only
+    """
+
+    if client is None:
+        from ..core.network import AsyncNetworkClient
+        async with AsyncNetworkClient() as _client:
+            async for result in getQueryPatentDataMany(
+                query, _client, max_results, concurrency, ordered, executor,
+                sections, lazy, page_size, raw_params
+            ):
+                yield result
+        return
+
+    async def _id_urls() -> AsyncIterator[str]:
+        async for result in getQueryResults(
+            query, client, max_results, page_size, raw_params=raw_params
+        ):
+            if result.id:
+                yield result.id
+
+    id_urls: AsyncIterator[str] = _id_urls()
+    try:
+        async for result in getPatentDataMany(
+            id_urls, client, concurrency, ordered, executor, sections, lazy
+        ):
+            yield result
+    finally:
+        await id_urls.aclose()
+
+
+async def exportPatentDataMany(
+    id_urls: Union[Iterable[str], AsyncIterable[str]],
+    sink: "ResponseSink",
+    client: Optional["AsyncNetworkClient"] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    executor: Optional["ParseExecutor"] = None,
+    sections: Optional[Iterable[str]] = None
+    ) -> List[BulkItemResult]:
+    r""" Feature Function - Export Patent Data Many
+    - arguments:
+        - id_urls: an iterable (or async iterable) of patent urls; ex:
+        'patent/<number>/<lang code>'
+        - sink: a 'ResponseSink' every parsed response is written to, ex: a
+        'JsonlSink' or a 'ParquetSink'; it is flushed, not closed
+        - client, concurrency, ordered, executor, sections: see
+        'getPatentDataMany'
+    - returns:
+        - the 'BulkItemResult' objects of the id_urls that failed
+    - notes:
+        - responses are written as they complete and dropped right after, so
+        memory stays bounded by the sink's buffer however long the crawl
+        - writes happen on the event loop; a parquet row group flush blocks
+        it briefly every 'row_group_size' documents
+    """
+
+    failures: List[BulkItemResult] = []
+    async for result in getPatentDataMany(
+        id_urls, client, concurrency, ordered, executor, sections
+    ):
+        if result.ok:
+            sink.write(result.result)
+        else:
+            failures.append(result)
+    sink.flush()
+    return failures
+
+
+async def refreshPatentDataMany(
+    id_urls: Union[Iterable[str], AsyncIterable[str]],
+    store: "FingerprintStore",
+    client: Optional["AsyncNetworkClient"] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    executor: Optional["ParseExecutor"] = None,
+    changed_only: bool = True
+    ) -> AsyncIterator[BulkItemResult]:
+    r""" Feature Function - Refresh Patent Data Many
+    - arguments:
+        - id_urls: an iterable (or async iterable) of patent urls; ex:
+        'patent/<number>/<lang code>'
+        - store: the 'FingerprintStore' remembering what each document looked
+        like at the previous refresh; updated as documents are checked
+        - client, concurrency, ordered, executor: see 'getPatentDataMany'
+        - changed_only: if False, documents found unchanged are yielded too
+    - returns:
+        - an async iterator of 'BulkItemResult' objects whose 'result' field
+        holds a 'RefreshResult' and whose 'error' field holds the exception
+        raised for that id_url, if any; by default only the 'new' and
+        'changed' documents, and the failures, are yielded
+    - notes:
+        - requests are conditional ('If-None-Match' / 'If-Modified-Since');
+        a 304 skips the download, and a body hashing like the stored one
+        skips the parsing
+        - a failed document keeps its previous fingerprint, so it is tried
+        again by the next refresh
+        - the response cache is bypassed; see
+        'AsyncNetworkClient.fetchConditional'
+    """
+
+    if client is None:
+        from ..core.network import AsyncNetworkClient
+        async with AsyncNetworkClient() as _client:
+            async for result in refreshPatentDataMany(
+                id_urls, store, _client, concurrency, ordered, executor,
+                changed_only
+            ):
+                yield result
+        return
+
+    from ..core.network import build_result_endpoint_url
+    from ..core.refresh import RefreshResult
+    from ..core.executor import get_default_parse_executor
+
+    async def _refresh(id_url: str) -> RefreshResult:
+        url = build_result_endpoint_url(id_url, client.getBaseUrl())
+        stored = await asyncio.to_thread(store.get, id_url)
+        fetched = await client.fetchConditional(
+            url,
+            stored.etag if stored else None,
+            stored.last_modified if stored else None
+        )
+        status: str = await asyncio.to_thread(
+            store.update, id_url, fetched.body, fetched.etag,
+            fetched.last_modified
+        )
+        if status == "new" and fetched.body is None:
+            # a 304, but the fingerprint it was validated against is gone
+            # (ex: deleted by another refresher sharing the store): download
+            # the document unconditionally
+            fetched = await client.fetchConditional(url, None, None)
+            if fetched.body is None:
+                return RefreshResult(id_url, "not_modified", None)
+        if status not in ("new", "changed"):
+            return RefreshResult(id_url, status, None)
+
+        response: GooglePatentResponse = await (
+            executor or get_default_parse_executor()
+        ).parseResult(fetched.body.decode("utf-8", errors="replace"))
+        await asyncio.to_thread(store.put, id_url, store.build(
+            fetched.body, fetched.etag, fetched.last_modified
+        ))
+        return RefreshResult(id_url, status, response)
 
-    return parse_result_endpoint_response_data( raw_data )
+    async for result in bounded_map(_refresh, id_urls, concurrency, ordered):
+        if changed_only and result.ok and not result.result.changed:
+            continue
+        yield result
@@ -0,0 +1,340 @@
+r""" py_google_patents.api.sync module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, \
+    TypeVar, Union, TYPE_CHECKING
+import asyncio, concurrent.futures, os, threading
+
+
+# importing custom modules ====================================================
+from ..models.response_models import GoogleParseResponse, \
+    GooglePatentResponse, GoogleParseQueryResult, PatentMetaData
+from ..core.bulk import BulkItemResult, DEFAULT_CONCURRENCY
+from .data import getTextRecommendations, getPatentData, getPatentDataMany, \
+    exportPatentDataMany, getQueryResults
+
+if TYPE_CHECKING:
+    from ..core.network import AsyncNetworkClient
+    from ..core.executor import ParseExecutor
+    from ..core.export import ResponseSink
+
+
+# module variables ============================================================
+_T = TypeVar("_T")
+
+
+# class definitions ===========================================================
+class SyncClient:
+    r""" class exposing the 'py_google_patents.api.data' functions to
+    blocking code (threaded wsgi apps, celery workers); calls are submitted
+    to one long-running event loop thread owning a single pooled
+    'AsyncNetworkClient', so that every calling thread shares its
+    connections, rate limiter and caches
+
+    - usage:
+        with SyncClient(rate_limiter=TokenBucketRateLimiter(10)) as client:
+            patent = client.get_patent("patent/US9145048B2/en")
+
+    - notes:
+        - thread-safe; meant to be created once per process and shared
+        - after a fork (ex: prefork celery workers), the child lazily starts
+        its own loop thread and client on first use
+        - pages are parsed on a thread pool owned by the client unless an
+        executor is given: the process-wide default is a process pool, which
+        a multi-threaded host should not share with arbitrary callers
+        - methods must not be called from coroutines running on the client's
+        own loop
+    """
+
+
+    def __init__(
+        self,
+        executor: Optional["ParseExecutor"] = None,
+        timeout: Optional[float] = None,
+        **client_kwargs: Any
+        ):
+        r""" Constructor
+        - arguments:
+            - executor: the 'ParseExecutor' pages are parsed on; when
+            omitted, a 'thread' executor created for (and shut down with)
+            this client
+            - timeout: default seconds a call waits for its result; None
+            waits forever
+            - client_kwargs: arguments of the 'AsyncNetworkClient' owned by
+            the loop thread, ex: 'base_url', 'rate_limiter', 'cache'
+        """
+        self._executor: Optional["ParseExecutor"] = executor
+        self._owns_executor: bool = executor is None
+        self._timeout: Optional[float] = timeout
+        self._client_kwargs: Dict[str, Any] = client_kwargs
+        self._lock: threading.Lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional["AsyncNetworkClient"] = None
+        self._pid: Optional[int] = None
+        self._closed: bool = False
+        return
+
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def getClient(self) -> "AsyncNetworkClient":
+        r""" Instance Method - Get Client
+        - returns:
+            - the 'AsyncNetworkClient' owned by the loop thread, starting
+            the thread on first use
+        """
+        self._start()
+        return self._client
+
+
+    def getLoop(self) -> asyncio.AbstractEventLoop:
+        self._start()
+        return self._loop
+
+
+    def _start(self) -> None:
+        if self._pid == os.getpid():
+            return None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SyncClient is closed")
+            if self._pid == os.getpid():
+                return None
+
+            # first use, or first use after a fork: the parent's thread did
+            # not survive and its loop and connections must not be touched
+            from ..core.network import AsyncNetworkClient
+            if self._owns_executor:
+                # nor did the parent's parsing threads
+                from ..core.executor import ParseExecutor
+                self._executor = ParseExecutor("thread")
+            loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+            thread: threading.Thread = threading.Thread(
+                target=loop.run_forever, name="py_google_patents-sync",
+                daemon=True
+            )
+            thread.start()
+            client: AsyncNetworkClient = AsyncNetworkClient(
+                **self._client_kwargs
+            )
+            asyncio.run_coroutine_threadsafe(client.open(), loop).result()
+            self._loop, self._thread, self._client = loop, thread, client
+            self._pid = os.getpid()
+        return None
+
+
+    def close(self) -> None:
+        r""" Instance Method - Close
+        - arguments:
+        - returns:
+        - notes:
+            - closes the pooled client and stops the loop thread; calls
+            still in flight are cancelled
+        """
+        with self._lock:
+            self._closed = True
+            if self._pid != os.getpid():
+                return None
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = self._pid = None
+            executor: Optional["ParseExecutor"] = self._executor \
+                if self._owns_executor else None
+
+        async def _shutdown() -> None:
+            tasks = [
+                task for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await client.close()
+            return None
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        if executor is not None:
+            executor.shutdown()
+        return None
+
+
+    def _run(
+        self,
+        func: Callable[["AsyncNetworkClient"], Awaitable[_T]],
+        timeout: Optional[float]
+        ) -> _T:
+        self._start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError(
+                "SyncClient methods cannot be called from its own event loop"
+            )
+        future: concurrent.futures.Future = asyncio.run_coroutine_threadsafe(
+            func(self._client), self._loop
+        )
+        try:
+            return future.result(
+                timeout if timeout is not None else self._timeout
+            )
+        except BaseException:
+            # ex: a timeout, or a KeyboardInterrupt in the calling thread
+            future.cancel()
+            raise
+
+
+    def get_patent(
+        self,
+        id_url: str,
+        sections: Optional[Iterable[str]] = None,
+        lazy: bool = False,
+        timeout: Optional[float] = None
+        ) -> GooglePatentResponse:
+        r""" Instance Method - Get Patent
+        - arguments:
+            - id_url: ex: 'patent/US9145048B2/en'
+            - sections, lazy: see 'py_google_patents.api.data.getPatentData'
+            - timeout: seconds to wait; the client's default when omitted
+        - returns:
+            - an object of type 'GooglePatentResponse'
+        - raises:
+            - concurrent.futures.TimeoutError: once 'timeout' elapsed; the
+            request is cancelled
+        """
+        return self._run(
+            lambda client: getPatentData(
+                id_url, client, self._executor, sections, lazy
+            ),
+            timeout
+        )
+
+
+    def get_recommendations(
+        self,
+        text: str,
+        memoize: bool = True,
+        trusted: bool = False,
+        timeout: Optional[float] = None
+        ) -> GoogleParseResponse:
+        r""" Instance Method - Get Recommendations
+        - arguments:
+            - text: a string to send to patents.google.com
+            - memoize, trusted: see
+            'py_google_patents.api.data.getTextRecommendations'
+            - timeout: seconds to wait; the client's default when omitted
+        - returns:
+            - an object of type 'GoogleParseResponse'
+        """
+        return self._run(
+            lambda client: getTextRecommendations(
+                text, client, memoize, trusted
+            ),
+            timeout
+        )
+
+
+    def get_query_results(
+        self,
+        query: Union[str, GoogleParseQueryResult],
+        max_results: Optional[int] = None,
+        page_size: Optional[int] = None,
+        raw_params: bool = False,
+        timeout: Optional[float] = None
+        ) -> List[PatentMetaData]:
+        r""" Instance Method - Get Query Results
+        - arguments:
+            - query, max_results, page_size, raw_params: see
+            'py_google_patents.api.data.getQueryResults'
+            - timeout: seconds to wait for all the pages; the client's
+            default when omitted
+        - returns:
+            - a list of 'PatentMetaData' objects, in rank order
+        """
+
+        async def _collect(
+            client: "AsyncNetworkClient"
+            ) -> List[PatentMetaData]:
+            return [
+                result async for result in getQueryResults(
+                    query, client, max_results, page_size,
+                    raw_params=raw_params
+                )
+            ]
+
+        return self._run(_collect, timeout)
+
+
+    def get_patents_many(
+        self,
+        id_urls: Iterable[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        ordered: bool = True,
+        sections: Optional[Iterable[str]] = None,
+        lazy: bool = False,
+        timeout: Optional[float] = None
+        ) -> List[BulkItemResult]:
+        r""" Instance Method - Get Patents Many
+        - arguments:
+            - id_urls: patent urls; ex: 'patent/<number>/<lang code>'
+            - concurrency: maximum number of requests in flight at once
+            - ordered: if True, results are returned in input order
+            - sections, lazy: see 'py_google_patents.api.data.getPatentData'
+            - timeout: seconds to wait for the whole batch; the client's
+            default when omitted
+        - returns:
+            - a list of 'BulkItemResult' objects; failures are reported in
+            their 'error' field instead of being raised
+        """
+        id_urls = list(id_urls)
+
+        async def _collect(
+            client: "AsyncNetworkClient"
+            ) -> List[BulkItemResult]:
+            return [
+                result async for result in getPatentDataMany(
+                    id_urls, client, concurrency, ordered, self._executor,
+                    sections, lazy
+                )
+            ]
+
+        return self._run(_collect, timeout)
+
+
+    def export_patents_many(
+        self,
+        id_urls: Iterable[str],
+        sink: "ResponseSink",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        sections: Optional[Iterable[str]] = None,
+        timeout: Optional[float] = None
+        ) -> List[BulkItemResult]:
+        r""" Instance Method - Export Patents Many
+        - arguments:
+            - id_urls: patent urls; ex: 'patent/<number>/<lang code>'
+            - sink: the 'ResponseSink' responses are written to; it is
+            written from the loop thread and must not be used concurrently
+            - concurrency, sections: see 'get_patents_many'
+            - timeout: seconds to wait for the whole batch; the client's
+            default when omitted
+        - returns:
+            - the 'BulkItemResult' objects of the id_urls that failed
+        """
+        return self._run(
+            lambda client: exportPatentDataMany(
+                id_urls, sink, client, concurrency, False, self._executor,
+                sections
+            ),
+            timeout
+        )
+
+
+    pass # end of SyncClient
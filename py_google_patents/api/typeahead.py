@@ -0,0 +1,260 @@
+r""" py_google_patents.api.typeahead module """
+
+
+# importing standard modules ==================================================
+from typing import Dict, Optional, TYPE_CHECKING
+import asyncio, collections, re
+
+
+# importing custom modules ====================================================
+from ..models.response_models import GoogleParseResponse, \
+    GoogleParsePatentResult
+from ..core.data_parsers import parse_parse_endpoint_response_data
+from .data import RECOMMENDATIONS_CACHE, _flight_key
+
+if TYPE_CHECKING:
+    from ..core.network import AsyncNetworkClient
+
+
+# module variables ============================================================
+DEFAULT_DEBOUNCE: float = 0.15
+""" seconds a keystroke waits for the next one before its request is sent """
+
+DEFAULT_HISTORY: int = 64
+""" responses a session keeps to answer longer prefixes from """
+
+MAX_RECOMMENDATIONS: int = 10
+""" longest list the server is assumed to return; a list this long may have
+been cut short, so it is never narrowed locally """
+
+_NON_ALPHANUMERIC: re.Pattern = re.compile(r"[^0-9A-Za-z]+")
+_NUMBER_PREFIX: re.Pattern = re.compile(r"[A-Z]{2}\d+[A-Z]?\d*")
+""" a normalized publication number prefix, ex: 'US9145048B' """
+
+
+# method definitions ==========================================================
+def _normalize(text: str) -> str:
+    return _NON_ALPHANUMERIC.sub("", text).upper()
+
+
+def narrow_recommendations(
+    response: GoogleParseResponse,
+    prefix: str,
+    text: str
+    ) -> Optional[GoogleParseResponse]:
+    r""" Function - Narrow Recommendations
+    - arguments:
+        - response: the response received for 'prefix'
+        - prefix: a prefix of 'text' (ignoring case, spaces and punctuation)
+        - text: the longer text
+    - returns:
+        - the response for 'text', made of the patents of 'response' whose
+        number starts with 'text' (ignoring case, spaces and punctuation);
+        None when it cannot be answered locally
+    - notes:
+        - '/xhr/parse' is not a pure prefix search (ex: 'us9145048' also
+        suggests 'US6182754B1') and its lists are capped, so a list is only
+        narrowed when that is provably what the server would answer: 'text'
+        is a publication number prefix, every patent of the list starts with
+        'prefix' and the list is shorter than 'MAX_RECOMMENDATIONS'
+        - query suggestions ('query_url' results) and 'no patents found'
+        answers are never narrowed, as a longer text can turn either into a
+        different kind of answer
+        - None is returned as well when no patent matches, the server is then
+        asked for the longer text
+    """
+    if response.error_no_patents_found or not response.results \
+        or len(response.results) >= MAX_RECOMMENDATIONS:
+        return None
+    if not all(
+        isinstance(item, GoogleParsePatentResult) for item in response.results
+        ):
+        return None
+    shorter: str = _normalize(prefix)
+    prefix = _normalize(text)
+    if not prefix.startswith(shorter) or not _NUMBER_PREFIX.fullmatch(prefix):
+        return None
+    if not all(
+        _normalize(item.result.number or "").startswith(shorter)
+        for item in response.results
+        ):
+        return None
+    results = [
+        item for item in response.results
+        if _normalize(item.result.number or "").startswith(prefix)
+    ]
+    if not results:
+        return None
+    return GoogleParseResponse.construct(
+        error_no_patents_found=False, results=results
+    )
+
+
+# class definitions ===========================================================
+class TypeaheadSession:
+    r""" class backing a search box with '/xhr/parse' recommendations: every
+    keystroke calls 'query', and only the keystrokes the user paused on
+    reach the network
+
+    - usage:
+        session = TypeaheadSession(client)
+        async def on_keystroke(text):
+            response = await session.query(text)
+            if response is not None:
+                render(response)
+
+    - notes:
+        - a query is delayed by 'debounce' seconds; a newer query cancels it,
+        whether it is still waiting or already in flight, and the older call
+        returns None
+        - with 'local_filtering', longer publication numbers are answered
+        from the session's earlier responses when provably safe, see
+        'narrow_recommendations'; such answers skip the debounce delay
+        - meant for a single search box; a session is bound to the event loop
+        it is first queried on
+    """
+
+
+    def __init__(
+        self,
+        client: Optional["AsyncNetworkClient"] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        local_filtering: bool = False,
+        memoize: bool = True,
+        trusted: bool = False,
+        history: int = DEFAULT_HISTORY
+        ):
+        r""" Constructor
+        - arguments:
+            - client: an 'AsyncNetworkClient' whose pooled connections are
+            reused; a short-lived one is opened per request when omitted
+            - debounce: seconds a query waits before its request is sent
+            - local_filtering: if True, some texts are answered by narrowing
+            an earlier response instead of being sent to the server; answers
+            then match the server's only under the conditions listed in
+            'narrow_recommendations'
+            - memoize, trusted: see
+            'py_google_patents.api.data.getTextRecommendations'
+            - history: number of responses kept for local filtering
+        """
+        self._client: Optional["AsyncNetworkClient"] = client
+        self._debounce: float = debounce
+        self._local_filtering: bool = local_filtering
+        self._memoize: bool = memoize
+        self._trusted: bool = trusted
+        self._history: int = history
+        self._responses: collections.OrderedDict = collections.OrderedDict()
+        """ responses received by this session, by text, oldest first """
+        self._task: Optional[asyncio.Task] = None
+        self._generation: int = 0
+        self.stats: Dict[str, int] = dict.fromkeys((
+            "queries", "local", "cached", "network", "superseded"
+        ), 0)
+        return
+
+
+    def _remember(self, text: str, response: GoogleParseResponse) -> None:
+        self._responses[text] = response
+        self._responses.move_to_end(text)
+        while len(self._responses) > self._history:
+            self._responses.popitem(last=False)
+        return None
+
+
+    def _answerLocally(self, text: str) -> Optional[GoogleParseResponse]:
+        response: Optional[GoogleParseResponse] = self._responses.get(text)
+        if response is None and self._memoize:
+            response = RECOMMENDATIONS_CACHE.get(
+                _flight_key(self._client, text, self._trusted)
+            )
+        if response is not None:
+            self.stats["cached"] += 1
+            self._remember(text, response)
+            return response
+        if not self._local_filtering:
+            return None
+
+        # longest prefix first: its list is the narrowest
+        normalized: str = _normalize(text)
+        prefixes = sorted((
+            prefix for prefix in self._responses
+            if normalized.startswith(_normalize(prefix))
+        ), key=lambda prefix: len(_normalize(prefix)), reverse=True)
+        for prefix in prefixes:
+            response = narrow_recommendations(
+                self._responses[prefix], prefix, text
+            )
+            if response is not None:
+                self.stats["local"] += 1
+                self._remember(text, response)
+                return response
+        return None
+
+
+    async def _fetch(self, text: str) -> GoogleParseResponse:
+        if self._debounce > 0:
+            await asyncio.sleep(self._debounce)
+
+        from ..core.network import http_get_parse_endpoint_response
+        response: GoogleParseResponse = parse_parse_endpoint_response_data(
+            await http_get_parse_endpoint_response(text, self._client),
+            self._trusted
+        )
+        self.stats["network"] += 1
+        if self._memoize:
+            RECOMMENDATIONS_CACHE.put(
+                _flight_key(self._client, text, self._trusted), response
+            )
+        self._remember(text, response)
+        return response
+
+
+    async def query(self, text: str) -> Optional[GoogleParseResponse]:
+        r""" Instance Method - Query
+        - arguments:
+            - text: the current content of the search box
+        - returns:
+            - an object of type 'GoogleParseResponse'; None if a newer query
+            superseded this one
+        - raises:
+            - the exceptions of 'getTextRecommendations', for the latest query
+        """
+        self.stats["queries"] += 1
+        self.cancel()
+        generation: int = self._generation
+
+        response: Optional[GoogleParseResponse] = self._answerLocally(text)
+        if response is not None:
+            return response
+
+        # requests are not coalesced with other callers ('SingleFlight'), so
+        # that cancelling a superseded one really closes its connection
+        task: asyncio.Task = asyncio.ensure_future(self._fetch(text))
+        self._task = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if generation == self._generation:
+                raise
+            self.stats["superseded"] += 1
+            return None
+        finally:
+            if self._task is task:
+                self._task = None
+
+
+    def cancel(self) -> None:
+        r""" Instance Method - Cancel
+        - arguments:
+        - returns:
+        - notes:
+            - cancels the pending query, if any; it returns None
+        """
+        self._generation += 1
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return None
+
+
+    pass # end of TypeaheadSession
@@ -2,31 +2,118 @@ r""" py_google_patents.common.config module """
 
 
 # importing standard modules ==================================================
-import logging
+from typing import Any, Dict, Optional, TextIO
+import datetime, json, logging
 
 
 # module variables ============================================================
-"py_google_patents_logger"
-LIB_LOGGER: logging.Logger = logging.getLogger()
-formatter: logging.Formatter = logging.Formatter(
-    "%(levelname)-8s:[%(asctime)s]:%(filename)-20s:%(module)-15s:"
-    "%(funcName)-40s:Line %(lineno)-4d: %(message)s"
-)
-ch: logging.StreamHandler = logging.StreamHandler()
-ch.setFormatter(formatter)
-LIB_LOGGER.addHandler(ch)
+LIB_LOGGER_NAME: str = "py_google_patents"
+
+LIB_LOGGER: logging.Logger = logging.getLogger(LIB_LOGGER_NAME)
+LIB_LOGGER.addHandler(logging.NullHandler())
+""" the library never configures logging on import: records propagate to the
+application's handlers, and are dropped (without a 'last resort' warning)
+when there are none """
+
+DEFAULT_FORMAT: str = "%(levelname)-8s:[%(asctime)s]:%(filename)-20s:" \
+    "%(module)-15s:%(funcName)-40s:Line %(lineno)-4d: %(message)s"
+
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord(
+    "", logging.NOTSET, "", 0, "", (), None
+))) | {"message", "asctime"}
+""" attributes of every 'logging.LogRecord'; the others come from 'extra' """
+
+_HANDLER: Optional[logging.Handler] = None
+
+
+# class definitions ===========================================================
+class JsonFormatter(logging.Formatter):
+    r""" class formatting a record as a single line json object, with the
+    values passed through 'extra' as additional keys
+
+    - notes:
+        - values that are not json serializable are written as their 'str'
+    """
+
+
+    def format(self, record: logging.LogRecord) -> str:
+        document: Dict[str, Any] = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                document[key] = value
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+
+    pass # end of JsonFormatter
 
 
 # method definitions ==========================================================
 def getLibraryLogger() -> logging.Logger:
-    r""" Function - Get Library Logger 
+    r""" Function - Get Library Logger
     - arguments:
     - returns:
         - a 'logging.Logger' object; the reference contained within module
         variable 'LIB_LOGGER'
+    - notes:
+        - hot paths guard debug calls with 'isEnabledFor(logging.DEBUG)' so
+        that no argument is built when debug logging is off
     """
     global LIB_LOGGER
     return LIB_LOGGER
 
 
-getLibraryLogger().setLevel(logging.DEBUG)
+def enableLogging(
+    level: int = logging.DEBUG,
+    structured: bool = False,
+    stream: Optional[TextIO] = None
+    ) -> logging.Handler:
+    r""" Function - Enable Logging
+    - arguments:
+        - level: level of the library logger
+        - structured: if True, records are written as json lines, see
+        'JsonFormatter'; with 'DEFAULT_FORMAT' otherwise
+        - stream: stream written to; 'sys.stderr' when omitted
+    - returns:
+        - the 'logging.StreamHandler' attached to the library logger
+    - notes:
+        - opt-in helper for scripts and debugging; applications should
+        configure the 'py_google_patents' logger through 'logging' instead
+        - replaces the handler attached by a previous call
+    """
+    global _HANDLER
+    disableLogging()
+    _HANDLER = logging.StreamHandler(stream)
+    _HANDLER.setFormatter(
+        JsonFormatter() if structured else logging.Formatter(DEFAULT_FORMAT)
+    )
+    LIB_LOGGER.addHandler(_HANDLER)
+    LIB_LOGGER.setLevel(level)
+    return _HANDLER
+
+
+def disableLogging() -> None:
+    r""" Function - Disable Logging
+    - arguments:
+    - returns:
+    - notes:
+        - removes the handler attached by 'enableLogging' and resets the
+        library logger's level
+    """
+    global _HANDLER
+    if _HANDLER is not None:
+        LIB_LOGGER.removeHandler(_HANDLER)
+        _HANDLER = None
+    LIB_LOGGER.setLevel(logging.NOTSET)
+    return None
@@ -1 +1,15 @@
-r""" py_google_patents.common.error module """
\ No newline at end of file
+r""" py_google_patents.common.error module """
+
+
+# exception definitions =======================================================
+class PyGooglePatentsError(Exception):
+    r""" base class of every exception raised by the library """
+
+    pass # end of PyGooglePatentsError
+
+
+class CacheMissError(PyGooglePatentsError):
+    r""" raised, in offline (cache-only) mode, when a response is not found
+    in the response cache """
+
+    pass # end of CacheMissError
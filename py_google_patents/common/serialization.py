@@ -0,0 +1,51 @@
+r""" py_google_patents.common.serialization module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Union
+import json
+
+
+# importing third-party modules ===============================================
+try:
+    import orjson
+except ImportError:     # optional dependency
+    orjson = None
+
+
+# module variables ============================================================
+HAS_ORJSON: bool = orjson is not None
+
+
+# method definitions ==========================================================
+def loads(data: Union[str, bytes]) -> Any:
+    r""" Function - Loads
+    - arguments:
+        - data: a json document, as str or utf-8 encoded bytes
+    - returns:
+        - the decoded object
+    - raises:
+        - ValueError: if 'data' is not valid json
+    - notes:
+        - decodes with 'orjson' straight from bytes when it is installed,
+        with the standard 'json' module otherwise
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    r""" Function - Dumps
+    - arguments:
+        - value: a json serializable object
+    - returns:
+        - the compact, utf-8 encoded json document
+    - notes:
+        - non-ascii characters are written as is, with either backend
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
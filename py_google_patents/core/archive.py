@@ -0,0 +1,487 @@
+r""" py_google_patents.core.archive module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, \
+    Optional, Tuple, Union
+import collections, concurrent.futures, mmap, os, re, struct, zlib
+
+
+# importing custom modules ====================================================
+from ..models.response_models import GooglePatentResponse
+from .data_parsers import parse_result_endpoint_response_data
+
+
+# module variables ============================================================
+CODECS: Tuple[str, ...] = ("zlib", "zstd")
+
+DEFAULT_DICTIONARY_SIZE: int = 32 * 1024
+""" the largest dictionary deflate can use (its window size) """
+
+_MAGIC: bytes = b"PGAR"
+_VERSION: int = 1
+_HEADER = struct.Struct("<4sBBI")
+""" magic, version, codec index and dictionary length, then the dictionary """
+_RECORD = struct.Struct("<HI")
+""" key length and payload length, then the key and the payload """
+
+_ID_URL_PATTERN = re.compile(r"patent/(?P<number>[^/]+)")
+
+
+# helper definitions ==========================================================
+def _normalize_key(key: str) -> str:
+    match = _ID_URL_PATTERN.search(key)
+    return (match.group("number") if match else key).upper()
+
+
+def _compressor(
+    codec: str,
+    dictionary: bytes,
+    level: int
+    ) -> Callable[[bytes], bytes]:
+    if codec == "zstd":
+        import zstandard
+        compressor = zstandard.ZstdCompressor(
+            level=level, dict_data=zstandard.ZstdCompressionDict(dictionary)
+            if dictionary else None
+        )
+        return compressor.compress
+
+    def _compress(data: bytes) -> bytes:
+        # raw deflate: no header nor checksum, and a fresh stream per record
+        # so that every record decompresses on its own
+        stream = zlib.compressobj(
+            level, zlib.DEFLATED, -15, zdict=dictionary
+        ) if dictionary else zlib.compressobj(level, zlib.DEFLATED, -15)
+        return stream.compress(data) + stream.flush()
+
+    return _compress
+
+
+def _decompressor(codec: str, dictionary: bytes) -> Callable[[bytes], bytes]:
+    if codec == "zstd":
+        import zstandard
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+            if dictionary else None
+        )
+        return decompressor.decompress
+
+    def _decompress(data: bytes) -> bytes:
+        stream = zlib.decompressobj(-15, zdict=dictionary) if dictionary \
+            else zlib.decompressobj(-15)
+        return stream.decompress(data) + stream.flush()
+
+    return _decompress
+
+
+def _parse_records(
+    codec: str,
+    dictionary: bytes,
+    sections: Optional[frozenset],
+    payloads: List[bytes]
+    ) -> List[Tuple[bool, Any]]:
+    r""" Functional Requirement - PARSE RECORDS
+    - arguments:
+        - codec, dictionary: of the archive the payloads were read from
+        - sections: see 'parse_result_endpoint_response_data'
+        - payloads: compressed records
+    - returns:
+        - a list of (success, 'GooglePatentResponse' or exception) tuples
+    - notes:
+        - runs inside the worker; receiving compressed records keeps the
+        inter-process copies small
+    """
+    decompress: Callable[[bytes], bytes] = _decompressor(codec, dictionary)
+    results: List[Tuple[bool, Any]] = []
+    for payload in payloads:
+        try:
+            results.append((True, parse_result_endpoint_response_data(
+                decompress(payload).decode("utf-8"), sections=sections
+            )))
+        except Exception as error:
+            results.append((False, error))
+    return results
+
+
+def train_dictionary(
+    pages: Iterable[Union[str, bytes]],
+    size: int = DEFAULT_DICTIONARY_SIZE,
+    codec: str = "zlib"
+    ) -> bytes:
+    r""" Function - Train Dictionary
+    - arguments:
+        - pages: sample result pages; a few hundred are plenty
+        - size: maximum size of the dictionary, in bytes
+        - codec: the codec the dictionary is trained for
+    - returns:
+        - a dictionary for 'PageArchive'
+    - notes:
+        - for 'zlib', the dictionary is made of the lines shared by most
+        pages (the page template), most frequent last as deflate encodes
+        closer matches with fewer bits
+        - for 'zstd', 'zstandard.train_dictionary' is used
+    """
+    samples: List[bytes] = [
+        page.encode("utf-8") if isinstance(page, str) else page
+        for page in pages
+    ]
+    if codec == "zstd":
+        import zstandard
+        return zstandard.train_dictionary(size, samples).as_bytes()
+
+    frequencies: collections.Counter = collections.Counter()
+    for sample in samples:
+        frequencies.update(set(sample.splitlines(keepends=True)))
+    shared: List[Tuple[bytes, int]] = [
+        (line, count) for line, count in frequencies.items()
+        if count > 1 and len(line.strip()) > 2
+    ]
+    # most useful lines first, then laid out least frequent first
+    shared.sort(key=lambda item: item[1] * len(item[0]), reverse=True)
+    chosen: List[Tuple[bytes, int]] = []
+    total: int = 0
+    for line, count in shared:
+        if total + len(line) > size:
+            continue
+        chosen.append((line, count))
+        total += len(line)
+    chosen.sort(key=lambda item: item[1])
+    return b"".join(line for line, _ in chosen)
+
+
+# class definitions ===========================================================
+class PageArchive:
+    r""" class implementing an append-only archive of raw '/xhr/result'
+    pages: records compressed against a shared dictionary, an offset index
+    by publication number and memory-mapped reads
+
+    - usage:
+        with PageArchive("pages.pgar", "a", train_dictionary(samples)) \
+            as archive:
+            archive.add("patent/US9145048B2/en", html)
+        with PageArchive("pages.pgar") as archive:
+            for number, response in archive.iterResponses(processes=8):
+                ...
+
+    - notes:
+        - the archive is a data file, whose header holds the codec and the
+        dictionary, and a '<path>.idx' sidecar with one line per record; the
+        index is rebuilt from the data file when missing or behind it
+        - adding a key again appends a new record that supersedes the old one
+        - one writer at a time; readers see records flushed before they
+        opened the archive
+    """
+
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "r",
+        dictionary: Optional[bytes] = None,
+        codec: str = "zlib",
+        level: int = 6
+        ):
+        r""" Constructor
+        - arguments:
+            - path: the data file
+            - mode: 'r' to read, 'a' to append; 'a' creates the archive
+            - dictionary: the shared dictionary, see 'train_dictionary';
+            only used when the archive is created
+            - codec: one of 'CODECS'; only used when the archive is created,
+            'zstd' requires the optional 'zstandard' package
+            - level: compression level of added records
+        - raises:
+            - ValueError: for an unknown mode or codec, or a corrupt header
+            - FileNotFoundError: in mode 'r', if the archive does not exist
+        """
+        if mode not in ("r", "a"):
+            raise ValueError("mode must be 'r' or 'a', got {!r}".format(mode))
+        if codec not in CODECS:
+            raise ValueError(
+                "codec must be one of {}, got {!r}".format(CODECS, codec)
+            )
+        if mode == "a" and not os.path.exists(path):
+            with open(path, "wb") as file:
+                file.write(_HEADER.pack(
+                    _MAGIC, _VERSION, CODECS.index(codec),
+                    len(dictionary or b"")
+                ) + (dictionary or b""))
+
+        self._path: str = path
+        self._mode: str = mode
+        self._level: int = level
+        self._file = open(path, "r+b" if mode == "a" else "rb")
+        magic, version, codec_index, length = _HEADER.unpack(
+            self._file.read(_HEADER.size)
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not a page archive".format(path))
+        self.codec: str = CODECS[codec_index]
+        self.dictionary: bytes = self._file.read(length)
+        self._decompress: Callable[[bytes], bytes] = _decompressor(
+            self.codec, self.dictionary
+        )
+        self._compress: Optional[Callable[[bytes], bytes]] = None
+
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        """ offset and length of a key's latest payload, and its raw size """
+        self._end: int = _HEADER.size + length
+        """ end of the last indexed record """
+        self._map: Optional[mmap.mmap] = None
+        self._loadIndex()
+        return
+
+
+    def __enter__(self) -> "PageArchive":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+    def __contains__(self, key: str) -> bool:
+        return _normalize_key(key) in self._index
+
+
+    def keys(self) -> List[str]:
+        r""" Instance Method - Keys
+        - returns:
+            - the publication numbers, in the order their latest record was
+            added
+        """
+        return [key for key, _ in self._entries()]
+
+
+    def _loadIndex(self) -> None:
+        index_path: str = self._path + ".idx"
+        size: int = os.fstat(self._file.fileno()).st_size
+        rewrite: bool = not os.path.exists(index_path)
+        if not rewrite:
+            with open(index_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    fields: List[str] = line.rstrip("\n").split("\t")
+                    if len(fields) != 4:
+                        rewrite = True  # a line cut short by a crash
+                        break
+                    offset, length, raw_size = map(int, fields[1:])
+                    if offset + length > size:
+                        rewrite = True  # its data was never flushed
+                        break
+                    self._index[fields[0]] = (offset, length, raw_size)
+                    self._end = max(self._end, offset + length)
+
+        # records written after the last index line, ex: after a crash
+        recovered: List[str] = []
+        self._file.seek(self._end)
+        while self._end + _RECORD.size <= size:
+            key_length, length = _RECORD.unpack(self._file.read(_RECORD.size))
+            start: int = self._end + _RECORD.size + key_length
+            if start + length > size:
+                break
+            key: str = self._file.read(key_length).decode("utf-8")
+            raw_size: int = len(self._decompress(self._file.read(length)))
+            self._index[key] = (start, length, raw_size)
+            recovered.append(key)
+            self._end = start + length
+
+        if self._mode == "a":
+            self._file.truncate(self._end)      # drops a partial record
+            if rewrite or recovered:
+                with open(index_path, "w", encoding="utf-8") as file:
+                    for key, entry in self._index.items():
+                        file.write("{}\t{}\t{}\t{}\n".format(key, *entry))
+            self._index_file = open(index_path, "a", encoding="utf-8")
+        return None
+
+
+    def add(self, key: str, page: Union[str, bytes]) -> None:
+        r""" Instance Method - Add
+        - arguments:
+            - key: a publication number or an id_url; ex:
+            'patent/US9145048B2/en'
+            - page: the html returned by the '/xhr/result' endpoint
+        - returns:
+        - raises:
+            - ValueError: if the archive was opened in mode 'r'
+        """
+        if self._mode != "a":
+            raise ValueError("archive opened in read mode")
+        if self._compress is None:
+            self._compress = _compressor(
+                self.codec, self.dictionary, self._level
+            )
+        raw: bytes = page.encode("utf-8") if isinstance(page, str) else page
+        payload: bytes = self._compress(raw)
+        encoded_key: bytes = _normalize_key(key).encode("utf-8")
+        self._file.seek(self._end)
+        self._file.write(
+            _RECORD.pack(len(encoded_key), len(payload)) + encoded_key
+            + payload
+        )
+        offset: int = self._end + _RECORD.size + len(encoded_key)
+        self._end = offset + len(payload)
+        entry: Tuple[int, int, int] = (offset, len(payload), len(raw))
+        self._index[_normalize_key(key)] = entry
+        self._index_file.write(
+            "{}\t{}\t{}\t{}\n".format(_normalize_key(key), *entry)
+        )
+        return None
+
+
+    def flush(self) -> None:
+        r""" Instance Method - Flush
+        - arguments:
+        - returns:
+        - notes:
+            - the data is flushed before the index, so that an index line
+            never points past the data file
+        """
+        if self._mode == "a":
+            self._file.flush()
+            self._index_file.flush()
+        return None
+
+
+    def close(self) -> None:
+        if self._file.closed:
+            return None
+        self.flush()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._mode == "a":
+            self._index_file.close()
+        self._file.close()
+        return None
+
+
+    def _payload(self, entry: Tuple[int, int, int]) -> bytes:
+        offset, length, _ = entry
+        if self._map is None or len(self._map) < offset + length:
+            # records added since the file was mapped
+            self.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return self._map[offset:offset + length]
+
+
+    def get(self, key: str) -> Optional[str]:
+        r""" Instance Method - Get
+        - arguments:
+            - key: a publication number or an id_url
+        - returns:
+            - the page, or None if the key is not archived
+        """
+        entry: Optional[Tuple[int, int, int]] = self._index.get(
+            _normalize_key(key)
+        )
+        if entry is None:
+            return None
+        return self._decompress(self._payload(entry)).decode("utf-8")
+
+
+    def _entries(self) -> List[Tuple[str, Tuple[int, int, int]]]:
+        # in file order, for sequential reads
+        return sorted(self._index.items(), key=lambda item: item[1][0])
+
+
+    def iterPages(self) -> Iterator[Tuple[str, str]]:
+        r""" Instance Method - Iter Pages
+        - returns:
+            - an iterator of (publication number, page) tuples, in the order
+            the pages were added; superseded records are skipped
+        """
+        for key, entry in self._entries():
+            yield key, self._decompress(self._payload(entry)).decode("utf-8")
+
+
+    def iterResponses(
+        self,
+        sections: Optional[Iterable[str]] = None,
+        processes: int = 0,
+        chunk_size: int = 16
+        ) -> Iterator[Tuple[str, Union[GooglePatentResponse, Exception]]]:
+        r""" Instance Method - Iter Responses
+        - arguments:
+            - sections: names of the sections to parse; every section when
+            omitted
+            - processes: number of worker processes, started with
+            'default_mp_context'; 0 parses in the calling thread
+            - chunk_size: records sent to a worker at once
+        - returns:
+            - an iterator of (publication number, 'GooglePatentResponse')
+            tuples, in archive order; a page that fails to parse yields its
+            exception instead of a response
+        - notes:
+            - workers receive compressed records, and at most two chunks per
+            worker are in flight, so memory stays bounded
+        """
+        if sections is not None:
+            sections = frozenset(sections)
+        entries: List[Tuple[str, Tuple[int, int, int]]] = self._entries()
+        chunks: Iterator[List[Tuple[str, Tuple[int, int, int]]]] = (
+            entries[start:start + chunk_size]
+            for start in range(0, len(entries), chunk_size)
+        )
+
+        if processes < 1:
+            for chunk in chunks:
+                yield from self._yieldParsed(chunk, _parse_records(
+                    self.codec, self.dictionary, sections,
+                    [self._payload(entry) for _, entry in chunk]
+                ))
+            return
+
+        from .executor import default_mp_context
+        in_flight: Deque[Tuple[List, concurrent.futures.Future]] = \
+            collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(
+            processes, mp_context=default_mp_context()
+            ) as pool:
+            for chunk in chunks:
+                in_flight.append((chunk, pool.submit(
+                    _parse_records, self.codec, self.dictionary, sections,
+                    [self._payload(entry) for _, entry in chunk]
+                )))
+                if len(in_flight) >= 2 * processes:
+                    chunk, future = in_flight.popleft()
+                    yield from self._yieldParsed(chunk, future.result())
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                yield from self._yieldParsed(chunk, future.result())
+
+
+    @staticmethod
+    def _yieldParsed(
+        chunk: List[Tuple[str, Tuple[int, int, int]]],
+        results: List[Tuple[bool, Any]]
+        ) -> Iterator[Tuple[str, Union[GooglePatentResponse, Exception]]]:
+        for (key, _), (_, value) in zip(chunk, results):
+            yield key, value
+
+
+    def getStats(self) -> Dict[str, int]:
+        r""" Instance Method - Get Stats
+        - returns:
+            - a dict with the number of 'records', their total 'raw_bytes'
+            and 'stored_bytes', and the 'dictionary_bytes'
+        """
+        return {
+            "records": len(self._index),
+            "raw_bytes": sum(entry[2] for entry in self._index.values()),
+            "stored_bytes": sum(entry[1] for entry in self._index.values()),
+            "dictionary_bytes": len(self.dictionary),
+        }
+
+
+    pass # end of PageArchive
@@ -0,0 +1,116 @@
+r""" py_google_patents.core.bloom module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, Iterator
+import base64, hashlib, math
+
+
+# class definitions ===========================================================
+class BloomFilter:
+    r""" class implementing a Bloom filter over strings: a fixed-size bit
+    array answering 'probably seen' or 'certainly not seen', for sets too
+    large to hold as python strings
+
+    - notes:
+        - sized for 'capacity' keys at a false positive rate of 'error_rate';
+        the rate grows past it once more keys are added
+        - keys cannot be removed
+    """
+
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        r""" Constructor
+        - arguments:
+            - capacity: number of keys the filter is sized for
+            - error_rate: probability that an absent key is reported present,
+            once 'capacity' keys were added
+        - raises:
+            - ValueError: if 'capacity' is smaller than 1 or 'error_rate' is
+            not between 0 and 1
+        """
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError(
+                "capacity must be >= 1 and 0 < error_rate < 1, got "
+                "capacity={} error_rate={}".format(capacity, error_rate)
+            )
+        size: int = math.ceil(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )
+        self._size: int = size
+        self._hashes: int = max(1, round(size / capacity * math.log(2)))
+        self._bits: bytearray = bytearray((size + 7) // 8)
+        self._count: int = 0
+        return
+
+
+    def __len__(self) -> int:
+        r""" number of keys added; keys mistaken for present are not counted
+        """
+        return self._count
+
+
+    def __contains__(self, key: str) -> bool:
+        bits: bytearray = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # double hashing: k positions from the two halves of one digest
+        digest: bytes = hashlib.blake2b(
+            key.encode("utf-8"), digest_size=16
+        ).digest()
+        first: int = int.from_bytes(digest[:8], "little")
+        second: int = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self._hashes):
+            yield (first + index * second) % self._size
+
+
+    def add(self, key: str) -> bool:
+        r""" Instance Method - Add
+        - arguments:
+            - key: the string to add
+        - returns:
+            - True if 'key' was not present before; False if it was, or is a
+            false positive
+        """
+        bits: bytearray = self._bits
+        added: bool = False
+        for position in self._positions(key):
+            mask: int = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        self._count += added
+        return added
+
+
+    def getSizeInBytes(self) -> int:
+        return len(self._bits)
+
+
+    def dump(self) -> Dict[str, Any]:
+        r""" Instance Method - Dump
+        - returns:
+            - a json serializable object restoring the filter with 'load'
+        """
+        return {
+            "size": self._size, "hashes": self._hashes, "count": self._count,
+            "bits": base64.b64encode(bytes(self._bits)).decode("ascii"),
+        }
+
+
+    @classmethod
+    def load(cls, state: Dict[str, Any]) -> "BloomFilter":
+        bloom: BloomFilter = cls.__new__(cls)
+        bloom._size = state["size"]
+        bloom._hashes = state["hashes"]
+        bloom._count = state["count"]
+        bloom._bits = bytearray(base64.b64decode(state["bits"]))
+        return bloom
+
+
+    pass # end of BloomFilter
@@ -0,0 +1,136 @@
+r""" py_google_patents.core.bulk module """
+
+
+# importing standard modules ==================================================
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, \
+    Dict, Iterable, NamedTuple, Optional, Set, Union
+import asyncio
+
+
+# module variables ============================================================
+DEFAULT_CONCURRENCY: int = 16
+""" number of items processed simultaneously when no cap is given """
+
+ORDERED_WINDOW_FACTOR: int = 4
+""" in ordered mode, at most 'concurrency * ORDERED_WINDOW_FACTOR' finished
+results are held back while waiting for a slow item at the head of the queue
+"""
+
+
+# class definitions ===========================================================
+class BulkItemResult(NamedTuple):
+    r""" record describing the outcome of a single item of a bulk operation """
+
+    index: int
+    """ position of the item in the input iterable """
+
+    item: Any
+    """ the input item itself; ex: an 'id_url' or a query string """
+
+    result: Any = None
+    """ the value produced for the item; 'None' when it failed """
+
+    error: Optional[BaseException] = None
+    """ the exception raised while processing the item, if any """
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    pass # end of BulkItemResult
+
+
+# method definitions ==========================================================
+async def _iterate(
+    items: Union[Iterable[Any], AsyncIterable[Any]]
+    ) -> AsyncIterator[Any]:
+    r""" Functional Requirement - ITERATE
+    - arguments:
+        - items: a synchronous or an asynchronous iterable
+    - returns:
+        - an asynchronous iterator over 'items'; items are pulled lazily
+    """
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_map(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Union[Iterable[Any], AsyncIterable[Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False
+    ) -> AsyncIterator[BulkItemResult]:
+    r""" Functional Requirement - BOUNDED MAP
+    - arguments:
+        - func: a coroutine function applied to every item
+        - items: a synchronous or an asynchronous iterable of items
+        - concurrency: maximum number of 'func' calls in flight at once
+        - ordered: if True, results are yielded in input order; otherwise
+        they are yielded as soon as they complete
+    - returns:
+        - an asynchronous iterator of 'BulkItemResult' objects, one per item
+    - raises:
+        - ValueError: if 'concurrency' is smaller than 1
+    - notes:
+        - the input is consumed lazily, so arbitrarily large (or endless)
+        iterables can be processed with bounded memory
+        - an exception raised by 'func' is reported in the 'error' field of
+        that item's result and does not stop the remaining items
+        - closing the iterator early cancels all in-flight calls
+    """
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1, got {}".format(concurrency))
+
+    async def _run(index: int, item: Any) -> BulkItemResult:
+        try:
+            return BulkItemResult(index, item, await func(item))
+        except Exception as error:
+            return BulkItemResult(index, item, None, error)
+
+    source: AsyncIterator[Any] = _iterate(items)
+    pending: Set[asyncio.Task] = set()
+    held_back: Dict[int, BulkItemResult] = {}
+    reorder_window: int = concurrency * ORDERED_WINDOW_FACTOR
+    next_index: int = 0     # next index to schedule
+    next_yield: int = 0     # next index to yield, ordered mode only
+    exhausted: bool = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency \
+                and len(held_back) < reorder_window:
+                try:
+                    item: Any = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(_run(next_index, item)))
+                next_index += 1
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=lambda task: task.result().index):
+                result: BulkItemResult = task.result()
+                if not ordered:
+                    yield result
+                    continue
+                held_back[result.index] = result
+                while next_yield in held_back:
+                    yield held_back.pop(next_yield)
+                    next_yield += 1
+
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await source.aclose()
@@ -0,0 +1,285 @@
+r""" py_google_patents.core.cache module """
+
+
+# importing standard modules ==================================================
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+import hashlib, os, sqlite3, threading, time, urllib.parse
+
+if TYPE_CHECKING:
+    from yarl import URL
+
+
+# importing custom modules ====================================================
+from ..common.config import getLibraryLogger
+
+
+# module variables ============================================================
+PARSE_ENDPOINT: str = "/xhr/parse"
+RESULT_ENDPOINT: str = "/xhr/result"
+QUERY_ENDPOINT: str = "/xhr/query"
+
+DEFAULT_TTLS: Dict[str, Optional[float]] = {
+    PARSE_ENDPOINT: 24 * 60 * 60.0,         # suggestions drift daily
+    RESULT_ENDPOINT: 30 * 24 * 60 * 60.0,   # documents rarely change
+    QUERY_ENDPOINT: 24 * 60 * 60.0,         # new documents match daily
+}
+""" seconds an entry stays fresh, per endpoint path; None never expires """
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    endpoint    TEXT NOT NULL,
+    body        BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    stored_at   REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_size', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries
+BEGIN
+    UPDATE meta SET value = value - OLD.size + NEW.size
+    WHERE name = 'total_size';
+END;
+"""
+""" the running total of stored bytes is maintained by triggers, inside the
+same transaction as the change, so it stays exact when several processes
+write to one cache directory """
+
+
+# method definitions ==========================================================
+def build_cache_key(url: "URL") -> Tuple[str, str]:
+    r""" Functional Requirement - BUILD CACHE KEY
+    - arguments:
+        - url: an encoded 'yarl.URL' sent to one of the endpoints
+    - returns:
+        - a tuple of the endpoint path and a hex digest identifying the
+        normalized endpoint and query parameters
+    - notes:
+        - the scheme and host are ignored and parameters are decoded and
+        sorted, so that differently encoded urls share an entry
+    """
+    params = sorted(urllib.parse.parse_qsl(
+        url.raw_query_string, keep_blank_values=True
+    ))
+    normalized: str = "{}?{}".format(
+        url.path, urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
+    )
+    return url.path, hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# class definitions ===========================================================
+class DiskResponseCache:
+    r""" class implementing a persistent, size-bounded LRU cache of raw
+    endpoint responses (json or html, as returned by the server) stored in a
+    sqlite database inside 'directory'
+
+    - notes:
+        - safe to share between processes: sqlite runs in WAL mode and every
+        read-modify-write happens inside a transaction
+        - calls are blocking and short; 'AsyncNetworkClient' runs them in a
+        worker thread
+        - in offline mode the client never touches the network and raises
+        'CacheMissError' on a miss
+    """
+
+
+    DATABASE_NAME: str = "responses.sqlite3"
+
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1 << 30,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        offline: bool = False
+        ):
+        r""" Constructor
+        - arguments:
+            - directory: directory holding the cache database; created if
+            missing
+            - max_bytes: upper bound of the stored bodies' total size; least
+            recently used entries are evicted past it
+            - ttls: seconds an entry stays fresh per endpoint path, merged
+            over 'DEFAULT_TTLS'; None means never expires
+            - offline: if True, the client answers from the cache only
+        """
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.ttls: Dict[str, Optional[float]] = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.offline: bool = offline
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stores: int = 0
+        self.evictions: int = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            os.path.join(directory, self.DATABASE_NAME),
+            timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        return
+
+
+    def __enter__(self) -> "DiskResponseCache":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+        return None
+
+
+    def getStats(self) -> Dict[str, int]:
+        r""" Instance Method - Get Stats
+        - returns:
+            - a 'dict' with the hit, miss, store and eviction counters of this
+            instance, and the number and total size of stored entries
+        """
+        with self._lock:
+            entries, = self._connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self.getTotalSize(),
+        }
+
+
+    def getTotalSize(self) -> int:
+        with self._lock:
+            size, = self._connection.execute(
+                "SELECT value FROM meta WHERE name = 'total_size'"
+            ).fetchone()
+        return size
+
+
+    def get(self, url: "URL") -> Optional[bytes]:
+        r""" Instance Method - Get
+        - arguments:
+            - url: an encoded 'yarl.URL' sent to one of the endpoints
+        - returns:
+            - the stored response body; None on a miss or an expired entry
+        """
+        endpoint, key = build_cache_key(url)
+        ttl: Optional[float] = self.ttls.get(endpoint)
+        now: float = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and ttl is not None and now - row[1] > ttl:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE key = ?", (key,)
+                )
+                row = None
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    (now, key)
+                )
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bytes(row[0])
+
+
+    def put(self, url: "URL", body: bytes) -> None:
+        r""" Instance Method - Put
+        - arguments:
+            - url: an encoded 'yarl.URL' sent to one of the endpoints
+            - body: the raw response body
+        - returns:
+        - notes:
+            - evicts least recently used entries once the cache grows past
+            'max_bytes'; a body larger than 'max_bytes' is not stored
+        """
+        if len(body) > self.max_bytes:
+            return None
+        endpoint, key = build_cache_key(url)
+        now: float = time.time()
+        with self._lock:
+            connection: sqlite3.Connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                # an upsert, not 'INSERT OR REPLACE': the implicit delete of
+                # a replace fires no trigger and would leak the old size
+                connection.execute(
+                    "INSERT INTO entries "
+                    "(key, endpoint, body, size, stored_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE "
+                    "SET endpoint = excluded.endpoint, body = excluded.body, "
+                    "size = excluded.size, stored_at = excluded.stored_at, "
+                    "accessed_at = excluded.accessed_at",
+                    (key, endpoint, body, len(body), now, now)
+                )
+                evicted: int = self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        self.stores += 1
+        self.evictions += evicted
+        if evicted:
+            getLibraryLogger().debug("evicted %d cache entries", evicted)
+        return None
+
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        evicted: int = 0
+        while True:
+            size, = connection.execute(
+                "SELECT value FROM meta WHERE name = 'total_size'"
+            ).fetchone()
+            if size <= self.max_bytes:
+                return evicted
+            rows = connection.execute(
+                "SELECT key FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                return evicted
+            for key, in rows:
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                evicted += 1
+                size, = connection.execute(
+                    "SELECT value FROM meta WHERE name = 'total_size'"
+                ).fetchone()
+                if size <= self.max_bytes:
+                    return evicted
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM entries")
+        return None
+
+
+    pass # end of DiskResponseCache
@@ -0,0 +1,490 @@
+r""" py_google_patents.core.cpc module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import array, bisect, itertools, re, sys
+
+if TYPE_CHECKING:
+    import numpy
+    from ..models.response_models import GooglePatentResponse
+
+
+# module variables ============================================================
+CPC_LEVELS: Tuple[str, ...] = (
+    "section", "class", "subclass", "group", "code"
+)
+""" depths of the CPC hierarchy; ex: 'B', 'B60', 'B60K', 'B60K6', 'B60K6/20'
+"""
+
+_CPC_PATTERN: re.Pattern = re.compile(
+    r"^(?P<section>[A-HY])(?:(?P<class>\d{2})(?:(?P<subclass>[A-Z])"
+    r"(?:(?P<group>\d{1,4})(?:/(?P<subgroup>\d{1,6}))?)?)?)?$"
+)
+
+
+# method definitions ==========================================================
+def _parse_cpc(code: str) -> Optional[re.Match]:
+    return _CPC_PATTERN.match(code.replace(" ", "").upper())
+
+
+def cpc_sort_key(code: str) -> str:
+    r""" Function - CPC Sort Key
+    - arguments:
+        - code: a CPC code or a prefix of one, at any of 'CPC_LEVELS'; ex:
+        'B60K6/20', 'B60K6', 'B60'
+    - returns:
+        - a string ordering codes so that every subtree is contiguous; the key
+        of a prefix is a prefix of the keys of the codes under it
+    - raises:
+        - ValueError: if 'code' is not a CPC code
+    - notes:
+        - main groups are right-aligned, so that 'B60K6' does not cover
+        'B60K60/00'
+    """
+    match: Optional[re.Match] = _parse_cpc(code)
+    if match is None:
+        raise ValueError("not a CPC code: {!r}".format(code))
+    key: str = match.group("section") + (match.group("class") or "") \
+        + (match.group("subclass") or "")
+    if match.group("group") is not None:
+        key += match.group("group").rjust(4) + "/" \
+            + (match.group("subgroup") or "")
+    return key
+
+
+def cpc_prefix(code: str, level: str) -> str:
+    r""" Function - CPC Prefix
+    - arguments:
+        - code: a full CPC code; ex: 'B60K6/20'
+        - level: one of 'CPC_LEVELS'
+    - returns:
+        - the ancestor of 'code' at 'level'; ex: 'B60K6' for 'group'
+    """
+    if level == "group":
+        return code.split("/", 1)[0]
+    if level == "code":
+        return code
+    return code[:(1, 3, 4)[CPC_LEVELS.index(level)]]
+
+
+# class definitions ===========================================================
+class CpcVocabulary:
+    r""" class interning CPC codes as consecutive integers, so that documents
+    can be stored as arrays of small integers instead of strings
+    """
+
+
+    def __init__(self, codes: Iterable[str] = ()):
+        r""" Constructor
+        - arguments:
+            - codes: codes to intern first, in id order
+        """
+        self._ids: Dict[str, int] = {}
+        self._codes: List[str] = []
+        for code in codes:
+            self.intern(code)
+        return
+
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._ids
+
+
+    def intern(self, code: str) -> int:
+        r""" Instance Method - Intern
+        - arguments:
+            - code: a CPC code; ex: 'B60K6/20'
+        - returns:
+            - the id of 'code', allocated on first sight
+        """
+        code_id: Optional[int] = self._ids.get(code)
+        if code_id is None:
+            code_id = self._ids[sys.intern(code)] = len(self._codes)
+            self._codes.append(code)
+        return code_id
+
+
+    def lookup(self, code: str) -> Optional[int]:
+        return self._ids.get(code)
+
+
+    def getCode(self, code_id: int) -> str:
+        return self._codes[code_id]
+
+
+    def getCodes(self) -> List[str]:
+        r""" Instance Method - Get Codes
+        - returns:
+            - the interned codes, in id order
+        """
+        return list(self._codes)
+
+
+    pass # end of CpcVocabulary
+
+
+# -----------------------------------------------------------------------------
+class CpcIndex:
+    r""" class indexing documents by CPC classification in numpy arrays, so
+    that a subtree of the hierarchy selects its documents with one array
+    slice instead of a scan over parsed responses
+
+    - usage:
+        index = CpcIndex()
+        index.addMany(responses)
+        hybrids = index.query(["B60K6", "B60W20"], exclude=["B60L"])
+        index.getPublicationNumbers(hybrids)
+        index.countBy("subclass", hybrids)
+
+    - notes:
+        - requires the optional 'numpy' dependency
+        - documents get consecutive ids in the order they are added;
+        selections are sorted arrays of those ids, which combine with
+        'numpy.intersect1d', 'numpy.union1d' and 'numpy.setdiff1d'
+        - postings are stored per code in hierarchy order (compressed sparse
+        rows); they are rebuilt on the first query after documents are added
+        - codes that are not valid CPC codes are ignored
+    """
+
+
+    def __init__(self):
+        r""" Constructor
+        - raises:
+            - ImportError: if 'numpy' is not installed
+        """
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError(
+                "CpcIndex requires 'numpy': pip install numpy"
+            ) from error
+        self._numpy = numpy
+        self._vocabulary: CpcVocabulary = CpcVocabulary()
+        self._documents: List[str] = []
+        """ publication numbers, by document id """
+
+        # (document, code, inventive) rows added since the last build
+        self._added_documents: array.array = array.array("I")
+        self._added_codes: array.array = array.array("I")
+        self._added_first: array.array = array.array("b")
+
+        self._postings: "numpy.ndarray" = numpy.empty(0, numpy.uint32)
+        """ document ids, grouped by code in hierarchy order """
+        self._posting_codes: "numpy.ndarray" = numpy.empty(0, numpy.uint32)
+        """ the code rank of every posting """
+        self._posting_first: "numpy.ndarray" = numpy.empty(0, numpy.bool_)
+        self._offsets: "numpy.ndarray" = numpy.zeros(1, numpy.int64)
+        """ postings of the code ranked 'r' are 'offsets[r]:offsets[r+1]' """
+        self._ranked_codes: List[str] = []
+        self._ranked_keys: List[str] = []
+        return
+
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+    def getVocabulary(self) -> CpcVocabulary:
+        return self._vocabulary
+
+
+    def add(self, response: "GooglePatentResponse") -> int:
+        r""" Instance Method - Add
+        - arguments:
+            - response: a parsed document; its 'classifications' section is
+            indexed
+        - returns:
+            - the id of the document
+        """
+        classifications = response.classifications
+        return self.addCodes(
+            response.publication_number or "",
+            [item.code for item in classifications],
+            [item.first for item in classifications]
+        )
+
+
+    def addMany(self, responses: Iterable["GooglePatentResponse"]) -> None:
+        for response in responses:
+            self.add(response)
+        return None
+
+
+    def addCodes(
+        self,
+        publication_number: str,
+        codes: Iterable[str],
+        first: Optional[Iterable[bool]] = None
+        ) -> int:
+        r""" Instance Method - Add Codes
+        - arguments:
+            - publication_number: the number of the document
+            - codes: its CPC codes; ex: ['B60K6/20', 'B60W20/00']
+            - first: for each code, whether it is an inventive ('first')
+            classification; none are when omitted
+        - returns:
+            - the id of the document
+        """
+        document_id: int = len(self._documents)
+        self._documents.append(publication_number)
+        seen: set = set()
+        flags: Iterable[bool] = first if first is not None \
+            else itertools.repeat(False)
+        for code, flag in zip(codes, flags):
+            if code in seen or _parse_cpc(code) is None:
+                continue
+            seen.add(code)
+            self._added_documents.append(document_id)
+            self._added_codes.append(self._vocabulary.intern(code))
+            self._added_first.append(bool(flag))
+        return document_id
+
+
+    def _build(self) -> None:
+        if not self._added_documents:
+            return None
+        numpy = self._numpy
+        codes: List[str] = self._vocabulary.getCodes()
+        keys: List[str] = [cpc_sort_key(code) for code in codes]
+        order = numpy.argsort(numpy.array(keys), kind="stable")
+        ranks = numpy.empty(len(codes), numpy.uint32)
+        ranks[order] = numpy.arange(len(codes), dtype=numpy.uint32)
+
+        # previous postings hold ranks of the previous vocabulary: map them
+        # back to code ids before re-ranking
+        previous_ids = numpy.array(
+            [self._vocabulary.lookup(code) for code in self._ranked_codes],
+            numpy.uint32
+        )
+        documents = numpy.concatenate([
+            self._postings,
+            numpy.frombuffer(self._added_documents, numpy.uint32)
+        ])
+        posting_codes = numpy.concatenate([
+            ranks[previous_ids[self._posting_codes]]
+                if len(previous_ids) else self._posting_codes,
+            ranks[numpy.frombuffer(self._added_codes, numpy.uint32)]
+        ])
+        first = numpy.concatenate([
+            self._posting_first,
+            numpy.frombuffer(self._added_first, numpy.int8).astype(bool)
+        ])
+        permutation = numpy.lexsort((documents, posting_codes))
+        self._postings = documents[permutation]
+        self._posting_codes = posting_codes[permutation]
+        self._posting_first = first[permutation]
+        self._offsets = numpy.searchsorted(
+            self._posting_codes, numpy.arange(len(codes) + 1)
+        )
+        self._ranked_codes = [codes[code_id] for code_id in order]
+        self._ranked_keys = [keys[code_id] for code_id in order]
+        self._added_documents = array.array("I")
+        self._added_codes = array.array("I")
+        self._added_first = array.array("b")
+        return None
+
+
+    def _rankRange(self, prefix: str) -> Tuple[int, int]:
+        key: str = cpc_sort_key(prefix)
+        low: int = bisect.bisect_left(self._ranked_keys, key)
+        if "/" in key and not key.endswith("/"):
+            # a full code has no subtree: 'B60K6/2' is not above 'B60K6/20'
+            found: bool = low < len(self._ranked_keys) \
+                and self._ranked_keys[low] == key
+            return low, low + found
+        return low, bisect.bisect_left(self._ranked_keys, key + "\uffff")
+
+
+    def select(
+        self,
+        prefix: str,
+        first_only: bool = False
+        ) -> "numpy.ndarray":
+        r""" Instance Method - Select
+        - arguments:
+            - prefix: a CPC code or a prefix of one at any of 'CPC_LEVELS';
+            ex: 'B60K6' selects 'B60K6/20' and 'B60K6/445'
+            - first_only: if True, only inventive ('first') classifications
+            count
+        - returns:
+            - the sorted ids of the documents classified under 'prefix'
+        - raises:
+            - ValueError: if 'prefix' is not a CPC code
+        """
+        return self.query([prefix], first_only=first_only)
+
+
+    def query(
+        self,
+        include: Iterable[str],
+        exclude: Iterable[str] = (),
+        first_only: bool = False
+        ) -> "numpy.ndarray":
+        r""" Instance Method - Query
+        - arguments:
+            - include: prefixes whose documents are selected
+            - exclude: prefixes whose documents are removed from the selection
+            - first_only: see 'select'; applies to 'include' only
+        - returns:
+            - the sorted ids of the documents under any of 'include' and none
+            of 'exclude'
+        - raises:
+            - ValueError: if a prefix is not a CPC code
+        """
+        numpy = self._numpy
+        self._build()
+        selected = self._gather(include, first_only)
+        excluded = self._gather(exclude, False)
+        if len(excluded) and len(selected):
+            selected = numpy.setdiff1d(selected, excluded, assume_unique=True)
+        return selected
+
+
+    def _gather(
+        self,
+        prefixes: Iterable[str],
+        first_only: bool
+        ) -> "numpy.ndarray":
+        numpy = self._numpy
+        slices: List[Any] = []
+        for prefix in prefixes:
+            low, high = self._rankRange(prefix)
+            start, end = self._offsets[low], self._offsets[high]
+            postings = self._postings[start:end]
+            if first_only:
+                postings = postings[self._posting_first[start:end]]
+            slices.append(postings)
+        if not slices:
+            return numpy.empty(0, numpy.uint32)
+        if len(slices) == 1 and high - low <= 1:
+            # the postings of a single code are sorted and unique already
+            return slices[0].copy()
+        # a mark per document is linear where sorting the postings is not
+        marks = numpy.zeros(len(self._documents), numpy.bool_)
+        for postings in slices:
+            marks[postings] = True
+        return numpy.flatnonzero(marks).astype(numpy.uint32)
+
+
+    def count(self, prefix: str, first_only: bool = False) -> int:
+        return len(self.select(prefix, first_only))
+
+
+    def countBy(
+        self,
+        level: str,
+        document_ids: Optional["numpy.ndarray"] = None
+        ) -> Dict[str, int]:
+        r""" Instance Method - Count By
+        - arguments:
+            - level: one of 'CPC_LEVELS'; ex: 'subclass'
+            - document_ids: restricts the count to these documents, ex: the
+            result of 'query'
+        - returns:
+            - the number of documents under every prefix at 'level', in
+            hierarchy order; a document classified twice under one prefix
+            counts once
+        - raises:
+            - ValueError: for an unknown level
+        """
+        if level not in CPC_LEVELS:
+            raise ValueError("unknown level {!r}, expected one of {}"\
+                .format(level, list(CPC_LEVELS)))
+        numpy = self._numpy
+        self._build()
+        prefixes, code_prefixes = numpy.unique(
+            numpy.array([
+                cpc_sort_key(cpc_prefix(code, level))
+                for code in self._ranked_codes
+            ] or [""]),
+            return_inverse=True
+        )
+        documents = self._postings.astype(numpy.int64)
+        posting_prefixes = code_prefixes.reshape(-1)[self._posting_codes]
+        if document_ids is not None:
+            mask = numpy.isin(documents, document_ids)
+            documents = documents[mask]
+            posting_prefixes = posting_prefixes[mask]
+        pairs = numpy.unique(documents * len(prefixes) + posting_prefixes)
+        counts = numpy.bincount(
+            pairs % len(prefixes), minlength=len(prefixes)
+        )
+        names: Dict[str, str] = {
+            cpc_sort_key(cpc_prefix(code, level)): cpc_prefix(code, level)
+            for code in self._ranked_codes
+        }
+        return {
+            names[key]: int(count)
+            for key, count in zip(prefixes.tolist(), counts.tolist()) if count
+        }
+
+
+    def getPublicationNumbers(self, document_ids: Iterable[int]) -> List[str]:
+        documents: List[str] = self._documents
+        return [documents[document_id] for document_id in document_ids]
+
+
+    def getCodes(self, document_id: int) -> List[str]:
+        r""" Instance Method - Get Codes
+        - arguments:
+            - document_id: a document id
+        - returns:
+            - the codes of the document, in hierarchy order
+        - notes:
+            - scans every posting; meant for inspection, not for bulk use
+        """
+        self._build()
+        ranks = self._posting_codes[self._postings == document_id]
+        return [self._ranked_codes[rank] for rank in ranks.tolist()]
+
+
+    def save(self, path: str) -> None:
+        r""" Instance Method - Save
+        - arguments:
+            - path: the '.npz' file written
+        - returns:
+        """
+        numpy = self._numpy
+        self._build()
+        numpy.savez(
+            path,
+            documents=numpy.array(self._documents, dtype=str),
+            codes=numpy.array(self._ranked_codes, dtype=str),
+            postings=self._postings, posting_codes=self._posting_codes,
+            posting_first=self._posting_first
+        )
+        return None
+
+
+    @classmethod
+    def load(cls, path: str) -> "CpcIndex":
+        r""" Class Method - Load
+        - arguments:
+            - path: a file written by 'save'
+        - returns:
+            - the restored 'CpcIndex'; documents can still be added to it
+        """
+        index: CpcIndex = cls()
+        with index._numpy.load(path, allow_pickle=False) as data:
+            index._documents = data["documents"].tolist()
+            index._ranked_codes = data["codes"].tolist()
+            index._postings = data["postings"]
+            index._posting_codes = data["posting_codes"]
+            index._posting_first = data["posting_first"]
+        index._vocabulary = CpcVocabulary(index._ranked_codes)
+        index._ranked_keys = [
+            cpc_sort_key(code) for code in index._ranked_codes
+        ]
+        index._offsets = index._numpy.searchsorted(
+            index._posting_codes,
+            index._numpy.arange(len(index._ranked_codes) + 1)
+        )
+        return index
+
+
+    pass # end of CpcIndex
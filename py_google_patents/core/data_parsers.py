@@ -2,159 +2,196 @@ r""" py_google_patents.core.data_parsers module """
 
 
 # importing standard modules ==================================================
-from typing import Dict, Any
-import pprint as pp
+from typing import Dict, Any, Union, Optional, Iterable, List, Type, TypeVar
+import html, logging, re, time
 
 
 # importing third-party modules ===============================================
-from bs4 import BeautifulSoup, PageElement, Tag, NavigableString
+from pydantic import BaseModel
 
 
 # importing custom modules ====================================================
 from ..common.config import getLibraryLogger
-from ..models.response_models import GoogleParseResponse, GooglePatentResponse
+from ..common.serialization import loads
+from ..models.response_models import GoogleParseResponse, \
+    GooglePatentResponse, GoogleParsePatentResult, GoogleParseQueryResult, \
+    GoogleQueryResponse, PatentMetaData
+from .metrics import MetricsRecorder, get_metrics
+
+
+# module variables ============================================================
+_M = TypeVar("_M", bound=BaseModel)
+
+_MARKUP_PATTERN: re.Pattern = re.compile(r"<[^>]*>")
+""" the '<b>' highlighting of the query terms in '/xhr/query' titles """
+
+
+# helper definitions ==========================================================
+def _construct(model: Type[_M], values: Dict[str, Any]) -> _M:
+    r""" builds 'model' without validation, dropping unknown keys like a
+    validated model would """
+    return model.construct(**{
+        name: values[name] for name in model.__fields__ if name in values
+    })
+
+
+def _construct_parse_response(data: Dict[str, Any]) -> GoogleParseResponse:
+    results: Optional[List[BaseModel]] = None
+    if data.get("results") is not None:
+        results = []
+        for item in data["results"]:
+            # discriminated by key presence, instead of validating the whole
+            # list against each branch of the 'Union' in turn
+            if "result" in item:
+                results.append(GoogleParsePatentResult.construct(
+                    result=_construct(PatentMetaData, item["result"])
+                ))
+            else:
+                results.append(_construct(GoogleParseQueryResult, item))
+    response: GoogleParseResponse = _construct(GoogleParseResponse, data)
+    response.__dict__["results"] = results
+    return response
 
 
 # method definitions ==========================================================
 def parse_parse_endpoint_response_data(
-    data: Dict[str, Any]
+    data: Union[Dict[str, Any], str, bytes],
+    trusted: bool = False
     ) -> GoogleParseResponse:
     r""" Functional Requirement - PARSE PARSE ENDPOINT RESPONSE DATA
     - arguments:
-        - data: json returned by the '/xhr/parse' endpoint
+        - data: json returned by the '/xhr/parse' endpoint, decoded or as the
+        raw body
+        - trusted: if True, the models are built without validation; meant
+        for responses known to be well-formed, ex: replays of recorded
+        typeahead logs
     - returns:
         - an object of type 'GoogleParseResponse'
     - raises:
+        - pydantic.ValidationError: if 'data' is invalid and not 'trusted'
     - notes:
+        - a raw body is decoded with 'orjson' when it is installed
+        - trusted results are told apart by key presence: an item holding a
+        'result' is a 'GoogleParsePatentResult', any other one a
+        'GoogleParseQueryResult'; the regexes of the fields are not checked
+        - the duration is recorded as 'parse_seconds' to the process-wide
+        'MetricsRecorder', when enabled
     """
 
-    _result: GoogleParseResponse = GoogleParseResponse(**data)
-    # pydantic makes sure to insert the appropriate models in the sub-fields
+    metrics: MetricsRecorder = get_metrics()
+    started: float = time.perf_counter() if metrics.enabled else 0
 
+    if isinstance(data, (str, bytes)):
+        data = loads(data)
+
+    if trusted:
+        _result: GoogleParseResponse = _construct_parse_response(data)
+    else:
+        _result = GoogleParseResponse(**data)
+        # pydantic makes sure to insert the appropriate models in the
+        # sub-fields
+
+    if metrics.enabled:
+        metrics.observe(
+            "parse_seconds", time.perf_counter() - started,
+            endpoint="/xhr/parse"
+        )
     return _result
 
 
-def parse_result_endpoint_response_data(data: str) -> GooglePatentResponse:
-    r""" Functional Requirement - PARSE RESULT ENDPOINT RESPONSE DATA
+def parse_query_endpoint_response_data(
+    data: Union[Dict[str, Any], str, bytes]
+    ) -> GoogleQueryResponse:
+    r""" Functional Requirement - PARSE QUERY ENDPOINT RESPONSE DATA
     - arguments:
-        - data: html returned (as str) by the '/xhr/result' endpoint
+        - data: json returned by the '/xhr/query' endpoint, decoded or as the
+        raw body
     - returns:
-        - an object of type 'GooglePatentResponse'
+        - an object of type 'GoogleQueryResponse'
     - raises:
+        - pydantic.ValidationError: if a document id is malformed
     - notes:
+        - the results of every cluster are flattened in rank order, as
+        'PatentMetaData' objects; titles lose their highlighting markup
+        - the duration is recorded as 'parse_seconds' to the process-wide
+        'MetricsRecorder', when enabled
     """
 
-    soup: BeautifulSoup = BeautifulSoup(data, features="html5lib")
-    document: Tag = soup.find_next(name="article").__copy__()
-    del soup
-
-    # find abstract section and remove from original document -----------------
-    abstract_section: Tag = document.find_next(
-        name="section", attrs={"itemprop": "abstract"}
+    metrics: MetricsRecorder = get_metrics()
+    started: float = time.perf_counter() if metrics.enabled else 0
+
+    if isinstance(data, (str, bytes)):
+        data = loads(data)
+
+    page: Dict[str, Any] = data.get("results") or {}
+    results: List[PatentMetaData] = []
+    for cluster in page.get("cluster") or ():
+        for item in cluster.get("result") or ():
+            patent: Dict[str, Any] = item.get("patent") or {}
+            results.append(PatentMetaData(
+                id=item.get("id"),
+                number=patent.get("publication_number"),
+                title=html.unescape(
+                    _MARKUP_PATTERN.sub("", patent.get("title") or "")
+                ).strip()
+            ))
+    _result: GoogleQueryResponse = GoogleQueryResponse(
+        total_num_results=page.get("total_num_results", 0),
+        total_num_pages=page.get("total_num_pages", 0),
+        num_page=page.get("num_page", 0),
+        results=results
     )
-    if abstract_section:
-        abstract_tag: Tag = abstract_section.__copy__()
-        abstract_section.decompose()
-        # pp.pprint(str(abstract_tag), width=150)
-    else:
-        getLibraryLogger().debug(
-            "document.find_next(name='section', attrs={'itemprop': 'abstract'}) "
-            "returned None"
-        )
-        # no abstract in patent raw source
-        pass
 
-    # find description section and remove from original document --------------
-    description_section: Tag = document.find_next(
-        name="section", attrs={"itemprop": "description"}
-    )
-    if description_section:
-        description_tag: Tag = description_section.__copy__()
-        description_section.decompose()
-        # pp.pprint(str(description_tag), width=150)
-    else:
-        getLibraryLogger().debug(
-            "document.find_next(name='section', attrs={'itemprop': 'description'}) "
-            "returned None"
+    if metrics.enabled:
+        metrics.observe(
+            "parse_seconds", time.perf_counter() - started,
+            endpoint="/xhr/query"
         )
-        # no description in patent raw source
-        pass
+    return _result
 
-    # find claims section and remove from original document -------------------
-    claims_section: Tag = document.find_next(
-        name="section", attrs={"itemprop": "claims"}
-    )
-    if claims_section:
-        claims_tag: Tag = claims_section.__copy__()
-        claims_section.decompose()
-        # pp.pprint(str(claims_tag), width=150)
-    else:
-        getLibraryLogger().debug(
-            "document.find_next(name='section', attrs={'itemprop': 'claims'}) "
-            "returned None"
-        )
-        # no claims in patent raw source
-        pass
 
-    # find application section and remove from original document ----------------
-    application_section: Tag = document.find_next(
-        name="section", attrs={"itemprop": "application"}
-    )
-    if application_section:
-        application_tag: Tag = application_section.__copy__()
-        application_section.decompose()
-        # pp.pprint(str(application_tag), width=150)
-    else:
-        getLibraryLogger().debug(
-            "document.find_next(name='section', attrs={'itemprop': 'application'}) "
-            "returned None"
-        )
-        # no application in patent raw source
-        pass
+def parse_result_endpoint_response_data(
+    data: Union[str, bytes],
+    sections: Optional[Iterable[str]] = None,
+    lazy: bool = False
+    ) -> GooglePatentResponse:
+    r""" Functional Requirement - PARSE RESULT ENDPOINT RESPONSE DATA
+    - arguments:
+        - data: html returned (as str or bytes) by the '/xhr/result' endpoint
+        - sections: names of the sections to extract, from
+        'py_google_patents.core.html_parsers.RESULT_SECTIONS'; all of them
+        when omitted
+        - lazy: if True, only the metadata is parsed now and a
+        'LazyGooglePatentResponse' parses each section on first access;
+        'sections' is ignored
+    - returns:
+        - an object of type 'GooglePatentResponse'
+    - raises:
+    - notes:
+        - the abstract, description, claims, application, family and CPC
+        classifications are extracted in a single pass over the document;
+        sections missing from the page are left empty
+        - the duration is recorded as 'parse_seconds' to the process-wide
+        'MetricsRecorder', when enabled
+    """
 
-    # find family section and remove from original document ---------------------
-    family_section: Tag = document.find_next(
-        name="section", attrs={"itemprop": "family"}
-    )
-    if family_section:
-        family_tag: Tag = family_section.__copy__()
-        family_section.decompose()
-        # pp.pprint(str(family_tag), width=150)
-    else:
-        getLibraryLogger().debug(
-            "document.find_next(name='section', attrs={'itemprop': 'family'}) "
-            "returned None"
-        )
-        # no family in patent raw source
-        pass
+    # the html stack (lxml) is only imported once a result page is parsed
+    from .html_parsers import parse_result_page, parse_result_page_lazy
 
-    # find classification section and remove from original document -----------
-    classifications_ul: Tag = document.find_next(
-        name="ul", attrs={"itemprop": "cpcs"}
-    )
-    if classifications_ul:
-        classification_section: Tag = classifications_ul.find_previous(
-            name="section"
-        )
-        classification_tag: Tag = classification_section.__copy__()
-        classification_section.decompose()
-        # pp.pprint(str(classification_tag), width=150)
-    else:
+    metrics: MetricsRecorder = get_metrics()
+    started: float = time.perf_counter() if metrics.enabled else 0
+
+    _result: GooglePatentResponse = parse_result_page_lazy(data) if lazy \
+        else parse_result_page(data, sections)
+    if _result.publication_number is None \
+        and getLibraryLogger().isEnabledFor(logging.DEBUG):
         getLibraryLogger().debug(
-            "document.find_next(name='ul', attrs={'itemprop': 'cpcs'}) "
-            "returned None"
+            "no 'publicationNumber' found in the '/xhr/result' response"
         )
-        # no classifications in patent raw source
-        pass
-
-    # # find image section and remove from original document --------------------
-    # image_section: Tag = document.find_next(name="section")
-    # image_tag: Tag = image_section.__copy__()
-    # image_section.decompose()
-
-    # pp.pprint(str(image_tag), width=150)
-    
-    
-    pp.pprint(str(document), width=150)
 
-    return None
\ No newline at end of file
+    if metrics.enabled:
+        metrics.observe(
+            "parse_seconds", time.perf_counter() - started,
+            endpoint="/xhr/result", mode="lazy" if lazy else "full"
+        )
+    return _result
@@ -0,0 +1,331 @@
+r""" py_google_patents.core.executor module """
+
+
+# importing standard modules ==================================================
+from typing import Any, List, Optional, Tuple, Union
+import asyncio, concurrent.futures, multiprocessing, os, threading, time, \
+    weakref
+
+
+# importing custom modules ====================================================
+from ..models.response_models import GooglePatentResponse
+from .data_parsers import parse_result_endpoint_response_data
+from .metrics import MetricsRecorder, get_metrics
+
+
+# module variables ============================================================
+EXECUTOR_KINDS: Tuple[str, ...] = ("process", "thread", "inline")
+
+_DEFAULT_EXECUTOR: Optional["ParseExecutor"] = None
+_DEFAULT_EXECUTOR_LOCK: threading.Lock = threading.Lock()
+
+
+# method definitions ==========================================================
+def _parse_batch(
+    documents: List[Union[str, bytes]]
+    ) -> List[Tuple[bool, Any, float]]:
+    r""" Functional Requirement - PARSE BATCH
+    - arguments:
+        - documents: html pages returned by the '/xhr/result' endpoint
+    - returns:
+        - a list of (success, 'GooglePatentResponse' or exception, seconds
+        spent parsing) tuples, in input order
+    - notes:
+        - runs inside the worker; must stay a picklable module-level function
+        - the durations let the parent process record parse timings, as a
+        worker process only sees its own, disabled, default metrics
+    """
+    results: List[Tuple[bool, Any, float]] = []
+    for document in documents:
+        started: float = time.perf_counter()
+        try:
+            result: Tuple[bool, Any] = (
+                True, parse_result_endpoint_response_data(document)
+            )
+        except Exception as error:
+            result = (False, error)
+        results.append(result + (time.perf_counter() - started,))
+    return results
+
+
+def default_mp_context() -> multiprocessing.context.BaseContext:
+    r""" Functional Requirement - DEFAULT MP CONTEXT
+    - arguments:
+    - returns:
+        - the multiprocessing context process pools are created with when
+        none is given: 'forkserver' where available, 'spawn' otherwise
+    - notes:
+        - workers are never forked from the calling process, which may run
+        event loop threads (ex: a 'SyncClient') or web server threads whose
+        locks a forked child would inherit in an arbitrary state
+    """
+    method: str = "forkserver" \
+        if "forkserver" in multiprocessing.get_all_start_methods() \
+        else "spawn"
+    return multiprocessing.get_context(method)
+
+
+# class definitions ===========================================================
+class _Batch:
+    r""" documents waiting to be sent to a worker together, on one loop """
+
+    __slots__ = ("items", "size_bytes", "flush_handle")
+
+    def __init__(self):
+        self.items: List[Tuple[Union[str, bytes], asyncio.Future]] = []
+        self.size_bytes: int = 0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        return
+
+    pass # end of _Batch
+
+
+# -----------------------------------------------------------------------------
+class ParseExecutor:
+    r""" class handing '/xhr/result' html to a pool of workers so that parsing
+    never blocks the event loop fetching the documents
+
+    - notes:
+        - kind 'process' (the default) scales parsing over every core, 'thread'
+        avoids inter-process copies, 'inline' parses in the calling coroutine
+        - documents smaller than 'batch_bytes' are grouped (up to 'batch_size'
+        documents, waiting at most 'batch_delay' seconds) and sent to a worker
+        together so that small pages don't pay the IPC round trip one by one
+        - an instance may be shared by several event loops running in
+        different threads (ex: the process-wide default executor): documents
+        are batched per loop and a batch's futures are resolved on its loop
+    """
+
+
+    def __init__(
+        self,
+        kind: str = "process",
+        max_workers: Optional[int] = None,
+        batch_size: int = 16,
+        batch_bytes: int = 256 * 1024,
+        batch_delay: float = 0.002,
+        mp_context: Optional[multiprocessing.context.BaseContext] = None
+        ):
+        r""" Constructor
+        - arguments:
+            - kind: one of 'process', 'thread' or 'inline'
+            - max_workers: number of workers; defaults to the cpu count
+            - batch_size: maximum number of documents in one batch
+            - batch_bytes: documents of at least this size are sent alone, and
+            a batch is sent as soon as its documents reach this size
+            - batch_delay: seconds a partial batch waits for more documents
+            - mp_context: multiprocessing context of the process pool;
+            'default_mp_context' when omitted
+        - raises:
+            - ValueError: if 'kind' is unknown
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(
+                "kind must be one of {}, got {!r}".format(EXECUTOR_KINDS, kind)
+            )
+        self.kind: str = kind
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.batch_size: int = max(1, batch_size)
+        self.batch_bytes: int = batch_bytes
+        self.batch_delay: float = batch_delay
+        self._mp_context: Optional[multiprocessing.context.BaseContext] = \
+            mp_context
+        self._pool: Optional[concurrent.futures.Executor] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._batches: weakref.WeakKeyDictionary = \
+            weakref.WeakKeyDictionary()
+        """ maps an event loop to its '_Batch' """
+        return
+
+
+    def __enter__(self) -> "ParseExecutor":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+        return None
+
+
+    def _getPool(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    self._pool = concurrent.futures.ProcessPoolExecutor(
+                        self.max_workers,
+                        mp_context=self._mp_context or default_mp_context()
+                    )
+                else:
+                    self._pool = concurrent.futures.ThreadPoolExecutor(
+                        self.max_workers,
+                        thread_name_prefix="py_google_patents"
+                    )
+            return self._pool
+
+
+    def _getBatch(self, loop: asyncio.AbstractEventLoop) -> _Batch:
+        with self._lock:
+            batch: Optional[_Batch] = self._batches.get(loop)
+            if batch is None:
+                batch = self._batches[loop] = _Batch()
+            return batch
+
+
+    def shutdown(self, wait: bool = True) -> None:
+        r""" Instance Method - Shutdown
+        - arguments:
+            - wait: if True, blocks until running batches are finished
+        - returns:
+        - notes:
+            - documents still waiting for their batch to be sent fail with a
+            RuntimeError, raised by their 'parseResult' calls
+        """
+        with self._lock:
+            loops: List[asyncio.AbstractEventLoop] = list(self._batches)
+            pool, self._pool = self._pool, None
+        for loop in loops:
+            if not loop.is_closed():
+                # a batch is only touched from its own loop's thread
+                loop.call_soon_threadsafe(self._abandon, loop)
+        if pool is not None:
+            pool.shutdown(wait=wait)
+        return None
+
+
+    def _abandon(self, loop: asyncio.AbstractEventLoop) -> None:
+        batch: _Batch = self._getBatch(loop)
+        if batch.flush_handle is not None:
+            batch.flush_handle.cancel()
+            batch.flush_handle = None
+        items, batch.items = batch.items, []
+        batch.size_bytes = 0
+        for _, future in items:
+            if not future.done():
+                future.set_exception(
+                    RuntimeError("ParseExecutor was shut down")
+                )
+        return None
+
+
+    async def parseResult(
+        self,
+        data: Union[str, bytes]
+        ) -> GooglePatentResponse:
+        r""" Instance Method - Parse Result
+        - arguments:
+            - data: html returned by the '/xhr/result' endpoint
+        - returns:
+            - an object of type 'GooglePatentResponse'
+        - raises:
+            - the exception raised while parsing 'data'
+        """
+        if self.kind == "inline":
+            return parse_result_endpoint_response_data(data)
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if len(data) >= self.batch_bytes or self.batch_size == 1:
+            return self._unwrap(
+                (await loop.run_in_executor(
+                    self._getPool(), _parse_batch, [data]
+                ))[0]
+            )
+
+        # a batch is only touched from its own loop's thread
+        batch: _Batch = self._getBatch(loop)
+        future: asyncio.Future = loop.create_future()
+        batch.items.append((data, future))
+        batch.size_bytes += len(data)
+        if len(batch.items) >= self.batch_size \
+            or batch.size_bytes >= self.batch_bytes:
+            self._flush(loop)
+        elif batch.flush_handle is None:
+            batch.flush_handle = loop.call_later(
+                self.batch_delay, self._flush, loop
+            )
+        return self._unwrap(await future)
+
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending: _Batch = self._getBatch(loop)
+        if pending.flush_handle is not None:
+            pending.flush_handle.cancel()
+            pending.flush_handle = None
+        batch, pending.items = pending.items, []
+        pending.size_bytes = 0
+        if not batch:
+            return None
+
+        futures: List[asyncio.Future] = [future for _, future in batch]
+        submitted: asyncio.Future = loop.run_in_executor(
+            self._getPool(), _parse_batch, [document for document, _ in batch]
+        )
+
+        def _resolve(done: asyncio.Future) -> None:
+            error: Optional[BaseException] = None if done.cancelled() \
+                else done.exception()
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                if done.cancelled():
+                    future.cancel()
+                elif error is not None:
+                    # ex: a worker process died; fails the whole batch
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[index])
+            return None
+
+        submitted.add_done_callback(_resolve)
+        return None
+
+
+    def _unwrap(
+        self,
+        outcome: Tuple[bool, Any, float]
+        ) -> GooglePatentResponse:
+        success, value, seconds = outcome
+        metrics: MetricsRecorder = get_metrics()
+        if self.kind == "process" and metrics.enabled:
+            # threads record to the metrics themselves, see 'data_parsers'
+            metrics.observe(
+                "parse_seconds", seconds, endpoint="/xhr/result", mode="full"
+            )
+        if not success:
+            raise value
+        return value
+
+
+    pass # end of ParseExecutor
+
+
+# method definitions ==========================================================
+def get_default_parse_executor() -> ParseExecutor:
+    r""" Functional Requirement - GET DEFAULT PARSE EXECUTOR
+    - arguments:
+    - returns:
+        - the process-wide 'ParseExecutor' used when none is given; a process
+        pool created on first use
+    - notes:
+        - it is shared by every event loop of the process; its workers are
+        started with 'default_mp_context'
+    """
+    global _DEFAULT_EXECUTOR
+    with _DEFAULT_EXECUTOR_LOCK:
+        if _DEFAULT_EXECUTOR is None:
+            _DEFAULT_EXECUTOR = ParseExecutor()
+        return _DEFAULT_EXECUTOR
+
+
+def set_default_parse_executor(executor: Optional[ParseExecutor]) -> None:
+    r""" Functional Requirement - SET DEFAULT PARSE EXECUTOR
+    - arguments:
+        - executor: the 'ParseExecutor' to use when none is given; None
+        restores the lazily created process pool
+    - returns:
+    - notes:
+        - the previous default executor is not shut down
+    """
+    global _DEFAULT_EXECUTOR
+    with _DEFAULT_EXECUTOR_LOCK:
+        _DEFAULT_EXECUTOR = executor
+    return None
@@ -0,0 +1,329 @@
+r""" py_google_patents.core.export module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Callable, Dict, IO, List, Optional, Union, \
+    get_args, get_origin
+import abc, bz2, gzip, lzma, os
+
+
+# importing third-party modules ===============================================
+from pydantic import BaseModel
+
+
+# importing custom modules ====================================================
+from ..common.serialization import dumps
+from ..models.response_models import GooglePatentResponse
+
+
+# module variables ============================================================
+DEFAULT_BUFFER_SIZE: int = 1 << 20
+""" bytes of encoded lines a 'JsonlSink' holds before writing them out """
+
+DEFAULT_ROW_GROUP_SIZE: int = 1000
+""" documents per parquet row group; also the number of records a
+'ParquetSink' holds in memory """
+
+JSONL_COMPRESSIONS: Dict[str, Callable[..., IO[bytes]]] = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+
+_EXTENSIONS: Dict[str, str] = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+# helper definitions ==========================================================
+def _arrow_type(annotation: Any) -> Any:
+    r""" Functional Requirement - ARROW TYPE
+    - arguments:
+        - annotation: the type of a model field; ex: 'List[PatentClaim]'
+    - returns:
+        - the equivalent 'pyarrow.DataType'; models become structs and lists
+        become list columns
+    - raises:
+        - TypeError: for annotations without an arrow equivalent
+    """
+    import pyarrow
+
+    if get_origin(annotation) is Union:
+        arguments = [
+            argument for argument in get_args(annotation)
+            if argument is not type(None)
+        ]
+        if len(arguments) == 1:
+            return _arrow_type(arguments[0])
+    elif get_origin(annotation) is list:
+        return pyarrow.list_(_arrow_type(get_args(annotation)[0]))
+    elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pyarrow.struct([
+            pyarrow.field(name, _arrow_type(field.outer_type_))
+            for name, field in annotation.__fields__.items()
+        ])
+    elif annotation in (str, int, float, bool):
+        return {
+            str: pyarrow.string(), int: pyarrow.int64(),
+            float: pyarrow.float64(), bool: pyarrow.bool_(),
+        }[annotation]
+    raise TypeError("no arrow type for {!r}".format(annotation))
+
+
+def build_arrow_schema(model: type = GooglePatentResponse) -> Any:
+    r""" Function - Build Arrow Schema
+    - arguments:
+        - model: a pydantic model class
+    - returns:
+        - a 'pyarrow.Schema' with one column per field of 'model'
+    - raises:
+        - ImportError: if 'pyarrow' is not installed
+    """
+    import pyarrow
+    return pyarrow.schema(_arrow_type(model).fields)
+
+
+# class definitions ===========================================================
+class ResponseSink(abc.ABC):
+    r""" base class of the writers streaming 'GooglePatentResponse' objects
+    to a file; records are buffered up to a bounded size and written out as
+    the buffer fills, so memory stays flat however many documents are
+    written
+
+    - usage:
+        with JsonlSink("patents.jsonl.gz") as sink:
+            sink.write(response)
+
+    - notes:
+        - sub-classes implement '_writeRecord'
+    """
+
+
+    def __init__(self):
+        r""" Constructor """
+        self._count: int = 0
+        self._closed: bool = False
+        return
+
+
+    def __enter__(self) -> "ResponseSink":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def getCount(self) -> int:
+        r""" Instance Method - Get Count
+        - returns:
+            - the number of documents written so far
+        """
+        return self._count
+
+
+    def write(self, response: GooglePatentResponse) -> None:
+        r""" Instance Method - Write
+        - arguments:
+            - response: a (possibly lazy) 'GooglePatentResponse'; lazy
+            responses are fully parsed
+        - returns:
+        - raises:
+            - ValueError: if the sink is closed
+        """
+        if self._closed:
+            raise ValueError("write to a closed {}".format(
+                type(self).__name__
+            ))
+        self._writeRecord(response.dict())
+        self._count += 1
+        return None
+
+
+    @abc.abstractmethod
+    def _writeRecord(self, record: Dict[str, Any]) -> None:
+        r""" Instance Method - Write Record
+        - arguments:
+            - record: a response, as returned by 'GooglePatentResponse.dict'
+        - returns:
+        """
+        raise NotImplementedError
+
+
+    def flush(self) -> None:
+        r""" Instance Method - Flush
+        - arguments:
+        - returns:
+        - notes:
+            - writes out the buffered records
+        """
+        return None
+
+
+    def close(self) -> None:
+        r""" Instance Method - Close
+        - arguments:
+        - returns:
+        - notes:
+            - flushes the buffered records and closes the file; closing twice
+            is a no-op
+        """
+        self._closed = True
+        return None
+
+
+    pass # end of ResponseSink
+
+
+# -----------------------------------------------------------------------------
+class JsonlSink(ResponseSink):
+    r""" class writing one json document per line, optionally compressed
+
+    - notes:
+        - the compression is inferred from the extension of 'path' by
+        default: '.gz', '.bz2' and '.xz' are recognized
+    """
+
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        compression: Optional[str] = "infer",
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        append: bool = False
+        ):
+        r""" Constructor
+        - arguments:
+            - path: the file written to
+            - compression: one of 'JSONL_COMPRESSIONS', None for plain text,
+            or "infer" to choose from the extension of 'path'
+            - buffer_size: bytes of encoded lines held before a write
+            - append: if True, lines are added to an existing file
+        - raises:
+            - ValueError: for an unknown 'compression'
+        """
+        super().__init__()
+        if compression == "infer":
+            compression = _EXTENSIONS.get(os.path.splitext(path)[1])
+        if compression is not None and compression not in JSONL_COMPRESSIONS:
+            raise ValueError("unknown compression {!r}, expected one of {}".format(
+                compression, sorted(JSONL_COMPRESSIONS)
+            ))
+        opener: Callable[..., IO[bytes]] = JSONL_COMPRESSIONS.get(
+            compression, open
+        )
+        self._file: IO[bytes] = opener(path, "ab" if append else "wb")
+        self._buffer_size: int = buffer_size
+        self._buffer: List[bytes] = []
+        self._buffered: int = 0
+        return
+
+
+    def _writeRecord(self, record: Dict[str, Any]) -> None:
+        line: bytes = dumps(record) + b"\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self._buffer_size:
+            self._drain()
+        return None
+
+
+    def _drain(self) -> None:
+        # a single write per buffer: compressors work on large blocks
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+        return None
+
+
+    def flush(self) -> None:
+        self._drain()
+        self._file.flush()
+        return None
+
+
+    def close(self) -> None:
+        if not self._closed:
+            self._drain()
+            self._file.close()
+        return super().close()
+
+
+    pass # end of JsonlSink
+
+
+# -----------------------------------------------------------------------------
+class ParquetSink(ResponseSink):
+    r""" class writing documents to a parquet file, one row group per
+    'row_group_size' documents; nested sections (claims, classifications,
+    family, citations) are stored as list and struct columns
+
+    - notes:
+        - requires the optional 'pyarrow' dependency
+        - columnar scans only read the columns they select, ex:
+        'pyarrow.parquet.read_table(path, columns=["publication_number"])'
+    """
+
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = "zstd"
+        ):
+        r""" Constructor
+        - arguments:
+            - path: the file written to
+            - row_group_size: documents per row group
+            - compression: a parquet codec; ex: 'zstd', 'snappy', 'none'
+        - raises:
+            - ImportError: if 'pyarrow' is not installed
+            - ValueError: if 'row_group_size' is smaller than 1
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError(
+                "ParquetSink requires 'pyarrow': pip install pyarrow"
+            ) from error
+        if row_group_size < 1:
+            raise ValueError(
+                "row_group_size must be >= 1, got {}".format(row_group_size)
+            )
+        super().__init__()
+        self._pyarrow = pyarrow
+        self._schema = build_arrow_schema()
+        self._writer = pyarrow.parquet.ParquetWriter(
+            path, self._schema, compression=compression
+        )
+        self._row_group_size: int = row_group_size
+        self._rows: List[Dict[str, Any]] = []
+        return
+
+
+    def _writeRecord(self, record: Dict[str, Any]) -> None:
+        self._rows.append(record)
+        if len(self._rows) >= self._row_group_size:
+            self.flush()
+        return None
+
+
+    def flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(
+                self._pyarrow.Table.from_pylist(self._rows, self._schema),
+                row_group_size=len(self._rows)
+            )
+            self._rows.clear()
+        return None
+
+
+    def close(self) -> None:
+        if not self._closed:
+            self.flush()
+            self._writer.close()
+        return super().close()
+
+
+    pass # end of ParquetSink
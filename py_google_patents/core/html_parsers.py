@@ -0,0 +1,679 @@
+r""" py_google_patents.core.html_parsers module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+import re, sys
+
+
+# importing third-party modules ===============================================
+from lxml import etree
+
+
+# importing custom modules ====================================================
+from ..models.response_models import GooglePatentResponse, PatentClaim, \
+    PatentEvent, PatentApplication, PatentPublication, \
+    PatentFamilyApplication, PatentFamily, CPCClassification, \
+    LazyGooglePatentResponse
+
+
+# module variables ============================================================
+CITATION_ROWS: Dict[str, bool] = {
+    "backwardReferences": False,
+    "backwardReferencesOrig": False,
+    "backwardReferencesFamily": True,
+}
+""" itemprop names of cited-document rows; value flags family-to-family """
+
+CITED_BY_ROWS: Dict[str, bool] = {
+    "forwardReferences": False,
+    "forwardReferencesOrig": False,
+    "forwardReferencesFamily": True,
+}
+""" itemprop names of citing-document rows; value flags family-to-family """
+
+RESULT_SECTIONS: Tuple[str, ...] = (
+    "abstract", "description", "claims", "application", "family",
+    "classifications", "citations",
+)
+""" names of the sections a page can be restricted to; the document metadata
+(number, title, dates, inventors, ...) is always collected """
+
+_SECTION_SCOPES: Dict[str, frozenset] = {
+    "abstract": frozenset(["abstract"]),
+    "description": frozenset(["description"]),
+    "claims": frozenset(["claims"]),
+    "application": frozenset(["application"]),
+    "family": frozenset(["docdbFamily", "applications"]),
+    "classifications": frozenset(["cpcs"]),
+    "citations": frozenset(list(CITATION_ROWS) + list(CITED_BY_ROWS)),
+}
+""" itemscope names holding the content of each section """
+
+_COLLECTED_ROWS: frozenset = frozenset(
+    ["cpcs", "docdbFamily", "applications"]
+    + list(CITATION_ROWS) + list(CITED_BY_ROWS)
+)
+""" itemscope names collected wherever they appear in the page """
+
+_IGNORED_SCOPES: frozenset = frozenset([
+    "concept", "concepts", "match", "similarDocuments",
+    "detailedNonPatentLiterature", "definitions", "childApps", "legalEvents",
+    "externalLinks", "images", "landscapes",
+])
+""" itemscope names whose content is not used; their properties are skipped """
+
+_BLOCK_TAGS: frozenset = frozenset([
+    "div", "p", "br", "li", "heading", "td", "tr", "h1", "h2", "h3", "ol",
+    "ul", "table", "claim-text",
+])
+
+_SECTION_NAMES: frozenset = frozenset([
+    "abstract", "description", "claims", "application", "family",
+])
+""" itemscope names of the page sections """
+
+_TEXT_SECTIONS: frozenset = frozenset(["abstract", "description", "claims"])
+
+_LAZY_FIELD_NAMES: frozenset = frozenset(
+    field for fields in LazyGooglePatentResponse.LAZY_FIELDS.values()
+    for field in fields
+)
+""" fields of a 'LazyGooglePatentResponse' parsed on first access """
+
+_SECTION_TAG_PATTERN = re.compile(rb"<(/?)section\b([^>]*)>", re.IGNORECASE)
+_ITEMPROP_PATTERN = re.compile(rb"""itemprop\s*=\s*["']?([A-Za-z]+)""")
+_CITATION_MARKERS: Tuple[bytes, ...] = (
+    b'itemprop="backwardReferences', b'itemprop="forwardReferences',
+)
+
+_FAMILY_ID_PATTERN = re.compile(r"ID=(\d+)")
+_CLAIM_ID_PATTERN = re.compile(r"(\d+)\s*$")
+
+
+# helper definitions ==========================================================
+def _classes(element: etree._Element) -> List[str]:
+    return (element.get("class") or "").split()
+
+
+def _collect_text(element: etree._Element, parts: List[str]) -> None:
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        if not isinstance(child.tag, str):
+            pass    # comments / processing instructions
+        elif "google-src-text" not in _classes(child):
+            # machine translated pages keep the original text in hidden
+            # 'google-src-text' spans
+            if child.tag in _BLOCK_TAGS:
+                parts.append(" ")
+            _collect_text(child, parts)
+            if child.tag in _BLOCK_TAGS:
+                parts.append(" ")
+        if child.tail:
+            parts.append(child.tail)
+    return None
+
+
+def element_text(element: etree._Element) -> str:
+    r""" Functional Requirement - ELEMENT TEXT
+    - arguments:
+        - element: an 'lxml' element
+    - returns:
+        - the whitespace-normalized text content of the element
+    """
+    parts: List[str] = []
+    _collect_text(element, parts)
+    return " ".join("".join(parts).split())
+
+
+def element_value(element: etree._Element) -> str:
+    r""" Functional Requirement - ELEMENT VALUE
+    - arguments:
+        - element: an 'lxml' element carrying an 'itemprop' attribute
+    - returns:
+        - the microdata value of the element
+    """
+    tag: str = element.tag
+    if tag == "meta":
+        return element.get("content", "")
+    if tag == "time":
+        return element.get("datetime") or element_text(element)
+    if tag == "link":
+        return element.get("href", "")
+    return element_text(element)
+
+
+def _description_paragraphs(
+    element: etree._Element,
+    paragraphs: List[str]
+    ) -> None:
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        classes: List[str] = _classes(child)
+        if child.tag == "heading" or "description-paragraph" in classes \
+            or "description-line" in classes:
+            text: str = element_text(child)
+            if text:
+                paragraphs.append(text)
+        else:
+            _description_paragraphs(child, paragraphs)
+    return None
+
+
+def _claim_number(element: etree._Element) -> Optional[int]:
+    for value in (element.get("num"), element.get("id")):
+        match = _CLAIM_ID_PATTERN.search(value or "")
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _claims(element: etree._Element, claims: List[PatentClaim]) -> None:
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        if child.tag == "claim" or "claim" in _classes(child):
+            depends_on: List[int] = sorted({
+                int(match.group(1)) for match in (
+                    _CLAIM_ID_PATTERN.search(reference.get("idref") or "")
+                    for reference in child.iter("claim-ref")
+                ) if match
+            })
+            claims.append(PatentClaim(
+                number=_claim_number(child),
+                text=element_text(child),
+                depends_on=depends_on
+            ))
+        else:
+            _claims(child, claims)
+    return None
+
+
+# class definitions ===========================================================
+class _Scope:
+    r""" a microdata item ('itemscope' element) being collected """
+
+    __slots__ = ("name", "element", "properties", "discard")
+
+    def __init__(
+        self,
+        name: Optional[str],
+        element: etree._Element,
+        discard: bool
+        ):
+        self.name: Optional[str] = name
+        self.element: etree._Element = element
+        self.properties: Dict[str, List[Any]] = {}
+        self.discard: bool = discard
+        return
+
+    def add(self, name: str, value: Any) -> None:
+        self.properties.setdefault(name, []).append(value)
+        return None
+
+    def first(self, name: str, default: Any = None) -> Any:
+        values: Optional[List[Any]] = self.properties.get(name)
+        return values[0] if values else default
+
+    def all(self, name: str) -> List[Any]:
+        return self.properties.get(name, [])
+
+    pass # end of _Scope
+
+
+def _publication(row: _Scope, family_to_family: bool) -> PatentPublication:
+    return PatentPublication(
+        publication_number=row.first("publicationNumber"),
+        id=row.first("href"),
+        priority_date=row.first("priorityDate"),
+        publication_date=row.first("publicationDate"),
+        assignee=row.first("assigneeOriginal") or row.first("assignee"),
+        title=row.first("title", ""),
+        language=row.first("primaryLanguage"),
+        examiner_cited=bool(row.first("examinerCited")),
+        family_to_family=family_to_family
+    )
+
+
+# -----------------------------------------------------------------------------
+class ResultPageBuilder:
+    r""" class building a 'GooglePatentResponse' from the html returned by the
+    '/xhr/result' endpoint in a single pass over the parser events
+
+    - notes:
+        - the page is fed to an incremental 'lxml' html parser; microdata
+        ('itemscope' / 'itemprop') is collected while elements close, and
+        finished sections are cleared from the tree, so the document is never
+        held in memory as a whole nor copied
+        - 'feed' may be called any number of times with consecutive chunks
+        - when restricted to some 'sections', the content of the other ones is
+        skipped and 'isComplete' tells when the remaining input can be dropped
+        - the metadata block (the '<dl>' holding the publication number) may
+        come before or after the sections; input is only dropped once it was
+        read
+    """
+
+
+    def __init__(self, sections: Optional[Iterable[str]] = None):
+        r""" Constructor
+        - arguments:
+            - sections: names, from 'RESULT_SECTIONS', of the sections to
+            collect; every section when omitted
+        - raises:
+            - ValueError: if a section name is unknown
+        """
+        wanted: Set[str] = set(RESULT_SECTIONS) if sections is None \
+            else set(sections)
+        unknown: Set[str] = wanted.difference(RESULT_SECTIONS)
+        if unknown:
+            raise ValueError(
+                "unknown sections {}; expected names from {}".format(
+                    sorted(unknown), RESULT_SECTIONS
+                )
+            )
+        self._wanted: Set[str] = wanted
+        self._completed: Set[str] = set()
+        self._skipped_scopes: Set[str] = set(_IGNORED_SCOPES)
+        for section in set(RESULT_SECTIONS).difference(wanted):
+            self._skipped_scopes.update(_SECTION_SCOPES[section])
+        if not {"family", "citations"}.intersection(wanted):
+            self._skipped_scopes.add("family")
+        self._classifications_seen: bool = False
+        self._parser: etree.HTMLPullParser = etree.HTMLPullParser(
+            events=("start", "end"), encoding="utf-8", huge_tree=True,
+            remove_comments=True, remove_pis=True, no_network=True
+        )
+        self._scopes: List[_Scope] = []
+        self._root: Optional[_Scope] = None
+        self._rows: Dict[str, List[_Scope]] = {}
+        self._sections: Dict[str, _Scope] = {}
+        return
+
+
+    def feed(self, data: Union[bytes, str]) -> None:
+        r""" Instance Method - Feed
+        - arguments:
+            - data: the next chunk of the page
+        - returns:
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._parser.feed(data)
+        self._consume(self._parser.read_events())
+        return None
+
+
+    def close(self) -> GooglePatentResponse:
+        r""" Instance Method - Close
+        - arguments:
+        - returns:
+            - an object of type 'GooglePatentResponse' holding everything
+            collected from the fed data
+        """
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass    # empty or non-html input; nothing was collected
+        self._consume(self._parser.read_events())
+        return self.build()
+
+
+    def isComplete(self) -> bool:
+        r""" Instance Method - Is Complete
+        - arguments:
+        - returns:
+            - True once the metadata and every requested section have been
+            read entirely; the rest of the page does not need to be fed
+        """
+        return "metadata" in self._completed \
+            and self._wanted.issubset(self._completed)
+
+
+    def _complete(self, *sections: str) -> None:
+        self._completed.update(sections)
+        return None
+
+
+    def _release(self, element: etree._Element) -> None:
+        # drop a processed element's subtree and its already processed
+        # preceding siblings
+        element.clear(keep_tail=True)
+        parent: Optional[etree._Element] = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+        return None
+
+
+    def _consume(self, events: Iterable) -> None:
+        scopes: List[_Scope] = self._scopes
+        for event, element in events:
+            attributes = element.attrib
+
+            if event == "start":
+                if "itemscope" in attributes:
+                    name: Optional[str] = attributes.get("itemprop")
+                    if name == "cpcs":
+                        self._classifications_seen = True
+                    scope: _Scope = _Scope(
+                        name, element,
+                        name in self._skipped_scopes \
+                            or (bool(scopes) and scopes[-1].discard)
+                    )
+                    if self._root is None:
+                        self._root = scope
+                    scopes.append(scope)
+                continue
+
+            if not scopes:
+                continue
+            scope = scopes[-1]
+            itemprop: Optional[str] = attributes.get("itemprop")
+
+            if element.tag == "section" and self._classifications_seen:
+                # the classification lists live in an un-named section
+                self._complete("classifications")
+            elif element.tag == "dl" and scope is self._root \
+                and "publicationNumber" in scope.properties:
+                # the metadata list of the article, wherever it is placed
+                self._complete("metadata")
+
+            if scope.element is element:
+                scopes.pop()
+                if scope.name in _SECTION_NAMES:
+                    self._complete(scope.name)
+                    if scope.name == "family":
+                        # citation tables are part of the family section
+                        self._complete("citations")
+                if not scopes:
+                    # the article, ie: the whole document, is closed
+                    self._complete("metadata", *RESULT_SECTIONS)
+                if not scope.discard and itemprop:
+                    if scopes:
+                        scopes[-1].add(itemprop, scope)
+                    if itemprop in _COLLECTED_ROWS:
+                        self._rows.setdefault(itemprop, []).append(scope)
+                    if scope.name in _SECTION_NAMES \
+                        and scope.name not in self._sections:
+                        self._sections[scope.name] = scope
+                self._release(element)
+                continue
+
+            if scope.discard:
+                continue
+
+            if itemprop == "content" and scope.name in _TEXT_SECTIONS:
+                scope.add("content", self._extractSection(scope.name, element))
+                self._release(element)
+            elif itemprop:
+                scope.add(itemprop, element_value(element))
+            elif element.tag == "a":
+                href: str = attributes.get("href") or ""
+                if href.startswith("/patent/") and "href" not in scope.properties:
+                    scope.add("href", href[1:])
+            elif element.tag == "h2" and scope.name == "family":
+                match = _FAMILY_ID_PATTERN.search(element_text(element))
+                if match:
+                    scope.add("familyId", match.group(1))
+        return None
+
+
+    def _extractSection(self, name: str, element: etree._Element) -> Any:
+        if name == "abstract":
+            return element_text(element)
+        if name == "description":
+            paragraphs: List[str] = []
+            _description_paragraphs(element, paragraphs)
+            if not paragraphs:
+                text: str = element_text(element)
+                paragraphs = [text] if text else []
+            return paragraphs
+        claims: List[PatentClaim] = []
+        _claims(element, claims)
+        return claims
+
+
+    def _publications(
+        self,
+        row_names: Dict[str, bool]
+        ) -> List[PatentPublication]:
+        publications: List[PatentPublication] = []
+        seen: set = set()
+        for name, family_to_family in row_names.items():
+            for row in self._rows.get(name, ()):
+                publication: PatentPublication = _publication(
+                    row, family_to_family
+                )
+                key = publication.publication_number or publication.id
+                if key in seen:
+                    continue
+                seen.add(key)
+                publications.append(publication)
+        return publications
+
+
+    def build(self) -> GooglePatentResponse:
+        r""" Instance Method - Build
+        - arguments:
+        - returns:
+            - an object of type 'GooglePatentResponse' holding everything
+            collected so far
+        """
+        root: _Scope = self._root if self._root is not None \
+            else _Scope(None, None, False)
+        sections: Dict[str, _Scope] = self._sections
+
+        abstract: Optional[_Scope] = sections.get("abstract")
+        description: Optional[_Scope] = sections.get("description")
+        claims: Optional[_Scope] = sections.get("claims")
+
+        return GooglePatentResponse(
+            publication_number=root.first("publicationNumber"),
+            title=root.first("title", ""),
+            country_code=root.first("countryCode"),
+            inventors=root.all("inventor"),
+            assignees=root.all("assigneeOriginal"),
+            priority_date=root.first("priorityDate"),
+            filing_date=root.first("filingDate"),
+            publication_date=root.first("publicationDate"),
+            abstract=abstract.first("content") \
+                if abstract is not None else None,
+            description=description.first("content", []) \
+                if description is not None else [],
+            claims=claims.first("content", []) \
+                if claims is not None else [],
+            application=self._application(root),
+            family=self._family(),
+            classifications=self._classifications(),
+            citations=self._publications(CITATION_ROWS),
+            cited_by=self._publications(CITED_BY_ROWS),
+        )
+
+
+    def _application(self, root: _Scope) -> Optional[PatentApplication]:
+        section: Optional[_Scope] = self._sections.get("application")
+        if section is None:
+            return None
+        return PatentApplication(
+            application_number=section.first("applicationNumber") \
+                or root.first("applicationNumber"),
+            events=[
+                PatentEvent(
+                    date=event.first("date"),
+                    title=event.first("title", ""),
+                    type=event.first("type")
+                )
+                for event in section.all("events") or root.all("events")
+            ]
+        )
+
+
+    def _family(self) -> Optional[PatentFamily]:
+        section: Optional[_Scope] = self._sections.get("family")
+        if section is None and not self._rows.get("docdbFamily"):
+            return None
+        return PatentFamily(
+            family_id=section.first("familyId") \
+                if section is not None else None,
+            applications=[
+                PatentFamilyApplication(
+                    application_number=row.first("applicationNumber"),
+                    publication_number=row.first("representativePublication"),
+                    filing_date=row.first("filingDate"),
+                    title=row.first("title", "")
+                )
+                for row in self._rows.get("applications", ())
+            ],
+            members=[
+                _publication(row, False)
+                for row in self._rows.get("docdbFamily", ())
+            ]
+        )
+
+
+    def _classifications(self) -> List[CPCClassification]:
+        codes: Dict[str, CPCClassification] = {}
+        for scope in self._rows.get("cpcs", ()):
+            code: Optional[str] = scope.first("Code")
+            if not code or code in codes:
+                continue
+            # codes repeat across a corpus: share one string per code
+            codes[code] = CPCClassification(
+                code=sys.intern(code),
+                description=scope.first("Description", ""),
+                leaf=scope.first("Leaf") == "true",
+                first=scope.first("FirstCode") == "true"
+            )
+        if codes and not any(item.leaf for item in codes.values()):
+            # pages without 'Leaf' markers list one code per hierarchy
+            for item in codes.values():
+                item.leaf = True
+        return list(codes.values())
+
+
+    pass # end of ResultPageBuilder
+
+
+# method definitions ==========================================================
+def parse_result_page(
+    data: Union[bytes, str],
+    sections: Optional[Iterable[str]] = None
+    ) -> GooglePatentResponse:
+    r""" Functional Requirement - PARSE RESULT PAGE
+    - arguments:
+        - data: html returned by the '/xhr/result' endpoint
+        - sections: names, from 'RESULT_SECTIONS', of the sections to collect;
+        every section when omitted
+    - returns:
+        - an object of type 'GooglePatentResponse'
+    """
+    builder: ResultPageBuilder = ResultPageBuilder(sections)
+    builder.feed(data)
+    return builder.close()
+
+
+# -----------------------------------------------------------------------------
+def scan_section_offsets(data: bytes) -> Dict[str, List[Tuple[int, int]]]:
+    r""" Functional Requirement - SCAN SECTION OFFSETS
+    - arguments:
+        - data: html returned by the '/xhr/result' endpoint
+    - returns:
+        - a 'dict' mapping a name from 'RESULT_SECTIONS' to the (start, end)
+        byte offsets of the top-level '<section>' elements holding it, in
+        document order; 'metadata' maps to the ranges between those elements
+    - notes:
+        - a cheap regular expression pre-scan; no html is parsed
+    """
+    offsets: Dict[str, List[Tuple[int, int]]] = {}
+    metadata: List[Tuple[int, int]] = []
+    depth: int = 0
+    start: int = 0
+    opening: bytes = b""
+    outside: int = 0    # start of the current range outside any section
+
+    for match in _SECTION_TAG_PATTERN.finditer(data):
+        if not match.group(1):
+            if depth == 0:
+                start, opening = match.start(), match.group(2)
+                if start > outside:
+                    metadata.append((outside, start))
+            depth += 1
+            continue
+        if depth == 0:
+            continue
+        depth -= 1
+        if depth:
+            continue
+
+        end: int = match.end()
+        outside = end
+        itemprop = _ITEMPROP_PATTERN.search(opening)
+        name: Optional[str] = itemprop.group(1).decode("ascii") \
+            if itemprop else None
+        if name in _SECTION_NAMES:
+            offsets.setdefault(name, []).append((start, end))
+        if name != "family" and data.find(b'itemprop="cpcs"', start, end) >= 0:
+            offsets.setdefault("classifications", []).append((start, end))
+        if any(data.find(marker, start, end) >= 0 for marker in _CITATION_MARKERS):
+            offsets.setdefault("citations", []).append((start, end))
+
+    if depth == 0 and outside < len(data):
+        metadata.append((outside, len(data)))
+    offsets["metadata"] = metadata
+    return offsets
+
+
+class _LazySectionLoader:
+    r""" callable parsing a single section of a page on demand; used as the
+    loader of a 'LazyGooglePatentResponse' """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data: bytes, offsets: Dict[str, List[Tuple[int, int]]]):
+        self.data: bytes = data
+        self.offsets: Dict[str, List[Tuple[int, int]]] = offsets
+        return
+
+    def __call__(self, section: str) -> Dict[str, Any]:
+        builder: ResultPageBuilder = ResultPageBuilder([section])
+        builder.feed(b"<article itemscope>")
+        for start, end in self.offsets.get(section, ()):
+            builder.feed(self.data[start:end])
+        builder.feed(b"</article>")
+        response: GooglePatentResponse = builder.close()
+        return {
+            field: getattr(response, field)
+            for field in LazyGooglePatentResponse.LAZY_FIELDS[section]
+        }
+
+    pass # end of _LazySectionLoader
+
+
+def parse_result_page_lazy(
+    data: Union[bytes, str]
+    ) -> LazyGooglePatentResponse:
+    r""" Functional Requirement - PARSE RESULT PAGE LAZY
+    - arguments:
+        - data: html returned by the '/xhr/result' endpoint
+    - returns:
+        - an object of type 'LazyGooglePatentResponse'; the metadata is
+        parsed right away, every section on first access
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    offsets: Dict[str, List[Tuple[int, int]]] = scan_section_offsets(data)
+
+    builder: ResultPageBuilder = ResultPageBuilder(())
+    for start, end in offsets["metadata"]:
+        builder.feed(data[start:end])
+    metadata: GooglePatentResponse = builder.close()
+
+    return LazyGooglePatentResponse.fromLoader(
+        _LazySectionLoader(data, offsets),
+        **{
+            field: value for field, value in metadata
+            if field not in _LAZY_FIELD_NAMES
+        }
+    )
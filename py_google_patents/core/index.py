@@ -0,0 +1,481 @@
+r""" py_google_patents.core.index module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import bisect, collections, heapq, itertools, json, math, mmap, os, re
+
+
+# importing custom modules ====================================================
+from ..common.config import getLibraryLogger
+from ..models.response_models import GoogleParsePatentResult, \
+    GoogleParseResponse, GooglePatentResponse, PatentMetaData
+from .memo import MemoryLRUCache
+
+
+# module variables ============================================================
+MANIFEST_NAME: str = "manifest.json"
+
+MAX_PREFIX_EXPANSIONS: int = 64
+""" default number of terms a prefix query term is expanded to, at most, per
+segment; see 'PatentIndex.search' """
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+# helper definitions ==========================================================
+def tokenize(text: str) -> List[str]:
+    r""" Function - Tokenize
+    - arguments:
+        - text: free text
+    - returns:
+        - the lowercase alphanumeric words of 'text'
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def document_terms(response: GooglePatentResponse) -> collections.Counter:
+    r""" Function - Document Terms
+    - arguments:
+        - response: a parsed document
+    - returns:
+        - the term frequencies of its title, abstract and claims, of its
+        publication number (as one term, ex: 'us9145048b2') and of its CPC
+        codes, with their main group and subclass ('cpc:b60k6/20',
+        'cpc:b60k6', 'cpc:b60k')
+    """
+    terms: collections.Counter = collections.Counter(
+        tokenize(response.title)
+    )
+    terms.update(tokenize(response.abstract or ""))
+    for claim in response.claims:
+        terms.update(tokenize(claim.text))
+    if response.publication_number:
+        terms[_NON_ALPHANUMERIC.sub(
+            "", response.publication_number.lower()
+        )] += 1
+    for classification in response.classifications:
+        code: str = classification.code.lower()
+        terms.update({
+            "cpc:" + code, "cpc:" + code.split("/")[0], "cpc:" + code[:4]
+        })
+    return terms
+
+
+def _encode_postings(postings: List[Tuple[int, int]]) -> bytes:
+    # (document id, term frequency) pairs, ids delta encoded, as varints
+    encoded: bytearray = bytearray()
+    previous: int = 0
+    for document, frequency in postings:
+        for value in (document - previous, frequency):
+            while value > 0x7F:
+                encoded.append((value & 0x7F) | 0x80)
+                value >>= 7
+            encoded.append(value)
+        previous = document
+    return bytes(encoded)
+
+
+def _decode_postings(
+    buffer: Any,
+    offset: int,
+    length: int
+    ) -> List[Tuple[int, int]]:
+    data: bytes = buffer[offset:offset + length]
+    if max(data, default=0) < 0x80:
+        # every delta and frequency fits in one byte, the common case for
+        # frequent terms: decoded without a python level loop
+        return list(zip(itertools.accumulate(data[0::2]), data[1::2]))
+
+    postings: List[Tuple[int, int]] = []
+    values: List[int] = []
+    value: int = 0
+    shift: int = 0
+    document: int = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+        if len(values) == 2:
+            document += values[0]
+            postings.append((document, values[1]))
+            values.clear()
+    return postings
+
+
+# class definitions ===========================================================
+class _Segment:
+    r""" an immutable part of the index: the documents added between two
+    commits, their term dictionary and their memory-mapped postings """
+
+
+    def __init__(self, directory: str, name: str, base: int):
+        self.name: str = name
+        self.base: int = base
+        """ global id of the segment's first document """
+        path: str = os.path.join(directory, name)
+        with open(path + ".terms.json", "r", encoding="utf-8") as file:
+            self.terms: Dict[str, List[int]] = json.load(file)
+            """ [offset, length, document frequency] of a term's postings """
+        with open(path + ".docs.json", "r", encoding="utf-8") as file:
+            self.documents: List[List[str]] = json.load(file)
+            """ [id, number, title] of the documents, by local id """
+        self.sorted_terms: List[str] = sorted(self.terms)
+        with open(path + ".postings", "rb") as file:
+            self.postings: mmap.mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return
+
+
+    def expand(
+        self,
+        prefix: str,
+        limit: Optional[int] = MAX_PREFIX_EXPANSIONS
+        ) -> Tuple[List[str], bool]:
+        # the terms starting with 'prefix', up to 'limit' of them, and
+        # whether more were left out
+        start: int = bisect.bisect_left(self.sorted_terms, prefix)
+        end: Optional[int] = None if limit is None else start + limit + 1
+        terms: List[str] = []
+        for term in itertools.islice(self.sorted_terms, start, end):
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if limit is not None and len(terms) > limit:
+            return terms[:limit], True
+        return terms, False
+
+
+    def read(self, term: str) -> List[Tuple[int, int]]:
+        entry: Optional[List[int]] = self.terms.get(term)
+        if entry is None:
+            return []
+        return _decode_postings(self.postings, entry[0], entry[1])
+
+
+    def close(self) -> None:
+        self.postings.close()
+        return None
+
+
+    pass # end of _Segment
+
+
+# -----------------------------------------------------------------------------
+class PatentIndex:
+    r""" class implementing an embeddable on-disk inverted index over parsed
+    'GooglePatentResponse' objects, answering '/xhr/parse' style lookups
+    locally
+
+    - usage:
+        with PatentIndex("index/") as index:
+            index.add(response)
+            index.commit()
+            index.searchResponse("hybrid engine")
+
+    - notes:
+        - documents are added to an in-memory buffer; 'commit' writes them as
+        a new segment and atomically updates the manifest, so readers only
+        ever see whole segments
+        - posting lists are delta and varint encoded and read through 'mmap'
+        - a document (by publication number) is indexed once; later 'add'
+        calls for it are ignored
+        - one writer at a time; an index opened elsewhere sees new segments
+        after 'reload'
+        - results of recent searches are cached until the next 'commit' or
+        'reload', and must be treated as read-only
+    """
+
+
+    def __init__(self, directory: str, cache_size: int = 1024):
+        r""" Constructor
+        - arguments:
+            - directory: the index directory; created if missing
+            - cache_size: number of search results kept; 0 disables caching
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory: str = directory
+        self._results: MemoryLRUCache = MemoryLRUCache(cache_size, ttl=None)
+        self._segments: List[_Segment] = []
+        self._numbers: Set[str] = set()
+        self._buffer: List[Tuple[List[str], collections.Counter]] = []
+        self.reload()
+        return
+
+
+    def __enter__(self) -> "PatentIndex":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def __len__(self) -> int:
+        r""" number of committed documents """
+        return sum(len(segment.documents) for segment in self._segments)
+
+
+    def reload(self) -> None:
+        r""" Instance Method - Reload
+        - arguments:
+        - returns:
+        - notes:
+            - opens the segments listed in the manifest; uncommitted
+            documents are kept
+        """
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+        self._results.clear()
+        self._numbers = {document[1] for document, _ in self._buffer}
+        path: str = os.path.join(self._directory, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            names: List[str] = json.load(file)["segments"]
+        base: int = 0
+        for name in names:
+            segment: _Segment = _Segment(self._directory, name, base)
+            self._segments.append(segment)
+            self._numbers.update(number for _, number, _ in segment.documents)
+            base += len(segment.documents)
+        return None
+
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+        return None
+
+
+    def add(
+        self,
+        response: GooglePatentResponse,
+        id_url: Optional[str] = None
+        ) -> bool:
+        r""" Instance Method - Add
+        - arguments:
+            - response: a parsed document; lazy responses are parsed
+            - id_url: the document's url, returned by searches; ex:
+            'patent/US9145048B2/en'; built from the publication number, in
+            english, when omitted
+        - returns:
+            - False if a document with the same publication number is already
+            indexed, or has no publication number
+        - notes:
+            - the document is searchable after the next 'commit'
+        """
+        number: Optional[str] = response.publication_number
+        if not number or number in self._numbers:
+            return False
+        self._numbers.add(number)
+        self._buffer.append((
+            [id_url or "patent/{}/en".format(number), number, response.title],
+            document_terms(response)
+        ))
+        return True
+
+
+    def addMany(self, responses: Iterable[GooglePatentResponse]) -> int:
+        return sum(self.add(response) for response in responses)
+
+
+    def commit(self) -> None:
+        r""" Instance Method - Commit
+        - arguments:
+        - returns:
+        - notes:
+            - writes the buffered documents as a new segment; a no-op when
+            nothing was added
+        """
+        if not self._buffer:
+            return None
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for local_id, (_, terms) in enumerate(self._buffer):
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append((local_id, frequency))
+
+        name: str = "segment-{:06d}".format(
+            int(self._segments[-1].name.rsplit("-", 1)[1]) + 1
+            if self._segments else 1
+        )
+        path: str = os.path.join(self._directory, name)
+        dictionary: Dict[str, List[int]] = {}
+        with open(path + ".postings", "wb") as file:
+            for term in sorted(postings):
+                encoded: bytes = _encode_postings(postings[term])
+                dictionary[term] = [
+                    file.tell(), len(encoded), len(postings[term])
+                ]
+                file.write(encoded)
+        with open(path + ".terms.json", "w", encoding="utf-8") as file:
+            json.dump(dictionary, file, ensure_ascii=False)
+        with open(path + ".docs.json", "w", encoding="utf-8") as file:
+            json.dump(
+                [document for document, _ in self._buffer], file,
+                ensure_ascii=False
+            )
+
+        # the manifest is replaced last: a crash leaves unlisted files only
+        manifest: str = os.path.join(self._directory, MANIFEST_NAME)
+        with open(manifest + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"segments": [
+                segment.name for segment in self._segments
+            ] + [name]}, file)
+        os.replace(manifest + ".tmp", manifest)
+
+        self._segments.append(
+            _Segment(self._directory, name, len(self))
+        )
+        self._buffer.clear()
+        self._results.clear()
+        return None
+
+
+    def search(
+        self,
+        text: str,
+        limit: int = 10,
+        prefix: bool = True,
+        max_expansions: Optional[int] = MAX_PREFIX_EXPANSIONS
+        ) -> List[PatentMetaData]:
+        r""" Instance Method - Search
+        - arguments:
+            - text: the query; words are matched with AND, ex: 'hybrid
+            engine', 'cpc:b60k', 'us9145048'
+            - limit: maximum number of results
+            - prefix: if True, the last word also matches the terms it is a
+            prefix of, as in a search box
+            - max_expansions: terms the last word is expanded to, at most,
+            per segment (in term order); None expands to every term
+        - returns:
+            - a list of 'PatentMetaData' objects, best match first
+        - notes:
+            - documents are ranked by the sum, over the query words, of
+            (1 + log tf) * idf
+            - a prefix matching more than 'max_expansions' terms only matches
+            the documents of the first ones; this is logged as a warning
+        """
+        words: List[str] = []
+        for word in text.lower().split():
+            words.extend([word] if word.startswith("cpc:") else tokenize(word))
+        if not words or not self._segments:
+            return []
+        key: Tuple = (tuple(words), limit, prefix, max_expansions)
+        cached: Optional[List[PatentMetaData]] = self._results.get(key)
+        if cached is not None:
+            return list(cached)
+
+        total: int = len(self)
+        scores: Dict[int, float] = {}
+        for position, word in enumerate(words):
+            expand: bool = prefix and position == len(words) - 1
+            matches: Dict[int, float] = {}
+            truncated: bool = False
+            expansions: List[List[str]] = []
+            for segment in self._segments:
+                terms: List[str] = [word]
+                if expand:
+                    terms, cut = segment.expand(word, max_expansions)
+                    truncated = truncated or cut
+                expansions.append(terms)
+            # the document frequency of a term spans every segment, so that
+            # the ranking does not depend on how commits split the documents
+            frequencies: Dict[str, int] = {}
+            for term in set(itertools.chain.from_iterable(expansions)):
+                frequencies[term] = sum(
+                    segment.terms[term][2] for segment in self._segments
+                    if term in segment.terms
+                )
+            for segment, terms in zip(self._segments, expansions):
+                for term in terms:
+                    entry: Optional[List[int]] = segment.terms.get(term)
+                    if entry is None:
+                        continue
+                    idf: float = math.log(1 + total / frequencies[term])
+                    weights: Dict[int, float] = {}
+                    for document, frequency in segment.read(term):
+                        weight: Optional[float] = weights.get(frequency)
+                        if weight is None:
+                            weight = weights[frequency] = \
+                                (1 + math.log(frequency)) * idf
+                        document += segment.base
+                        matches[document] = matches.get(document, 0.0) \
+                            + weight
+            if truncated:
+                getLibraryLogger().warning(
+                    "prefix %r matches more than %d terms in a segment; "
+                    "results are incomplete, raise 'max_expansions'",
+                    word, max_expansions
+                )
+            if position == 0:
+                scores = matches
+            else:
+                scores = {
+                    document: score + matches[document]
+                    for document, score in scores.items()
+                    if document in matches
+                }
+            if not scores:
+                break
+
+        best: List[int] = heapq.nsmallest(
+            limit, scores, key=lambda document: (-scores[document], document)
+        )
+        bases: List[int] = [segment.base for segment in self._segments]
+        results: List[PatentMetaData] = [
+            self._metadata(document, bases) for document in best
+        ]
+        self._results.put(key, results)
+        return list(results)
+
+
+    def _metadata(self, document: int, bases: List[int]) -> PatentMetaData:
+        # 'bases' holds the segments' first global ids, in order
+        index: int = bisect.bisect_right(bases, document) - 1
+        segment: _Segment = self._segments[index]
+        id_url, number, title = segment.documents[document - segment.base]
+        return PatentMetaData.construct(id=id_url, number=number, title=title)
+
+
+    def searchResponse(
+        self,
+        text: str,
+        limit: int = 10,
+        prefix: bool = True,
+        max_expansions: Optional[int] = MAX_PREFIX_EXPANSIONS
+        ) -> GoogleParseResponse:
+        r""" Instance Method - Search Response
+        - arguments:
+            - text, limit, prefix, max_expansions: see 'search'
+        - returns:
+            - the results as a 'GoogleParseResponse', as returned by
+            'getTextRecommendations' for a patent list;
+            'error_no_patents_found' is set when nothing matched
+        """
+        results: List[PatentMetaData] = self.search(
+            text, limit, prefix, max_expansions
+        )
+        if not results:
+            return GoogleParseResponse.construct(
+                error_no_patents_found=True, results=None
+            )
+        return GoogleParseResponse.construct(
+            error_no_patents_found=False,
+            results=[
+                GoogleParsePatentResult.construct(result=result)
+                for result in results
+            ]
+        )
+
+
+    pass # end of PatentIndex
@@ -0,0 +1,183 @@
+r""" py_google_patents.core.memo module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, \
+    Tuple, TypeVar
+from collections import OrderedDict
+import asyncio, threading, time, weakref
+
+
+# module variables ============================================================
+_T = TypeVar("_T")
+
+
+# class definitions ===========================================================
+class MemoryLRUCache:
+    r""" class implementing an in-memory LRU cache whose entries expire
+    'ttl' seconds after being stored; meant to be used from coroutines running
+    on one or more event loops of a single process
+
+    - notes:
+        - safe to share between threads, ex: a 'SyncClient' loop thread and
+        the callers' own loops
+        - the cache holds references to the stored objects, callers must
+        treat returned values as read-only
+    """
+
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic
+        ):
+        r""" Constructor
+        - arguments:
+            - maxsize: maximum number of entries; least recently used entries
+            are dropped past it
+            - ttl: seconds an entry stays valid; None never expires
+            - clock: a monotonic clock, returning seconds
+        """
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._clock: Callable[[], float] = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = \
+            OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        return
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        r""" Instance Method - Get
+        - arguments:
+            - key: a hashable key
+            - default: value returned on a miss
+        - returns:
+            - the stored value, or 'default' if absent or expired
+        """
+        with self._lock:
+            entry: Optional[Tuple[float, Any]] = self._entries.get(key)
+            if entry is None or (
+                self.ttl is not None and self._clock() - entry[0] > self.ttl
+                ):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+
+    def put(self, key: Hashable, value: Any) -> None:
+        r""" Instance Method - Put
+        - arguments:
+            - key: a hashable key
+            - value: the value to store
+        - returns:
+        """
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return None
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        return None
+
+
+    pass # end of MemoryLRUCache
+
+
+# -----------------------------------------------------------------------------
+class SingleFlight:
+    r""" class coalescing concurrent calls made with the same key: while a
+    call for a key is in flight, later callers await its outcome (result or
+    exception) instead of starting their own
+
+    - notes:
+        - in-flight calls are tracked per event loop
+        - a caller being cancelled does not cancel the shared call while other
+        callers are still waiting on it; the last one does
+        - the outcome of a call is always retrieved, so that a call left
+        without callers never logs 'Task exception was never retrieved'
+    """
+
+
+    def __init__(self):
+        self._flights: weakref.WeakKeyDictionary = \
+            weakref.WeakKeyDictionary()
+        """ maps an event loop to the [task, waiters] in flight on it, by key
+        """
+        self.coalesced: int = 0
+        return
+
+
+    def inFlight(self) -> int:
+        r""" Instance Method - In Flight
+        - returns:
+            - number of calls currently in flight on the running loop
+        """
+        return len(self._flights.get(asyncio.get_running_loop(), ()))
+
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[_T]]
+        ) -> _T:
+        r""" Instance Method - Do
+        - arguments:
+            - key: a hashable key identifying the call
+            - func: a coroutine function (without arguments) performing the
+            call; only invoked if no call for 'key' is in flight
+        - returns:
+            - the value returned by the shared call
+        - raises:
+            - the exception raised by the shared call
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        flights: Dict[Hashable, list] = self._flights.setdefault(loop, {})
+        flight: Optional[list] = flights.get(key)
+        if flight is None:
+            task: asyncio.Task = loop.create_task(func())
+            flight = flights[key] = [task, 0]
+
+            def _done(done: asyncio.Task, flight: list = flight) -> None:
+                if flights.get(key) is flight:
+                    del flights[key]
+                if not done.cancelled():
+                    done.exception()    # marks the exception as retrieved
+                return None
+
+            task.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        except asyncio.CancelledError:
+            if flight[1] == 1 and not flight[0].done():
+                # the last caller is gone: nobody needs the call anymore
+                if flights.get(key) is flight:
+                    del flights[key]
+                flight[0].cancel()
+            raise
+        finally:
+            flight[1] -= 1
+
+
+    pass # end of SingleFlight
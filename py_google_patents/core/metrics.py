@@ -0,0 +1,494 @@
+r""" py_google_patents.core.metrics module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import bisect, math, threading, time, types
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+# module variables ============================================================
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0, 30.0
+)
+""" upper bounds, in seconds, of the histogram buckets """
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+_DEFAULT_METRICS: Optional["MetricsRecorder"] = None
+_DEFAULT_METRICS_LOCK: threading.Lock = threading.Lock()
+
+
+# class definitions ===========================================================
+class MetricsRecorder:
+    r""" class defining the metrics interface; this base implementation
+    discards everything and is the default, so that instrumentation costs a
+    single attribute check when metrics are disabled
+
+    - notes:
+        - sub-classes set 'enabled' to True and override 'observe' (durations
+        and sizes, aggregated as histograms), 'increment' (counters) and
+        'gauge' (values that go up and down, only the last one is kept)
+        - 'observe', 'increment' and 'gauge' may be called from worker
+        threads
+        - names follow the prometheus conventions: '*_seconds' histograms and
+        '*_total' counters; label values are strings
+    """
+
+
+    enabled: bool = False
+
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        return None
+
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        return None
+
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        return None
+
+
+    pass # end of MetricsRecorder
+
+
+# -----------------------------------------------------------------------------
+class CallbackMetrics(MetricsRecorder):
+    r""" class forwarding every observation to a callable, ex: to feed an
+    existing statsd or opentelemetry client
+
+    - notes:
+        - the callback receives ('observe', 'increment' or 'gauge', name,
+        value, labels) and must be cheap and thread-safe
+    """
+
+
+    enabled: bool = True
+
+
+    def __init__(
+        self,
+        callback: Callable[[str, str, float, Dict[str, str]], Any]
+        ):
+        r""" Constructor
+        - arguments:
+            - callback: the callable receiving every observation
+        """
+        self._callback: Callable[
+            [str, str, float, Dict[str, str]], Any
+        ] = callback
+        return
+
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._callback("observe", name, value, labels)
+        return None
+
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        self._callback("increment", name, value, labels)
+        return None
+
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        self._callback("gauge", name, value, labels)
+        return None
+
+
+    pass # end of CallbackMetrics
+
+
+# -----------------------------------------------------------------------------
+class Histogram:
+    r""" class counting observations into fixed buckets, keeping their count,
+    sum, minimum and maximum """
+
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        """ per-bucket counts; the last one counts values past every bound """
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        return
+
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        return None
+
+
+    def quantile(self, q: float) -> float:
+        r""" Instance Method - Quantile
+        - arguments:
+            - q: the quantile, in [0, 1]
+        - returns:
+            - an estimate of the quantile, interpolated linearly inside its
+            bucket and clamped to the observed minimum and maximum; nan if
+            nothing was observed
+        """
+        if not self.count:
+            return math.nan
+        rank: float = q * self.count
+        seen: int = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower: float = self.buckets[index - 1] if index else self.min
+                upper: float = self.buckets[index] \
+                    if index < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else math.nan,
+            "max": self.max if self.count else math.nan,
+            "mean": self.sum / self.count if self.count else math.nan,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+    pass # end of Histogram
+
+
+# -----------------------------------------------------------------------------
+class InMemoryMetrics(MetricsRecorder):
+    r""" class aggregating observations in memory, as one histogram, counter
+    or gauge per name and label set
+
+    - usage:
+        metrics = InMemoryMetrics()
+        async with AsyncNetworkClient(metrics=metrics) as client:
+            ...
+        print(metrics.toPrometheus())
+    """
+
+
+    enabled: bool = True
+
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        r""" Constructor
+        - arguments:
+            - buckets: upper bounds of the histogram buckets
+        """
+        self.buckets: Tuple[float, ...] = buckets
+        self._histograms: Dict[Tuple[str, _Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, _Labels], float] = {}
+        self._gauges: Dict[Tuple[str, _Labels], float] = {}
+        self._lock: threading.Lock = threading.Lock()
+        return
+
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key: Tuple[str, _Labels] = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram: Optional[Histogram] = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+        return None
+
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key: Tuple[str, _Labels] = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        return None
+
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        key: Tuple[str, _Labels] = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+        return None
+
+
+    def getHistogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+
+    def getCounter(self, name: str, **labels: str) -> float:
+        r""" Instance Method - Get Counter
+        - arguments:
+            - name: name of the counter
+            - labels: labels to match; the values of every label set
+            containing them are summed
+        - returns:
+            - the counter value; 0 if never incremented
+        """
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(
+                value for (counter, key), value in self._counters.items()
+                if counter == name and wanted.issubset(key)
+            )
+
+
+    def getGauge(self, name: str, **labels: str) -> Optional[float]:
+        return self._gauges.get((name, tuple(sorted(labels.items()))))
+
+
+    def snapshot(self) -> Dict[str, Any]:
+        r""" Instance Method - Snapshot
+        - returns:
+            - a json-serializable 'dict' with a summary of every histogram
+            and the value of every counter and gauge, as lists of
+            {"name", "labels", ...} objects
+        """
+        with self._lock:
+            return {
+                "histograms": [
+                    dict(name=name, labels=dict(labels), **histogram.summary())
+                    for (name, labels), histogram
+                    in sorted(self._histograms.items())
+                ],
+                "counters": [
+                    dict(name=name, labels=dict(labels), value=value)
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "gauges": [
+                    dict(name=name, labels=dict(labels), value=value)
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+            }
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+        return None
+
+
+    def toPrometheus(self, prefix: str = "py_google_patents_") -> str:
+        r""" Instance Method - To Prometheus
+        - arguments:
+            - prefix: prepended to every metric name
+        - returns:
+            - the metrics in the prometheus text exposition format
+        """
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        typed: set = set()
+        for (name, labels), histogram in histograms:
+            name = prefix + name
+            if name not in typed:
+                typed.add(name)
+                lines.append("# TYPE {} histogram".format(name))
+            cumulative: int = 0
+            for bound, count in zip(
+                self.buckets + (math.inf,), histogram.counts
+                ):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    name, _format_labels(labels + (
+                        ("le", "+Inf" if bound == math.inf else repr(bound)),
+                    )), cumulative
+                ))
+            lines.append("{}_sum{} {!r}".format(
+                name, _format_labels(labels), histogram.sum
+            ))
+            lines.append("{}_count{} {}".format(
+                name, _format_labels(labels), histogram.count
+            ))
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in values:
+                name = prefix + name
+                if name not in typed:
+                    typed.add(name)
+                    lines.append("# TYPE {} {}".format(name, kind))
+                lines.append("{}{} {!r}".format(
+                    name, _format_labels(labels), value
+                ))
+        return "\n".join(lines) + "\n"
+
+
+    pass # end of InMemoryMetrics
+
+
+# helper definitions ==========================================================
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    return "{{{}}}".format(",".join(
+        '{}="{}"'.format(
+            key, str(value).replace("\\", "\\\\").replace('"', '\\"')\
+                .replace("\n", "\\n")
+        ) for key, value in labels
+    ))
+
+
+# method definitions ==========================================================
+def get_metrics() -> MetricsRecorder:
+    r""" Functional Requirement - GET METRICS
+    - arguments:
+    - returns:
+        - the process-wide 'MetricsRecorder' used when none is given; a
+        disabled 'MetricsRecorder' unless 'set_metrics' was called
+    """
+    global _DEFAULT_METRICS
+    if _DEFAULT_METRICS is None:
+        with _DEFAULT_METRICS_LOCK:
+            if _DEFAULT_METRICS is None:
+                _DEFAULT_METRICS = MetricsRecorder()
+    return _DEFAULT_METRICS
+
+
+def set_metrics(metrics: Optional[MetricsRecorder]) -> None:
+    r""" Functional Requirement - SET METRICS
+    - arguments:
+        - metrics: the 'MetricsRecorder' to use when none is given; None
+        disables metrics
+    - returns:
+    - notes:
+        - clients read the default when they are opened; parse timings are
+        recorded to the default of the process the parsing runs in
+    """
+    global _DEFAULT_METRICS
+    with _DEFAULT_METRICS_LOCK:
+        _DEFAULT_METRICS = metrics
+    return None
+
+
+def create_trace_config(metrics: MetricsRecorder) -> "aiohttp.TraceConfig":
+    r""" Functional Requirement - CREATE TRACE CONFIG
+    - arguments:
+        - metrics: the 'MetricsRecorder' the timings are sent to
+    - returns:
+        - an 'aiohttp.TraceConfig' timing the phases of every request, with
+        an 'endpoint' label holding the url path:
+            - http_queue_seconds: wait for a free connection of the pool
+            - http_dns_seconds: host name resolution (absent when cached)
+            - http_connect_seconds: tcp connection, including the tls
+            handshake, which aiohttp does not report separately
+            - http_ttfb_seconds: from sending the request to receiving the
+            response headers, including the phases above
+        - and counting:
+            - http_responses_total: responses, by 'status'
+            - http_request_errors_total: failed requests, by 'error' type
+            - http_connections_reused_total: requests sent on a pooled
+            connection
+            - http_response_bytes_total: body bytes received
+    """
+    # only imported once a client opens a traced session
+    import aiohttp
+
+    clock: Callable[[], float] = time.perf_counter
+    trace_config: aiohttp.TraceConfig = aiohttp.TraceConfig()
+
+    async def on_request_start(
+        session: "aiohttp.ClientSession",
+        context: types.SimpleNamespace,
+        params: "aiohttp.TraceRequestStartParams"
+        ) -> None:
+        context.endpoint = params.url.path
+        context.started = clock()
+        return None
+
+    def _started(attribute: str) -> Callable:
+        async def _handler(session, context, params) -> None:
+            setattr(context, attribute, clock())
+            return None
+        return _handler
+
+    def _ended(attribute: str, name: str) -> Callable:
+        async def _handler(session, context, params) -> None:
+            started: Optional[float] = getattr(context, attribute, None)
+            if started is not None:
+                metrics.observe(
+                    name, clock() - started,
+                    endpoint=getattr(context, "endpoint", "")
+                )
+            return None
+        return _handler
+
+    async def on_request_end(
+        session: "aiohttp.ClientSession",
+        context: types.SimpleNamespace,
+        params: "aiohttp.TraceRequestEndParams"
+        ) -> None:
+        metrics.observe(
+            "http_ttfb_seconds", clock() - context.started,
+            endpoint=context.endpoint
+        )
+        metrics.increment(
+            "http_responses_total", endpoint=context.endpoint,
+            status=str(params.response.status)
+        )
+        return None
+
+    async def on_request_exception(
+        session: "aiohttp.ClientSession",
+        context: types.SimpleNamespace,
+        params: "aiohttp.TraceRequestExceptionParams"
+        ) -> None:
+        metrics.increment(
+            "http_request_errors_total", endpoint=context.endpoint,
+            error=type(params.exception).__name__
+        )
+        return None
+
+    async def on_connection_reuseconn(
+        session: "aiohttp.ClientSession",
+        context: types.SimpleNamespace,
+        params: "aiohttp.TraceConnectionReuseconnParams"
+        ) -> None:
+        metrics.increment(
+            "http_connections_reused_total", endpoint=context.endpoint
+        )
+        return None
+
+    async def on_response_chunk_received(
+        session: "aiohttp.ClientSession",
+        context: types.SimpleNamespace,
+        params: "aiohttp.TraceResponseChunkReceivedParams"
+        ) -> None:
+        metrics.increment(
+            "http_response_bytes_total", len(params.chunk),
+            endpoint=context.endpoint
+        )
+        return None
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_connection_queued_start.append(_started("queued"))
+    trace_config.on_connection_queued_end.append(
+        _ended("queued", "http_queue_seconds")
+    )
+    trace_config.on_dns_resolvehost_start.append(_started("resolving"))
+    trace_config.on_dns_resolvehost_end.append(
+        _ended("resolving", "http_dns_seconds")
+    )
+    trace_config.on_connection_create_start.append(_started("connecting"))
+    trace_config.on_connection_create_end.append(
+        _ended("connecting", "http_connect_seconds")
+    )
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    trace_config.freeze()
+    return trace_config
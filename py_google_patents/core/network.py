@@ -2,8 +2,9 @@ r""" py_google_patents.core.network module """
 
 
 # importing standard modules ==================================================
-from typing import Dict, Union, Any
-import urllib
+from typing import Dict, Union, Any, Optional, Callable, Awaitable, TypeVar, \
+    NamedTuple
+import urllib.parse, asyncio, logging, time
 
 
 # importing third-party modules ===============================================
@@ -13,25 +14,40 @@ from yarl import URL
 
 # importing custom modules ====================================================
 from ..common.config import getLibraryLogger
+from ..common.error import CacheMissError
+from ..common.serialization import loads
+from .throttle import TokenBucketRateLimiter, RetryPolicy, \
+    AdaptiveConcurrencyLimiter
+from .cache import DiskResponseCache
+from .metrics import MetricsRecorder, get_metrics, create_trace_config
 
 
 # module variables ============================================================
 GOOGLE_PATENTS_BASE_URL: str = "https://patents.google.com"
 
+STREAM_CHUNK_SIZE: int = 64 * 1024
+""" bytes read from the response stream at a time """
 
-# method definitions ==========================================================
-async def http_get_parse_endpoint_response(text: str) -> Dict[str, Any]:
-    r""" Functional Requirement - HTTP GET PARSE ENDPOINT RESPONSE
+_T = TypeVar("_T")
+
+
+# helper definitions ==========================================================
+def build_parse_endpoint_url(
+    text: str,
+    base_url: str = GOOGLE_PATENTS_BASE_URL
+    ) -> URL:
+    r""" Functional Requirement - BUILD PARSE ENDPOINT URL
     - arguments:
         - text: a string containing the query to be made to 'patents.google.com'
+        - base_url: scheme and host of the remote server
     - returns:
-        - a 'dict' object representing json returned by the '/xhr/parse' endpoint
+        - an encoded 'yarl.URL' object pointing to the '/xhr/parse' endpoint
     - raises:
     - notes:
     """
 
     _cursor: int = len(text)
-    """ a url paramenter that needs to be sent. 
+    """ a url paramenter that needs to be sent.
     The cursor value gives an indication of the length of the text being
     sent to the remote server.
     """
@@ -42,84 +58,725 @@ async def http_get_parse_endpoint_response(text: str) -> Dict[str, Any]:
         "exp": ""
     }
 
-    _data: Dict[str, Any] = None
+    return URL(
+        "{}{}{}".format(
+            base_url, "/xhr/parse?",
+            urllib.parse.urlencode(
+                _params, safe="()", quote_via=urllib.parse.quote
+            )
+        ),
+        encoded=True
+    )
+
+
+def build_result_endpoint_url(
+    id_url: str,
+    base_url: str = GOOGLE_PATENTS_BASE_URL
+    ) -> URL:
+    r""" Functional Requirement - BUILD RESULT ENDPOINT URL
+    - arguments:
+        - id_url: a string containing the url of the patent to be extracted
+        from 'patents.google.com'
+            - examples:
+                - 'patent/WO2022109623A1/fr'
+                - 'patent/<number>/<lang code>'
+        - base_url: scheme and host of the remote server
+    - returns:
+        - an encoded 'yarl.URL' object pointing to the '/xhr/result' endpoint
+    - raises:
+    - notes:
+    """
+
+    _params: Dict = {
+        "id": id_url,
+        "exp": ""
+    }
+
+    return URL(
+        "{}{}{}".format(
+            base_url, "/xhr/result?",
+            urllib.parse.urlencode(
+                _params, safe="", quote_via=urllib.parse.quote
+            )
+        ),
+        encoded=True
+    )
+
+
+def build_query_endpoint_url(
+    query_url: str,
+    page: int = 0,
+    page_size: Optional[int] = None,
+    base_url: str = GOOGLE_PATENTS_BASE_URL
+    ) -> URL:
+    r""" Functional Requirement - BUILD QUERY ENDPOINT URL
+    - arguments:
+        - query_url: the search parameters, as in
+        'GoogleParseQueryResult.query_url'; ex: 'q=(hybrid+AND+engine)'
+        - page: index of the page of results, from 0
+        - page_size: results per page; the server's default (10) when
+        omitted
+        - base_url: scheme and host of the remote server
+    - returns:
+        - an encoded 'yarl.URL' object pointing to the '/xhr/query' endpoint
+    - raises:
+    - notes:
+        - the search parameters travel url-encoded inside the 'url'
+        parameter, with the page and page size appended to them
+    """
+
+    if page_size is not None:
+        query_url += "&num={}".format(page_size)
+    if page:
+        query_url += "&page={}".format(page)
+
+    _params: Dict = {
+        "url": query_url,
+        "exp": "",
+        "tags": ""
+    }
+
+    return URL(
+        "{}{}{}".format(
+            base_url, "/xhr/query?",
+            urllib.parse.urlencode(
+                _params, safe="()", quote_via=urllib.parse.quote
+            )
+        ),
+        encoded=True
+    )
 
-    try:
-        async with aiohttp.ClientSession(GOOGLE_PATENTS_BASE_URL) as session:
-            async with session.get(
-                "/xhr/parse", allow_redirects=False, params=_params
-                ) as response:
 
-                response.raise_for_status()
-                _data = await response.json()
-    
-    except aiohttp.client_exceptions.ClientConnectorError as error:
-        # caused by socket.gaierror
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
+# class definitions ===========================================================
+class ConditionalResponse(NamedTuple):
+    r""" outcome of 'AsyncNetworkClient.fetchConditional' """
 
-    except aiohttp.client_exceptions.ClientConnectionError as error:
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
+    status: int
+    body: Optional[bytes]
+    """ the response body; None for a 304 Not Modified """
 
-    except aiohttp.client_exceptions.ClientResponseError as error:
-        # handles or catches exceptions raises from the line 'response.raise_for_status()'
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
+    etag: Optional[str]
+    last_modified: Optional[str]
 
-    return _data
+    pass # end of ConditionalResponse
 
 
 # -----------------------------------------------------------------------------
-async def http_get_result_endpoint_response(id_url: str) -> str:
+class AsyncNetworkClient:
+    r""" class owning a single, long-lived 'aiohttp.ClientSession' (and its
+    tuned 'aiohttp.TCPConnector') that is shared by every request sent to
+    'patents.google.com'; connections are kept alive and reused between
+    requests instead of paying DNS, TCP and TLS setup on every call
+
+    - usage:
+        async with AsyncNetworkClient() as client:
+            await getPatentData("patent/US9145048B2/en", client=client)
+    """
+
+
+    def __init__(
+        self,
+        base_url: str = GOOGLE_PATENTS_BASE_URL,
+        limit: int = 100,
+        limit_per_host: int = 16,
+        ttl_dns_cache: Optional[int] = 300,
+        keepalive_timeout: float = 30.0,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[DiskResponseCache] = None,
+        connector_factory: Optional[Callable[[], aiohttp.BaseConnector]] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        ):
+        r""" Constructor
+        - arguments:
+            - base_url: scheme and host of the remote server
+            - limit: total number of simultaneous connections in the pool
+            - limit_per_host: number of simultaneous connections to one host
+            - ttl_dns_cache: seconds a resolved address is cached for; 'None'
+            caches forever
+            - keepalive_timeout: seconds an idle connection is kept open for
+            - timeout: an 'aiohttp.ClientTimeout' applied to every request
+            - session: an externally owned 'aiohttp.ClientSession'; when
+            given, the client neither creates nor closes a session
+            - rate_limiter: a 'TokenBucketRateLimiter' every request waits on;
+            requests are not throttled when omitted
+            - retry_policy: a 'RetryPolicy' applied to failed requests; a
+            default 'RetryPolicy()' is used when omitted, pass
+            'RetryPolicy.disabled()' to turn retries off
+            - cache: a 'DiskResponseCache' consulted before the network and
+            filled with every fetched response body
+            - connector_factory: a callable returning the
+            'aiohttp.BaseConnector' (the transport) of the pooled session, ex:
+            an 'aiohttp.UnixConnector' to a local replay server; the pool
+            options above only apply to the default 'aiohttp.TCPConnector'
+            - metrics: a 'MetricsRecorder' receiving request phase timings,
+            retry, cache and byte counters; the process-wide default (see
+            'set_metrics') when omitted. Phase timings are only recorded on
+            sessions created by the client
+            - concurrency_limiter: an 'AdaptiveConcurrencyLimiter' bounding
+            the requests in flight; its limit and the requests in flight are
+            reported as the 'concurrency_limit' and 'requests_in_flight'
+            gauges. Only 'limit' and 'limit_per_host' bound them when omitted
+        """
+        self._base_url: str = base_url
+        self._limit: int = limit
+        self._limit_per_host: int = limit_per_host
+        self._ttl_dns_cache: Optional[int] = ttl_dns_cache
+        self._keepalive_timeout: float = keepalive_timeout
+        self._timeout: aiohttp.ClientTimeout = timeout \
+            if timeout is not None \
+                else aiohttp.ClientTimeout(total=60, sock_connect=15)
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session: bool = session is None
+        self._rate_limiter: Optional[TokenBucketRateLimiter] = rate_limiter
+        self._concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = \
+            concurrency_limiter
+        self._retry_policy: RetryPolicy = retry_policy \
+            if retry_policy is not None \
+                else RetryPolicy()
+        self._cache: Optional[DiskResponseCache] = cache
+        self._connector_factory: Optional[
+            Callable[[], aiohttp.BaseConnector]
+        ] = connector_factory
+        self._metrics: Optional[MetricsRecorder] = metrics
+        return
+
+
+    async def __aenter__(self) -> "AsyncNetworkClient":
+        return await self.open()
+
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+        return None
+
+
+    def getBaseUrl(self) -> str:
+        return self._base_url
+
+
+    def getRateLimiter(self) -> Optional[TokenBucketRateLimiter]:
+        return self._rate_limiter
+
+
+    def getConcurrencyLimiter(self) -> Optional[AdaptiveConcurrencyLimiter]:
+        return self._concurrency_limiter
+
+
+    def getRetryPolicy(self) -> RetryPolicy:
+        return self._retry_policy
+
+
+    def getCache(self) -> Optional[DiskResponseCache]:
+        return self._cache
+
+
+    def getMetrics(self) -> MetricsRecorder:
+        return self._metrics if self._metrics is not None else get_metrics()
+
+
+    def isClosed(self) -> bool:
+        return self._session is None or self._session.closed
+
+
+    async def open(self) -> "AsyncNetworkClient":
+        r""" Instance Method - Open
+        - arguments:
+        - returns:
+            - the client itself, with its pooled session created
+        - raises:
+        - notes:
+            - must be awaited from within the event loop the client will be
+            used on; calling it on an open client is a no-op
+        """
+        if self.isClosed():
+            connector: aiohttp.BaseConnector = self._connector_factory() \
+                if self._connector_factory is not None \
+                    else aiohttp.TCPConnector(
+                        limit=self._limit,
+                        limit_per_host=self._limit_per_host,
+                        ttl_dns_cache=self._ttl_dns_cache,
+                        use_dns_cache=True,
+                        keepalive_timeout=self._keepalive_timeout,
+                        enable_cleanup_closed=True
+                    )
+            metrics: MetricsRecorder = self.getMetrics()
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self._timeout,
+                trace_configs=[create_trace_config(metrics)] \
+                    if metrics.enabled else None
+            )
+            self._owns_session = True
+        return self
+
+
+    async def close(self) -> None:
+        r""" Instance Method - Close
+        - arguments:
+        - returns:
+        - raises:
+        - notes:
+            - closes the pooled session, only if it is owned by the client
+        """
+        if self._owns_session and not self.isClosed():
+            await self._session.close()
+        self._session = None
+        return None
+
+
+    async def getSession(self) -> aiohttp.ClientSession:
+        r""" Instance Method - Get Session
+        - arguments:
+        - returns:
+            - the pooled 'aiohttp.ClientSession', opening it on first use
+        """
+        if self.isClosed():
+            await self.open()
+        return self._session
+
+
+    async def request(
+        self,
+        url: URL,
+        reader: Callable[[aiohttp.ClientResponse], Awaitable[_T]],
+        headers: Optional[Dict[str, str]] = None
+        ) -> _T:
+        r""" Instance Method - Request
+        - arguments:
+            - url: an encoded 'yarl.URL' to send a GET request to
+            - reader: a coroutine function consuming the response body
+            - headers: extra request headers, ex: conditional ones
+        - returns:
+            - the value returned by 'reader'
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes, once the
+            retry policy gives up
+        - notes:
+            - every attempt first waits on the client's rate limiter, then
+            on its concurrency limiter; the slot is given back before a retry
+            waits
+        """
+
+        session: aiohttp.ClientSession = await self.getSession()
+        metrics: MetricsRecorder = self.getMetrics()
+        attempt: int = 0
+        while True:
+            attempt += 1
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            limiter: Optional[AdaptiveConcurrencyLimiter] = \
+                self._concurrency_limiter
+            if limiter is not None:
+                await limiter.acquire()
+
+            try:
+                started: float = time.perf_counter() \
+                    if metrics.enabled or limiter is not None else 0
+                answered: Optional[float] = None
+                try:
+                    async with session.get(
+                        url, allow_redirects=False, headers=headers
+                        ) as response:
+                        # latency up to the headers: the body size says
+                        # nothing of the server's load
+                        answered = time.perf_counter() - started
+                        response.raise_for_status()
+                        if not metrics.enabled:
+                            result: _T = await reader(response)
+                        else:
+                            read_started: float = time.perf_counter()
+                            result = await reader(response)
+                            ended: float = time.perf_counter()
+                            metrics.observe(
+                                "http_body_seconds", ended - read_started,
+                                endpoint=url.path
+                            )
+                            metrics.observe(
+                                "http_request_seconds", ended - started,
+                                endpoint=url.path
+                            )
+                except BaseException as error:
+                    if limiter is not None:
+                        self._releaseSlot(limiter, None, limiter.isDrop(error))
+                    raise
+                if limiter is not None:
+                    self._releaseSlot(limiter, answered, False)
+                return result
+
+            except (
+                aiohttp.client_exceptions.ClientError, asyncio.TimeoutError
+                ) as error:
+                # ClientConnectorError (caused by socket.gaierror), other
+                # ClientConnectionError and the ClientResponseError raised
+                # from 'response.raise_for_status()' all land here
+                logger: logging.Logger = getLibraryLogger()
+                debug: bool = logger.isEnabledFor(logging.DEBUG)
+                if not self._retry_policy.shouldRetry(error, attempt):
+                    if debug:
+                        logger.debug(
+                            "request to %s failed: %r", url, error,
+                            exc_info=True,
+                            extra={"url": str(url), "attempt": attempt}
+                        )
+                    raise
+
+                delay: float = self._retry_policy.computeDelay(attempt, error)
+                if self._rate_limiter is not None \
+                    and self._retry_policy.getRetryAfter(error) is not None:
+                    # the server asked every client request to back off
+                    self._rate_limiter.defer(delay)
+                if debug:
+                    logger.debug(
+                        "retrying %s in %.3fs (attempt %d failed: %r)",
+                        url, delay, attempt, error,
+                        extra={
+                            "url": str(url), "attempt": attempt,
+                            "delay": delay
+                        }
+                    )
+                if metrics.enabled:
+                    metrics.increment(
+                        "http_retries_total", endpoint=url.path,
+                        reason=str(error.status) if isinstance(
+                            error, aiohttp.ClientResponseError
+                        ) else type(error).__name__
+                    )
+                await asyncio.sleep(delay)
+
+
+    def _releaseSlot(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        latency: Optional[float],
+        dropped: bool
+        ) -> None:
+        reason: Optional[str] = limiter.release(latency, dropped)
+        metrics: MetricsRecorder = self.getMetrics()
+        if metrics.enabled:
+            metrics.gauge("concurrency_limit", limiter.getLimit())
+            metrics.gauge("requests_in_flight", limiter.getInFlight())
+            if reason is not None:
+                metrics.increment(
+                    "concurrency_limit_changes_total", reason=reason
+                )
+        return None
+
+
+    async def _getCached(self, url: URL) -> Optional[bytes]:
+        body: Optional[bytes] = await asyncio.to_thread(self._cache.get, url)
+        metrics: MetricsRecorder = self.getMetrics()
+        if metrics.enabled:
+            metrics.increment(
+                "cache_requests_total", endpoint=url.path,
+                result="miss" if body is None else "hit"
+            )
+        return body
+
+
+    async def fetchBody(self, url: URL) -> bytes:
+        r""" Instance Method - Fetch Body
+        - arguments:
+            - url: an encoded 'yarl.URL' to send a GET request to
+        - returns:
+            - the raw response body, from the cache when possible
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline and has no entry
+        - notes:
+        """
+        if self._cache is not None:
+            body: Optional[bytes] = await self._getCached(url)
+            if body is not None:
+                return body
+            if self._cache.offline:
+                raise CacheMissError("no cached response for {}".format(url))
+
+        body = await self.request(url, lambda response: response.read())
+
+        if self._cache is not None:
+            await asyncio.to_thread(self._cache.put, url, body)
+        return body
+
+
+    async def fetchConditional(
+        self,
+        url: URL,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+        ) -> "ConditionalResponse":
+        r""" Instance Method - Fetch Conditional
+        - arguments:
+            - url: an encoded 'yarl.URL' to send a GET request to
+            - etag: the 'ETag' of the copy held, sent as 'If-None-Match'
+            - last_modified: the 'Last-Modified' of the copy held, sent as
+            'If-Modified-Since'
+        - returns:
+            - a 'ConditionalResponse'; its body is None when the server
+            answered 304 Not Modified
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline
+        - notes:
+            - the cache is not read, the point being to ask the server; a
+            new body is stored in it
+        """
+        if self._cache is not None and self._cache.offline:
+            raise CacheMissError(
+                "conditional request to {} with an offline cache".format(url)
+            )
+        headers: Dict[str, str] = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+
+        async def _read(
+            response: aiohttp.ClientResponse
+            ) -> ConditionalResponse:
+            # 'raise_for_status' lets a 304 through, with an empty body
+            body: Optional[bytes] = None if response.status == 304 \
+                else await response.read()
+            return ConditionalResponse(
+                response.status, body, response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
+
+        result: ConditionalResponse = await self.request(
+            url, _read, headers or None
+        )
+        if self._cache is not None and result.body is not None:
+            await asyncio.to_thread(self._cache.put, url, result.body)
+        metrics: MetricsRecorder = self.getMetrics()
+        if metrics.enabled:
+            metrics.increment(
+                "http_conditional_requests_total", endpoint=url.path,
+                result="not_modified" if result.body is None else "modified"
+            )
+        return result
+
+
+    async def getParseEndpointResponse(self, text: str) -> Dict[str, Any]:
+        r""" Instance Method - Get Parse Endpoint Response
+        - arguments:
+            - text: a string containing the query to be made to
+            'patents.google.com'
+        - returns:
+            - a 'dict' object representing json returned by the '/xhr/parse'
+            endpoint
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline and has no entry
+        - notes:
+        """
+        return loads(await self.fetchBody(
+            build_parse_endpoint_url(text, self._base_url)
+        ))
+
+
+    async def getQueryEndpointResponse(
+        self,
+        query_url: str,
+        page: int = 0,
+        page_size: Optional[int] = None
+        ) -> Dict[str, Any]:
+        r""" Instance Method - Get Query Endpoint Response
+        - arguments:
+            - query_url, page, page_size: see 'build_query_endpoint_url'
+        - returns:
+            - a 'dict' object representing json returned by the '/xhr/query'
+            endpoint
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline and has no entry
+        - notes:
+        """
+        return loads(await self.fetchBody(
+            build_query_endpoint_url(
+                query_url, page, page_size, self._base_url
+            )
+        ))
+
+
+    async def getResultEndpointResponse(self, id_url: str) -> str:
+        r""" Instance Method - Get Result Endpoint Response
+        - arguments:
+            - id_url: a string containing the url of the patent to be
+            extracted from 'patents.google.com'; ex: 'patent/US9145048B2/en'
+        - returns:
+            - a 'str' object representing html returned by the '/xhr/result'
+            endpoint
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline and has no entry
+        - notes:
+        """
+        return (await self.fetchBody(
+            build_result_endpoint_url(id_url, self._base_url)
+        )).decode("utf-8", errors="replace")
+
+
+    async def streamResultEndpointResponse(
+        self,
+        id_url: str,
+        consumer_factory: Callable[[], Any],
+        chunk_size: int = STREAM_CHUNK_SIZE
+        ) -> Any:
+        r""" Instance Method - Stream Result Endpoint Response
+        - arguments:
+            - id_url: a string containing the url of the patent to be
+            extracted from 'patents.google.com'; ex: 'patent/US9145048B2/en'
+            - consumer_factory: a callable returning a fresh consumer, an
+            object with 'feed(bytes)', 'isComplete() -> bool' and
+            'close() -> result' methods; ex: 'ResultPageBuilder'
+            - chunk_size: bytes read from the response stream at a time
+        - returns:
+            - the value returned by the consumer's 'close'
+        - raises:
+            - 'aiohttp.client_exceptions.ClientError' sub-classes
+            - CacheMissError: if the cache is offline and has no entry
+        - notes:
+            - the body is fed to the consumer while it downloads; reading
+            stops (and the connection is dropped) as soon as the consumer is
+            complete
+            - a retried attempt starts over with a new consumer
+            - a cached body is fed at once; a streamed body is not cached, as
+            it is usually incomplete
+        """
+        url: URL = build_result_endpoint_url(id_url, self._base_url)
+        if self._cache is not None:
+            body: Optional[bytes] = await self._getCached(url)
+            if body is not None:
+                consumer = consumer_factory()
+                consumer.feed(body)
+                return consumer.close()
+            if self._cache.offline:
+                raise CacheMissError("no cached response for {}".format(url))
+
+        async def _read(response: aiohttp.ClientResponse) -> Any:
+            consumer = consumer_factory()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                consumer.feed(chunk)
+                if consumer.isComplete():
+                    break
+            return consumer.close()
+
+        return await self.request(url, _read)
+
+
+    pass # end of AsyncNetworkClient
+
+
+# method definitions ==========================================================
+async def http_get_parse_endpoint_response(
+    text: str,
+    client: Optional[AsyncNetworkClient] = None
+    ) -> Dict[str, Any]:
+    r""" Functional Requirement - HTTP GET PARSE ENDPOINT RESPONSE
+    - arguments:
+        - text: a string containing the query to be made to 'patents.google.com'
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused;
+        when omitted, a short-lived client is opened for this call only
+    - returns:
+        - a 'dict' object representing json returned by the '/xhr/parse' endpoint
+    - raises:
+    - notes:
+    """
+
+    if client is not None:
+        return await client.getParseEndpointResponse(text)
+
+    async with AsyncNetworkClient() as _client:
+        return await _client.getParseEndpointResponse(text)
+
+
+# -----------------------------------------------------------------------------
+async def http_get_query_endpoint_response(
+    query_url: str,
+    page: int = 0,
+    page_size: Optional[int] = None,
+    client: Optional[AsyncNetworkClient] = None
+    ) -> Dict[str, Any]:
+    r""" Functional Requirement - HTTP GET QUERY ENDPOINT RESPONSE
+    - arguments:
+        - query_url: the search parameters; ex: 'q=(hybrid+AND+engine)'
+        - page: index of the page of results, from 0
+        - page_size: results per page; the server's default when omitted
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused;
+        when omitted, a short-lived client is opened for this call only
+    - returns:
+        - a 'dict' object representing json returned by the '/xhr/query'
+        endpoint
+    - raises:
+    - notes:
+    """
+
+    if client is not None:
+        return await client.getQueryEndpointResponse(
+            query_url, page, page_size
+        )
+
+    async with AsyncNetworkClient() as _client:
+        return await _client.getQueryEndpointResponse(
+            query_url, page, page_size
+        )
+
+
+# -----------------------------------------------------------------------------
+async def http_get_result_endpoint_response(
+    id_url: str,
+    client: Optional[AsyncNetworkClient] = None
+    ) -> str:
     r""" Functional Requirement - HTTP GET RESULT ENDPOINT RESPONSE
     - arguments:
-        - id_url: a string containing the url of the patent to be extracted 
-        from 'patents.google.com' 
+        - id_url: a string containing the url of the patent to be extracted
+        from 'patents.google.com'
             - examples:
-                - 'patent/WO2022109623A1/fr' 
+                - 'patent/WO2022109623A1/fr'
                 - 'patent/<number>/<lang code>'
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused;
+        when omitted, a short-lived client is opened for this call only
     - returns:
         - a 'str' object representing html returned by the '/xhr/result' endpoint
     - raises:
     - notes:
     """
 
-    _params: Dict = {
-        "id": id_url,
-        "exp": ""
-    }
+    if client is not None:
+        return await client.getResultEndpointResponse(id_url)
+
+    async with AsyncNetworkClient() as _client:
+        return await _client.getResultEndpointResponse(id_url)
 
-    _endpoint_url: str = "{}{}".format(GOOGLE_PATENTS_BASE_URL, "/xhr/result?")
-    _url: str = "{}{}".format(
-        _endpoint_url, 
-        urllib.parse.urlencode(
-            _params, safe="", quote_via=urllib.parse.quote
+
+# -----------------------------------------------------------------------------
+async def http_stream_result_endpoint_response(
+    id_url: str,
+    consumer_factory: Callable[[], Any],
+    client: Optional[AsyncNetworkClient] = None
+    ) -> Any:
+    r""" Functional Requirement - HTTP STREAM RESULT ENDPOINT RESPONSE
+    - arguments:
+        - id_url: a string containing the url of the patent to be extracted
+        from 'patents.google.com'; ex: 'patent/<number>/<lang code>'
+        - consumer_factory: a callable returning a fresh incremental consumer
+        of the html; see 'AsyncNetworkClient.streamResultEndpointResponse'
+        - client: an 'AsyncNetworkClient' whose pooled connections are reused;
+        when omitted, a short-lived client is opened for this call only
+    - returns:
+        - the value returned by the consumer's 'close'
+    - raises:
+    - notes:
+    """
+
+    if client is not None:
+        return await client.streamResultEndpointResponse(
+            id_url, consumer_factory
         )
-    )
 
-    _data: str = None
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                URL(_url, encoded=True), allow_redirects=False
-                ) as response:
-
-                response.raise_for_status()
-                _data: str = await response.text()
-    
-    except aiohttp.client_exceptions.ClientConnectorError as error:
-        # caused by socket.gaierror
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
-
-    except aiohttp.client_exceptions.ClientConnectionError as error:
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
-
-    except aiohttp.client_exceptions.ClientResponseError as error:
-        # handles or catches exceptions raises from the line 'response.raise_for_status()'
-        getLibraryLogger().debug(error, exc_info=True)
-        raise
-
-    return _data
\ No newline at end of file
+    async with AsyncNetworkClient() as _client:
+        return await _client.streamResultEndpointResponse(
+            id_url, consumer_factory
+        )
@@ -0,0 +1,229 @@
+r""" py_google_patents.core.refresh module """
+
+
+# importing standard modules ==================================================
+from typing import Iterator, NamedTuple, Optional, TYPE_CHECKING
+import hashlib, os, sqlite3, threading, time
+
+if TYPE_CHECKING:
+    from ..models.response_models import GooglePatentResponse
+
+
+# module variables ============================================================
+REFRESH_STATUSES: tuple = ("new", "changed", "not_modified", "unchanged")
+""" outcomes of refreshing one document; only the first two were parsed """
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id_url          TEXT PRIMARY KEY,
+    etag            TEXT,
+    last_modified   TEXT,
+    content_hash    TEXT NOT NULL,
+    checked_at      REAL NOT NULL,
+    changed_at      REAL NOT NULL
+);
+"""
+
+
+# method definitions ==========================================================
+def hash_content(body: bytes) -> str:
+    r""" Function - Hash Content
+    - arguments:
+        - body: a raw response body
+    - returns:
+        - a hex digest identifying the body
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+# class definitions ===========================================================
+class Fingerprint(NamedTuple):
+    r""" what is known of the copy of a document fetched last """
+
+    etag: Optional[str]
+    """ the 'ETag' header it was served with, if any """
+
+    last_modified: Optional[str]
+    """ the 'Last-Modified' header it was served with, if any """
+
+    content_hash: str
+    """ 'hash_content' of its body, for servers sending neither header """
+
+    checked_at: float
+    """ epoch seconds of the last refresh that reached the server """
+
+    changed_at: float
+    """ epoch seconds of the last refresh that found a different body """
+
+    pass # end of Fingerprint
+
+
+# -----------------------------------------------------------------------------
+class RefreshResult(NamedTuple):
+    r""" outcome of refreshing one document """
+
+    id_url: str
+
+    status: str
+    """ one of 'REFRESH_STATUSES' """
+
+    response: Optional["GooglePatentResponse"]
+    """ the parsed document; None unless 'status' is 'new' or 'changed' """
+
+    @property
+    def changed(self) -> bool:
+        return self.response is not None
+
+    pass # end of RefreshResult
+
+
+# -----------------------------------------------------------------------------
+class FingerprintStore:
+    r""" class keeping a 'Fingerprint' per id_url in a sqlite database, so that
+    a refresh only downloads and parses the documents that changed since
+
+    - notes:
+        - safe to share between processes, like 'DiskResponseCache'
+        - calls are blocking and short; 'refreshPatentDataMany' runs them in
+        a worker thread
+    """
+
+
+    def __init__(self, path: str):
+        r""" Constructor
+        - arguments:
+            - path: the sqlite database file; created if missing
+        """
+        self.path: str = path
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        return
+
+
+    def __enter__(self) -> "FingerprintStore":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM fingerprints"
+            ).fetchone()[0]
+
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id_url FROM fingerprints ORDER BY id_url"
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+
+    def get(self, id_url: str) -> Optional[Fingerprint]:
+        r""" Instance Method - Get
+        - arguments:
+            - id_url: a patent url; ex: 'patent/US9145048B2/en'
+        - returns:
+            - the stored 'Fingerprint'; None if the document was never
+            refreshed
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, content_hash, checked_at, "
+                "changed_at FROM fingerprints WHERE id_url = ?", (id_url,)
+            ).fetchone()
+        return None if row is None else Fingerprint(*row)
+
+
+    def put(self, id_url: str, fingerprint: Fingerprint) -> None:
+        r""" Instance Method - Put
+        - arguments:
+            - id_url: a patent url; ex: 'patent/US9145048B2/en'
+            - fingerprint: replaces the stored one
+        - returns:
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO fingerprints (id_url, etag, "
+                "last_modified, content_hash, checked_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (id_url,) + tuple(fingerprint)
+            )
+        return None
+
+
+    def update(
+        self,
+        id_url: str,
+        body: Optional[bytes],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+        ) -> str:
+        r""" Instance Method - Update
+        - arguments:
+            - id_url: a patent url; ex: 'patent/US9145048B2/en'
+            - body: the body just received; None for a 304 Not Modified
+            - etag, last_modified: the headers it was served with
+        - returns:
+            - the 'REFRESH_STATUSES' entry describing the body
+        - notes:
+            - a 'new' or 'changed' body is not stored until 'put', so that a
+            document whose parsing fails is downloaded again next time; use
+            'build' to create its fingerprint
+        """
+        stored: Optional[Fingerprint] = self.get(id_url)
+        if stored is None:
+            return "new"
+        if body is not None and hash_content(body) != stored.content_hash:
+            return "changed"
+        # a 304 may omit the validators: the stored ones still apply
+        self.put(id_url, stored._replace(
+            etag=etag or stored.etag,
+            last_modified=last_modified or stored.last_modified,
+            checked_at=time.time()
+        ))
+        return "unchanged" if body is not None else "not_modified"
+
+
+    @staticmethod
+    def build(
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+        ) -> Fingerprint:
+        now: float = time.time()
+        return Fingerprint(etag, last_modified, hash_content(body), now, now)
+
+
+    def delete(self, id_url: str) -> bool:
+        r""" Instance Method - Delete
+        - arguments:
+            - id_url: a patent url; ex: 'patent/US9145048B2/en'
+        - returns:
+            - True if a fingerprint was removed
+        """
+        with self._lock:
+            return self._connection.execute(
+                "DELETE FROM fingerprints WHERE id_url = ?", (id_url,)
+            ).rowcount > 0
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+        return None
+
+
+    pass # end of FingerprintStore
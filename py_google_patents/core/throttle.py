@@ -0,0 +1,507 @@
+r""" py_google_patents.core.throttle module """
+
+
+# importing standard modules ==================================================
+from typing import Optional, FrozenSet, Callable, Deque, List, Tuple
+from email.utils import parsedate_to_datetime
+import asyncio, collections, datetime, random, time
+
+
+# importing third-party modules ===============================================
+import aiohttp.client_exceptions
+
+
+# class definitions ===========================================================
+class TokenBucketRateLimiter:
+    r""" class implementing a token bucket; shared by every request sent from
+    one client so that the client as a whole never exceeds 'rate' requests
+    per second, while still allowing short bursts of up to 'burst' requests
+
+    - notes:
+        - waiters are served in FIFO order
+        - 'defer' pauses the whole bucket, ex: when the server answered with
+        a 'Retry-After' header
+    """
+
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic
+        ):
+        r""" Constructor
+        - arguments:
+            - rate: number of tokens added to the bucket per second
+            - burst: capacity of the bucket
+            - clock: a monotonic clock, returning seconds
+        - raises:
+            - ValueError: if 'rate' or 'burst' are not positive
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                "rate must be > 0 and burst >= 1, got rate={} burst={}"\
+                    .format(rate, burst)
+            )
+        self._rate: float = float(rate)
+        self._burst: float = float(burst)
+        self._clock: Callable[[], float] = clock
+        self._tokens: float = float(burst)
+        self._updated_at: float = clock()
+        self._paused_until: float = 0.0
+        self._lock: asyncio.Lock = asyncio.Lock()
+        return
+
+
+    def getRate(self) -> float:
+        return self._rate
+
+
+    def setRate(self, rate: float) -> None:
+        r""" Instance Method - Set Rate
+        - arguments:
+            - rate: new number of tokens added to the bucket per second
+        - returns:
+        - raises:
+            - ValueError: if 'rate' is not positive
+        """
+        if rate <= 0:
+            raise ValueError("rate must be > 0, got {}".format(rate))
+        self._refill()
+        self._rate = float(rate)
+        return None
+
+
+    def _refill(self) -> None:
+        now: float = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+        return None
+
+
+    def defer(self, seconds: float) -> None:
+        r""" Instance Method - Defer
+        - arguments:
+            - seconds: duration for which no token is handed out
+        - returns:
+        - raises:
+        - notes:
+            - an earlier pause is never shortened by a later, shorter one
+        """
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        return None
+
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        r""" Instance Method - Acquire
+        - arguments:
+            - tokens: number of tokens to take from the bucket
+        - returns:
+        - raises:
+        - notes:
+            - waits until enough tokens are available
+        """
+        async with self._lock:
+            while True:
+                now: float = self._clock()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return None
+                await asyncio.sleep((tokens - self._tokens) / self._rate)
+
+
+    pass # end of TokenBucketRateLimiter
+
+
+# -----------------------------------------------------------------------------
+class RetryPolicy:
+    r""" class deciding whether a failed request is retried and how long to
+    wait before the next attempt; delays grow exponentially with 'full
+    jitter' and a 'Retry-After' header sent by the server takes precedence """
+
+
+    DEFAULT_RETRY_STATUSES: FrozenSet[int] = frozenset({
+        408, 429, 500, 502, 503, 504
+    })
+
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retry_statuses: Optional[FrozenSet[int]] = None,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 300.0
+        ):
+        r""" Constructor
+        - arguments:
+            - max_attempts: total number of attempts, including the first one
+            - base_delay: delay, in seconds, before the first retry
+            - max_delay: upper bound of the computed backoff delay
+            - multiplier: growth factor of the delay between attempts
+            - jitter: if True, the delay is drawn uniformly from
+            [0, computed delay] to spread retries of concurrent requests
+            - retry_statuses: http status codes considered transient
+            - respect_retry_after: if True, a 'Retry-After' header sent with
+            a retryable status overrides the computed delay
+            - max_retry_after: upper bound of a 'Retry-After' delay honoured
+        """
+        self.max_attempts: int = max(1, max_attempts)
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.multiplier: float = multiplier
+        self.jitter: bool = jitter
+        self.retry_statuses: FrozenSet[int] = retry_statuses \
+            if retry_statuses is not None \
+                else self.DEFAULT_RETRY_STATUSES
+        self.respect_retry_after: bool = respect_retry_after
+        self.max_retry_after: float = max_retry_after
+        return
+
+
+    @classmethod
+    def disabled(cls) -> "RetryPolicy":
+        return cls(max_attempts=1)
+
+
+    def isRetryable(self, error: BaseException) -> bool:
+        r""" Instance Method - Is Retryable
+        - arguments:
+            - error: the exception raised by a request
+        - returns:
+            - True if the request may succeed when sent again
+        """
+        if isinstance(error, aiohttp.client_exceptions.ClientResponseError):
+            # raised from 'response.raise_for_status()'
+            return error.status in self.retry_statuses
+
+        # ClientConnectorError (caused by socket.gaierror), connection resets,
+        # server disconnects and truncated bodies
+        return isinstance(
+            error, (
+                aiohttp.client_exceptions.ClientConnectionError,
+                aiohttp.client_exceptions.ClientPayloadError,
+                asyncio.TimeoutError
+            )
+        )
+
+
+    def shouldRetry(self, error: BaseException, attempt: int) -> bool:
+        r""" Instance Method - Should Retry
+        - arguments:
+            - error: the exception raised by a request
+            - attempt: number of attempts made so far, starting at 1
+        - returns:
+            - True if another attempt should be made
+        """
+        return attempt < self.max_attempts and self.isRetryable(error)
+
+
+    def getRetryAfter(self, error: BaseException) -> Optional[float]:
+        r""" Instance Method - Get Retry After
+        - arguments:
+            - error: the exception raised by a request
+        - returns:
+            - the delay, in seconds, requested by the server through the
+            'Retry-After' header; None if absent or unparsable
+        """
+        headers = getattr(error, "headers", None)
+        if not headers:
+            return None
+        return parse_retry_after(headers.get("Retry-After"))
+
+
+    def computeDelay(self, attempt: int, error: BaseException = None) -> float:
+        r""" Instance Method - Compute Delay
+        - arguments:
+            - attempt: number of attempts made so far, starting at 1
+            - error: the exception raised by the last attempt
+        - returns:
+            - seconds to wait before the next attempt
+        """
+        if self.respect_retry_after and error is not None:
+            retry_after: Optional[float] = self.getRetryAfter(error)
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+
+        delay: float = min(
+            self.max_delay,
+            self.base_delay * (self.multiplier ** (attempt - 1))
+        )
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+    pass # end of RetryPolicy
+
+
+# -----------------------------------------------------------------------------
+class AdaptiveConcurrencyLimiter:
+    r""" class bounding the number of requests in flight with a limit that
+    follows the server: it grows additively while latency stays near its
+    baseline and shrinks multiplicatively (AIMD) on throttling, timeouts or
+    a latency spike
+
+    - usage:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=64)
+        async with AsyncNetworkClient(concurrency_limiter=limiter) as client:
+            ...
+        limiter.getLimit(), limiter.getHistory()
+
+    - notes:
+        - the limit grows by about one per round trip, and only while the
+        requests in flight use at least half of it, so an idle client does
+        not inflate it
+        - the baseline is a long-window average of the latency (the mean of
+        the first 'baseline_window' samples, then an exponential average of
+        about as many), and a spike is a short-window average above
+        'tolerance' times it, as in gradient / Vegas style limiters; noisy
+        but flat latency thus leaves the limit alone, and a lasting change
+        of the network is adopted within a window
+        - the limit is cut at most once per smoothed round trip, so that the
+        failures of one burst count once
+        - waiters are served in FIFO order
+    """
+
+
+    DEFAULT_DROP_STATUSES: FrozenSet[int] = frozenset({429, 503, 504})
+
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        backoff: float = 0.7,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        baseline_window: int = 100,
+        history: int = 256,
+        drop_statuses: Optional[FrozenSet[int]] = None,
+        clock: Callable[[], float] = time.monotonic
+        ):
+        r""" Constructor
+        - arguments:
+            - initial_limit: requests allowed in flight at first
+            - min_limit, max_limit: bounds of the limit
+            - backoff: factor the limit is multiplied by on a drop
+            - tolerance: ratio of the smoothed latency to the baseline above
+            which latency counts as a spike
+            - smoothing: weight of a new sample in the smoothed latency
+            - baseline_window: number of samples the baseline averages over
+            - history: number of limit changes kept, see 'getHistory'
+            - drop_statuses: http statuses meaning the server is overloaded;
+            'DEFAULT_DROP_STATUSES' when omitted
+            - clock: a monotonic clock, returning seconds
+        - raises:
+            - ValueError: for limits out of order, a 'backoff' outside ]0, 1[
+            or a 'tolerance' not above 1
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit \
+            or not 0 < backoff < 1 or tolerance <= 1:
+            raise ValueError(
+                "expected 1 <= min_limit <= initial_limit <= max_limit, "
+                "0 < backoff < 1 and tolerance > 1, got min_limit={} "
+                "initial_limit={} max_limit={} backoff={} tolerance={}"\
+                    .format(
+                        min_limit, initial_limit, max_limit, backoff,
+                        tolerance
+                    )
+            )
+        self._limit: float = float(initial_limit)
+        self._min_limit: int = min_limit
+        self._max_limit: int = max_limit
+        self._backoff: float = backoff
+        self._tolerance: float = tolerance
+        self._smoothing: float = smoothing
+        self._baseline_window: int = max(1, baseline_window)
+        self._drop_statuses: FrozenSet[int] = drop_statuses \
+            if drop_statuses is not None else self.DEFAULT_DROP_STATUSES
+        self._clock: Callable[[], float] = clock
+
+        self._in_flight: int = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._baseline: Optional[float] = None
+        self._samples: int = 0
+        self._smoothed: Optional[float] = None
+        self._decreased_at: float = -float("inf")
+        self._history: Deque[Tuple[float, int, str]] = collections.deque(
+            [(clock(), initial_limit, "initial")], maxlen=history
+        )
+        return
+
+
+    def getLimit(self) -> int:
+        return int(self._limit)
+
+
+    def getInFlight(self) -> int:
+        return self._in_flight
+
+
+    def getBaselineLatency(self) -> Optional[float]:
+        return self._baseline
+
+
+    def getHistory(self) -> List[Tuple[float, int, str]]:
+        r""" Instance Method - Get History
+        - returns:
+            - the latest limit changes, oldest first, as (clock time, new
+            limit, reason) tuples; the reason is 'initial', 'increase',
+            'drop' or 'latency'
+        """
+        return list(self._history)
+
+
+    def isDrop(self, error: BaseException) -> bool:
+        r""" Instance Method - Is Drop
+        - arguments:
+            - error: the exception a request failed with
+        - returns:
+            - True if it means the server is overloaded: a timeout or one of
+            the drop statuses
+        """
+        if isinstance(error, asyncio.TimeoutError):
+            return True
+        return isinstance(
+            error, aiohttp.client_exceptions.ClientResponseError
+        ) and error.status in self._drop_statuses
+
+
+    async def acquire(self) -> None:
+        r""" Instance Method - Acquire
+        - arguments:
+        - returns:
+        - notes:
+            - waits until fewer requests than the limit are in flight; every
+            acquire must be followed by one 'release'
+        """
+        if not self._waiters and self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return None
+        waiter: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over as the waiter was cancelled
+                self._in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return None
+
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < int(self._limit):
+            waiter: asyncio.Future = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+        return None
+
+
+    def release(
+        self,
+        latency: Optional[float] = None,
+        dropped: bool = False
+        ) -> Optional[str]:
+        r""" Instance Method - Release
+        - arguments:
+            - latency: seconds the request took to be answered; None when it
+            failed without saying anything about the server's load
+            - dropped: True if the request failed from overload, see
+            'isDrop'
+        - returns:
+            - the reason the limit changed, see 'getHistory'; None if it did
+            not
+        """
+        self._in_flight -= 1
+        reason: Optional[str] = None
+        if dropped:
+            reason = self._decrease("drop")
+        elif latency is not None:
+            reason = self._sample(latency)
+        self._wake()
+        return reason
+
+
+    def _sample(self, latency: float) -> Optional[str]:
+        self._samples += 1
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            self._baseline += (latency - self._baseline) \
+                / min(self._samples, self._baseline_window)
+        self._smoothed = latency if self._smoothed is None \
+            else self._smoothed + (latency - self._smoothed) * self._smoothing
+
+        if self._smoothed > self._tolerance * self._baseline:
+            return self._decrease("latency")
+        if (self._in_flight + 1) * 2 < self._limit \
+            or self._limit >= self._max_limit:
+            return None
+        previous: int = int(self._limit)
+        self._limit = min(
+            float(self._max_limit), self._limit + 1.0 / self._limit
+        )
+        if int(self._limit) == previous:
+            return None
+        self._history.append((self._clock(), int(self._limit), "increase"))
+        return "increase"
+
+
+    def _decrease(self, reason: str) -> Optional[str]:
+        now: float = self._clock()
+        if now - self._decreased_at < (self._smoothed or 0.0):
+            return None
+        self._decreased_at = now
+        if reason == "latency":
+            # judge the new limit on fresh samples
+            self._smoothed = None
+        previous: int = int(self._limit)
+        self._limit = max(float(self._min_limit), previous * self._backoff)
+        if int(self._limit) == previous:
+            return None
+        self._history.append((now, int(self._limit), reason))
+        return reason
+
+
+    pass # end of AdaptiveConcurrencyLimiter
+
+
+# method definitions ==========================================================
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    r""" Functional Requirement - PARSE RETRY AFTER
+    - arguments:
+        - value: value of a 'Retry-After' header; either delay-seconds or an
+        http-date
+    - returns:
+        - the delay in seconds (never negative); None if the value cannot
+        be parsed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment: datetime.datetime = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return max(
+        0.0,
+        (moment - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    )
@@ -2,11 +2,11 @@ r""" py_google_patents.models.response_models """
 
 
 # importing standard modules ==================================================
-from typing import Union, Optional, List
+from typing import Union, Optional, List, Dict, Any, Callable, Tuple, ClassVar
 
 
 # importing third-party modules ===============================================
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 # model definitions ===========================================================
@@ -77,10 +77,375 @@ class GoogleParseResponse(BaseModel):
     pass # end of GoogleParseResponse
 
 
+class GoogleQueryResponse(BaseModel):
+    r""" model defining one page of results received from
+    patents.google.com/xhr/query """
+
+    total_num_results: int = Field(
+        0,
+        title="number of documents matching the query"
+    )
+
+    total_num_pages: int = Field(
+        0,
+        title="number of pages the server lets through",
+        description="integer capped by the server, ex: to 100 pages"
+    )
+
+    num_page: int = Field(
+        0,
+        title="index of this page, from 0"
+    )
+
+    results: List[PatentMetaData] = Field(
+        default_factory=list,
+        title="documents of this page, in rank order"
+    )
+
+    pass # end of GoogleQueryResponse
+
+
 # -----------------------------------------------------------------------------
+class PatentClaim(BaseModel):
+    r""" model representing a single claim of a patent document """
+
+    number: Optional[int] = Field(
+        None,
+        title="claim number",
+        description="integer taken from the 'num' attribute of the claim"
+    )
+
+    text: str = Field(
+        "",
+        title="claim text",
+        description="whitespace-normalized text of the claim"
+    )
+
+    depends_on: List[int] = Field(
+        default_factory=list,
+        title="referenced claims",
+        description="numbers of the claims this claim refers to; empty for "
+            "independent claims"
+    )
+
+    pass # end of PatentClaim
+
+
+class PatentEvent(BaseModel):
+    r""" model representing a single legal / application event """
+
+    date: Optional[str] = Field(
+        None,
+        title="event date",
+        description="ISO-8601 date of the event"
+    )
+
+    title: str = Field(
+        "",
+        title="event description"
+    )
+
+    type: Optional[str] = Field(
+        None,
+        title="event type",
+        description="ex: 'filed', 'publication', 'granted', 'legal-status'"
+    )
+
+    pass # end of PatentEvent
+
+
+class PatentApplication(BaseModel):
+    r""" model representing the application a patent document stems from """
+
+    application_number: Optional[str] = Field(
+        None,
+        title="application number",
+        description="ex: 'US13/076,026'"
+    )
+
+    events: List[PatentEvent] = Field(
+        default_factory=list,
+        title="application events, in document order"
+    )
+
+    pass # end of PatentApplication
+
+
+class PatentPublication(BaseModel):
+    r""" model representing a publication referenced by a patent document;
+    a family member, a cited or a citing document """
+
+    publication_number: Optional[str] = Field(
+        None,
+        title="document publication ID"
+    )
+
+    id: Optional[str] = Field(
+        None,
+        title="uri for the document",
+        description="string containing a uri of the form "
+            "'patent/<patent_number>/<language_code>'"
+    )
+
+    priority_date: Optional[str] = Field(None, title="ISO-8601 priority date")
+
+    publication_date: Optional[str] = Field(
+        None, title="ISO-8601 publication date"
+    )
+
+    assignee: Optional[str] = Field(None, title="original assignee")
+
+    title: str = Field("", title="title of the document")
+
+    language: Optional[str] = Field(None, title="primary language code")
+
+    examiner_cited: bool = Field(
+        False,
+        title="boolean indicating if the citation was made by the examiner"
+    )
+
+    family_to_family: bool = Field(
+        False,
+        title="boolean indicating a family-to-family citation"
+    )
+
+    pass # end of PatentPublication
+
+
+class PatentFamilyApplication(BaseModel):
+    r""" model representing a single application of a patent family """
+
+    application_number: Optional[str] = Field(None, title="application number")
+
+    publication_number: Optional[str] = Field(
+        None, title="representative publication ID"
+    )
+
+    filing_date: Optional[str] = Field(None, title="ISO-8601 filing date")
+
+    title: str = Field("", title="title of the application")
+
+    pass # end of PatentFamilyApplication
+
+
+class PatentFamily(BaseModel):
+    r""" model representing the family section of a patent document """
+
+    family_id: Optional[str] = Field(
+        None,
+        title="family identifier",
+        description="ex: '44709789', from the 'ID=44709789' heading"
+    )
+
+    applications: List[PatentFamilyApplication] = Field(
+        default_factory=list,
+        title="applications of the family"
+    )
+
+    members: List[PatentPublication] = Field(
+        default_factory=list,
+        title="publications of the family ('Also Published As')"
+    )
+
+    pass # end of PatentFamily
+
+
+class CPCClassification(BaseModel):
+    r""" model representing a single CPC classification of a document """
+
+    code: str = Field(..., title="CPC code", description="ex: 'B60K6/20'")
+
+    description: str = Field("", title="description of the CPC code")
+
+    leaf: bool = Field(
+        True,
+        title="boolean indicating the most specific code of a hierarchy"
+    )
+
+    first: bool = Field(
+        False,
+        title="boolean indicating the first (inventive) classification"
+    )
+
+    pass # end of CPCClassification
+
+
 class GooglePatentResponse(BaseModel):
     r""" model defining the response received from patents.google.com/xhr/result
     for a single 'id' url query parameter """
 
+    publication_number: Optional[str] = Field(
+        None,
+        title="document publication ID",
+        description="ex: 'US9145048B2'"
+    )
+
+    title: str = Field("", title="title of the patent document")
+
+    country_code: Optional[str] = Field(None, title="publishing authority")
+
+    inventors: List[str] = Field(default_factory=list, title="inventors")
+
+    assignees: List[str] = Field(
+        default_factory=list, title="original assignees"
+    )
+
+    priority_date: Optional[str] = Field(None, title="ISO-8601 priority date")
+
+    filing_date: Optional[str] = Field(None, title="ISO-8601 filing date")
+
+    publication_date: Optional[str] = Field(
+        None, title="ISO-8601 publication date"
+    )
+
+    abstract: Optional[str] = Field(
+        None,
+        title="abstract",
+        description="whitespace-normalized abstract text; None if absent"
+    )
+
+    description: List[str] = Field(
+        default_factory=list,
+        title="description paragraphs and headings, in document order"
+    )
+
+    claims: List[PatentClaim] = Field(
+        default_factory=list, title="claims, in document order"
+    )
+
+    application: Optional[PatentApplication] = Field(
+        None, title="application section"
+    )
+
+    family: Optional[PatentFamily] = Field(None, title="family section")
+
+    classifications: List[CPCClassification] = Field(
+        default_factory=list, title="CPC classifications"
+    )
+
+    citations: List[PatentPublication] = Field(
+        default_factory=list,
+        title="documents cited by this document (backward citations)"
+    )
+
+    cited_by: List[PatentPublication] = Field(
+        default_factory=list,
+        title="documents citing this document (forward citations)"
+    )
+
+    pass # end of GooglePatentResponse
+
+
+class LazyGooglePatentResponse(GooglePatentResponse):
+    r""" model defining the response received from patents.google.com/xhr/result
+    whose sections are parsed on first access
+
+    - notes:
+        - the document metadata is set at construction; every other section is
+        produced by the loader (which keeps the raw html) the first time one of
+        its fields is read, and the result is kept on the instance
+        - 'dict', 'json', 'copy', comparisons, 'repr' and pickling materialize
+        every pending section first, so a lazy response serializes exactly as
+        an eagerly parsed one
+        - not safe to materialize from several threads at once
+    """
+
+    LAZY_FIELDS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        "abstract": ("abstract",),
+        "description": ("description",),
+        "claims": ("claims",),
+        "application": ("application",),
+        "family": ("family",),
+        "classifications": ("classifications",),
+        "citations": ("citations", "cited_by"),
+    }
+    """ fields produced by the loader, per section """
+
+    _loader: Optional[Callable[[str], Dict[str, Any]]] = PrivateAttr(None)
+
+    @classmethod
+    def fromLoader(
+        cls,
+        loader: Callable[[str], Dict[str, Any]],
+        **metadata: Any
+        ) -> "LazyGooglePatentResponse":
+        r""" Class Method - From Loader
+        - arguments:
+            - loader: a callable taking a section name (a key of 'LAZY_FIELDS')
+            and returning the values of that section's fields
+            - metadata: values of the eagerly parsed fields
+        - returns:
+            - an object of type 'LazyGooglePatentResponse' with every section
+            pending
+        """
+        response: LazyGooglePatentResponse = cls.construct(**metadata)
+        values: Dict[str, Any] = response.__dict__
+        for fields in cls.LAZY_FIELDS.values():
+            for field in fields:
+                values.pop(field, None)
+        response._loader = loader
+        return response
+
+    def getPendingSections(self) -> List[str]:
+        values: Dict[str, Any] = self.__dict__
+        return [
+            section for section, fields in self.LAZY_FIELDS.items()
+            if fields[0] not in values
+        ]
+
+    def _load(self, section: str) -> None:
+        values: Dict[str, Any] = self.__dict__
+        for field, value in self._loader(section).items():
+            values.setdefault(field, value)
+        return None
+
+    def materialize(self) -> "LazyGooglePatentResponse":
+        r""" Instance Method - Materialize
+        - arguments:
+        - returns:
+            - the instance itself, with every pending section parsed
+        """
+        pending: List[str] = self.getPendingSections()
+        if pending:
+            for section in pending:
+                self._load(section)
+            # keep the declaration order of the fields, as an eagerly parsed
+            # response would
+            values: Dict[str, Any] = self.__dict__
+            object.__setattr__(self, "__dict__", {
+                field: values[field] for field in self.__fields__
+                if field in values
+            })
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        if not name.startswith("_"):
+            for section, fields in self.LAZY_FIELDS.items():
+                if name in fields:
+                    self._load(section)
+                    return self.__dict__[name]
+        raise AttributeError(
+            "{!r} object has no attribute {!r}".format(
+                self.__class__.__name__, name
+            )
+        )
+
+    def __iter__(self):
+        self.materialize()
+        return super().__iter__()
+
+    def _iter(self, *args: Any, **kwargs: Any):
+        self.materialize()
+        return super()._iter(*args, **kwargs)
+
+    def __repr_args__(self):
+        self.materialize()
+        return super().__repr_args__()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.materialize()
+        state: Dict[str, Any] = super().__getstate__()
+        state["__private_attribute_values__"].pop("_loader", None)
+        return state
 
-    pass # end of GooglePatentResponse
\ No newline at end of file
+    pass # end of LazyGooglePatentResponse
@@ -2,87 +2,26 @@ r""" py_google_patents.network module """
 
 
 # importing standard modules ==================================================
-from typing import Union, Optional, List
-import urllib.parse, logging
+import logging
 
 
 # importing third-party modules ===============================================
-from aiohttp import ClientSession
-from pydantic import BaseModel, Field
+from aiohttp import ClientSession, ClientResponse
 
 
-# schema definitions ==========================================================
-class PatentMetaData(BaseModel):
-    r""" model representing a single result id from patents.google.com/xhr/parse """
-
-
-    id: Union[str, None] = Field(
-        None, 
-        title="uri for probable patent document request",
-        description=\
-            "string containing a uri of the form 'patent/<patent_number>/<language_code>'"
-    )
-
-    number: Union[str, None] = Field(
-        None,
-        title="document publication ID",
-        description="string containing the document publication ID"
-    )
-
-    title: str = Field(
-        "",     # default empty string
-        title="title of the patent document",
-        description="string containing the title of the patent document"
-    )
-
-
-    pass # end of _PatentMetaData
-
-
-class GoogleParsePatentResult(BaseModel):
-    r""" model representing a single result id, if received, from 
-    patents.google.com/xhr/parse """
-
-
-    result: PatentMetaData
-
-
-    pass # end of GoogleParsePatentResult
-
-
-class GoogleParseQueryResult(BaseModel):
-    r""" model representing a single query result from patents.google.com/xhr/parse """
-
-    query_url: Union[str, None] = Field(
-        None,
-        title="formatted uri with the query keywords",
-        description="string containing formatted uri with the query keywords"
-    )
-
-    pass # end of GoogleParseQueryResult
-
-
-class GoogleParseResponse(BaseModel):
-    r""" model defining the response received from patents.google.com/xhr/parse """
-
-    error_no_patents_found: bool = Field(
-        False,
-        title="boolean indicating if no patents can be recommended"
-    )
-
-    results: Optional[
-        Union[
-            List[GoogleParsePatentResult], 
-            List[GoogleParseQueryResult]
-        ]
-    ]
-
-    pass # end of GoogleParseResponse
+# importing custom modules ====================================================
+from .common.config import getLibraryLogger
+from .core.network import AsyncNetworkClient, build_parse_endpoint_url, \
+    build_result_endpoint_url
+from .models.response_models import PatentMetaData, GoogleParsePatentResult, \
+    GoogleParseQueryResult, GoogleParseResponse
 
 
 # method definitions ==========================================================
 class AsyncNetworkInterface:
-    r""" class serving as an asynchronous network interface """
+    r""" class serving as an asynchronous network interface; kept for
+    backwards compatibility, requests are delegated to
+    'py_google_patents.core.network.AsyncNetworkClient' """
 
 
     base_url: str = "https://patents.google.com/xhr"
@@ -96,7 +35,10 @@ class AsyncNetworkInterface:
         self._http_client: ClientSession = http_client
         self._logger: logging.Logger = logger \
             if logger is not None \
-                else logging.getLogger("network_interface")
+                else getLibraryLogger().getChild("network_interface")
+        self._network_client: AsyncNetworkClient = AsyncNetworkClient(
+            base_url=self.base_url[:-len("/xhr")], session=http_client
+        )
         return
 
     
@@ -106,6 +48,10 @@ class AsyncNetworkInterface:
 
     def getLogger(self) -> logging.Logger:
         return self._logger
+
+
+    def getNetworkClient(self) -> AsyncNetworkClient:
+        return self._network_client
         
 
     async def getResult(self, id_url: str) -> str:
@@ -120,15 +66,20 @@ class AsyncNetworkInterface:
             - uses the internal `_http_client` to send http requests 
         """
 
-        url: str = "{}/result?id={}".format(
-            self.base_url, urllib.parse.quote(id_url, safe="")
+        async def _read(response: ClientResponse) -> str:
+            if self.getLogger().isEnabledFor(logging.DEBUG):
+                self.getLogger().debug(
+                    "'/xhr/result' response headers: %s",
+                    dict(response.headers)
+                )
+            return await response.text()
+
+        return await self.getNetworkClient().request(
+            build_result_endpoint_url(
+                id_url, self.getNetworkClient().getBaseUrl()
+            ),
+            _read
         )
-        async with self.getHttpClient()\
-            .get(url, allow_redirects=False) as response:
-            self.getLogger().debug(response.headers)
-            document_as_text: str = await response.text()
-        
-        return document_as_text
     
 
     async def getParse(self, text: str) -> GoogleParseResponse:
@@ -141,17 +92,21 @@ class AsyncNetworkInterface:
         - notes:
             - uses the internal `_http_client` to send http requests 
         """
-        url: str = "{}/parse?text={}&cursor={}&exp=".format(
-            self.base_url, urllib.parse.quote(text, safe="()"), len(text)
+
+        async def _read(response: ClientResponse) -> GoogleParseResponse:
+            if self.getLogger().isEnabledFor(logging.DEBUG):
+                self.getLogger().debug(
+                    "'/xhr/parse' response headers: %s",
+                    dict(response.headers)
+                )
+            return GoogleParseResponse(** await response.json())
+
+        return await self.getNetworkClient().request(
+            build_parse_endpoint_url(
+                text, self.getNetworkClient().getBaseUrl()
+            ),
+            _read
         )
-        async with self.getHttpClient()\
-            .get(url, allow_redirects=False) as response:
-            self.getLogger().debug(response.headers)
-            result: GoogleParseResponse = GoogleParseResponse(
-                ** await response.json()
-            )
-
-        return result
 
 
     pass # end of AsyncNetworkInterface
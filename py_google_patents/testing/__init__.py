@@ -0,0 +1 @@
+r""" py_google_patents.testing.__init__ module """
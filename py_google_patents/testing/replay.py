@@ -0,0 +1,485 @@
+r""" py_google_patents.testing.replay module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, \
+    Union
+import argparse, asyncio, hashlib, json, random, urllib.parse
+
+
+# importing third-party modules ===============================================
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+
+# importing custom modules ====================================================
+from ..common.config import getLibraryLogger
+from ..core.cache import build_cache_key, QUERY_ENDPOINT, RESULT_ENDPOINT
+from ..core.network import AsyncNetworkClient
+from ..core.throttle import RetryPolicy
+from .synthetic import build_query_page, build_result_page
+
+
+# module variables ============================================================
+BANDWIDTH_CHUNK_SIZE: int = 16 * 1024
+""" bytes written at a time when the bandwidth is capped """
+
+
+# class definitions ===========================================================
+class Fixture(NamedTuple):
+    r""" a recorded response; 'url' is the url it was recorded from """
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+
+    pass # end of Fixture
+
+
+# -----------------------------------------------------------------------------
+class FixtureStore:
+    r""" class holding recorded responses, looked up by endpoint path and
+    query parameters like 'DiskResponseCache' entries (the scheme, host and
+    parameter encoding or order of the requested url do not matter)
+
+    - notes:
+        - the file format is the one of 'research/api_sample_responses.json':
+        a json list of {"url", "status", "response"} objects, where
+        "response" is the decoded json object or the html string
+    """
+
+
+    def __init__(self, fixtures: Optional[Iterable[Dict[str, Any]]] = None):
+        r""" Constructor
+        - arguments:
+            - fixtures: decoded fixture objects, see the class notes
+        """
+        self._fixtures: Dict[Tuple[str, str], Fixture] = {}
+        for fixture in fixtures or ():
+            self.add(
+                fixture["url"], fixture["response"], fixture.get("status", 200)
+            )
+        return
+
+
+    @classmethod
+    def load(cls, path: str) -> "FixtureStore":
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+
+    def add(
+        self,
+        url: Union[str, URL],
+        response: Union[Dict[str, Any], str, bytes],
+        status: int = 200,
+        content_type: Optional[str] = None
+        ) -> Fixture:
+        r""" Instance Method - Add
+        - arguments:
+            - url: the encoded url the response was received from
+            - response: a json object, an html string or a raw body
+            - status: http status of the response
+            - content_type: defaults to 'application/json' for json objects
+            and 'text/html' otherwise
+        - returns:
+            - the stored 'Fixture'; replaces any fixture of the same url
+        """
+        if isinstance(response, (dict, list)):
+            body: bytes = json.dumps(response).encode("utf-8")
+            content_type = content_type or "application/json"
+        else:
+            body = response.encode("utf-8") \
+                if isinstance(response, str) else bytes(response)
+            content_type = content_type or "text/html"
+        fixture: Fixture = Fixture(str(url), status, body, content_type)
+        self._fixtures[build_cache_key(URL(str(url), encoded=True))] = fixture
+        return fixture
+
+
+    def lookup(self, url: URL) -> Optional[Fixture]:
+        return self._fixtures.get(build_cache_key(url))
+
+
+    def dump(self) -> List[Dict[str, Any]]:
+        r""" Instance Method - Dump
+        - returns:
+            - the fixtures, as decoded objects of the file format
+        """
+        fixtures: List[Dict[str, Any]] = []
+        for fixture in self._fixtures.values():
+            response: Any = fixture.body.decode("utf-8", errors="replace")
+            if fixture.content_type == "application/json":
+                response = json.loads(response)
+            fixtures.append({
+                "url": fixture.url,
+                "response": response,
+                "status": fixture.status
+            })
+        return fixtures
+
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.dump(), file, indent=4, ensure_ascii=False)
+        return None
+
+
+    pass # end of FixtureStore
+
+
+# -----------------------------------------------------------------------------
+class ReplayServer:
+    r""" class running a local aiohttp stand-in for 'patents.google.com' that
+    answers the '/xhr/*' endpoints from a 'FixtureStore', so that
+    concurrency, retry and caching behaviour can be measured offline
+
+    - usage:
+        async with ReplayServer(FixtureStore.load(path), latency=0.05) \
+            as server:
+            async with server.createClient() as client:
+                await getPatentData("patent/US9145048B2/en", client=client)
+
+    - notes:
+        - faults are drawn from a 'random.Random' seeded with 'seed', so a
+        run with the same requests in the same order is reproducible
+        - a 429 is injected before an error, and both before the lookup
+        - in record mode ('upstream' given) a miss is fetched from the
+        upstream server and stored; the store is written to 'record_path'
+        when the server stops
+        - fixtures are served with an 'ETag' derived from their body, and a
+        request whose 'If-None-Match' matches it is answered 304
+    """
+
+
+    def __init__(
+        self,
+        store: Optional[FixtureStore] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        throttle_rate: float = 0.0,
+        retry_after: Optional[float] = 0,
+        bandwidth: Optional[int] = None,
+        synthesize: Union[bool, Dict[str, int]] = False,
+        upstream: Optional[str] = None,
+        record_path: Optional[str] = None,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        unix_path: Optional[str] = None
+        ):
+        r""" Constructor
+        - arguments:
+            - store: the 'FixtureStore' answered from; an empty store when
+            omitted
+            - latency: seconds every response is delayed by
+            - jitter: upper bound of a random delay added to 'latency'
+            - error_rate: probability of answering with 'error_status'
+            - error_status: http status of injected errors
+            - throttle_rate: probability of answering with a 429
+            - retry_after: 'Retry-After' seconds sent with a 429; None omits
+            the header
+            - bandwidth: bytes per second a response body is sent at; None
+            does not cap it
+            - synthesize: if True, a '/xhr/result' miss is answered with a
+            page from 'build_result_page' and a '/xhr/query' miss with one
+            from 'build_query_page'; a dict is passed to 'build_result_page'
+            as keyword arguments, ex: '{"citations": 2, "cited_by": 2}'
+            - upstream: scheme and host of the server misses are recorded
+            from, ex: 'https://patents.google.com'
+            - record_path: file the store is saved to when the server stops
+            - seed: seed of the fault injection
+            - host, port: address to listen on; port 0 picks a free port
+            - unix_path: a unix socket to listen on instead of 'host:port'
+        """
+        self.store: FixtureStore = store if store is not None \
+            else FixtureStore()
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.throttle_rate: float = throttle_rate
+        self.retry_after: Optional[float] = retry_after
+        self.bandwidth: Optional[int] = bandwidth
+        self.synthesize: Union[bool, Dict[str, int]] = synthesize
+        self.upstream: Optional[str] = upstream
+        self.record_path: Optional[str] = record_path
+        self.stats: Dict[str, int] = dict.fromkeys((
+            "requests", "served", "throttled", "errors", "misses",
+            "recorded", "synthesized", "not_modified", "bytes"
+        ), 0)
+
+        self._random: random.Random = random.Random(seed)
+        self._host: str = host
+        self._port: int = port
+        self._unix_path: Optional[str] = unix_path
+        self._runner: Optional[web.AppRunner] = None
+        self._upstream_client: Optional[AsyncNetworkClient] = None
+        self._base_url: Optional[str] = None
+        return
+
+
+    async def __aenter__(self) -> "ReplayServer":
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+        return None
+
+
+    def getBaseUrl(self) -> str:
+        r""" Instance Method - Get Base Url
+        - returns:
+            - scheme and host to pass to 'AsyncNetworkClient'
+        - raises:
+            - RuntimeError: if the server is not started
+        """
+        if self._base_url is None:
+            raise RuntimeError("replay server is not started")
+        return self._base_url
+
+
+    def createClient(self, **kwargs) -> AsyncNetworkClient:
+        r""" Instance Method - Create Client
+        - arguments:
+            - kwargs: extra 'AsyncNetworkClient' arguments
+        - returns:
+            - an 'AsyncNetworkClient' sending its requests to this server
+        """
+        if self._unix_path is not None:
+            path: str = self._unix_path
+            kwargs.setdefault(
+                "connector_factory", lambda: aiohttp.UnixConnector(path)
+            )
+        return AsyncNetworkClient(base_url=self.getBaseUrl(), **kwargs)
+
+
+    async def start(self) -> str:
+        r""" Instance Method - Start
+        - returns:
+            - the base url of the server
+        """
+        application: web.Application = web.Application()
+        application.router.add_get("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(application, access_log=None)
+        await self._runner.setup()
+
+        if self._unix_path is not None:
+            site: web.BaseSite = web.UnixSite(self._runner, self._unix_path)
+            await site.start()
+            # the host is ignored by the unix connector
+            self._base_url = "http://localhost"
+        else:
+            site = web.TCPSite(self._runner, self._host, self._port)
+            await site.start()
+            port: int = self._runner.addresses[0][1]
+            self._base_url = "http://{}:{}".format(self._host, port)
+
+        if self.upstream is not None:
+            self._upstream_client = await AsyncNetworkClient(
+                base_url=self.upstream, retry_policy=RetryPolicy.disabled()
+            ).open()
+        return self._base_url
+
+
+    async def stop(self) -> None:
+        if self._upstream_client is not None:
+            await self._upstream_client.close()
+            self._upstream_client = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        self._base_url = None
+        if self.record_path is not None:
+            self.store.save(self.record_path)
+        return None
+
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        delay: float = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._random.random() < self.throttle_rate:
+            self.stats["throttled"] += 1
+            headers: Dict[str, str] = {} if self.retry_after is None \
+                else {"Retry-After": "{:g}".format(self.retry_after)}
+            return web.Response(status=429, headers=headers)
+        if self._random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.Response(status=self.error_status)
+
+        url: URL = request.url
+        fixture: Optional[Fixture] = self.store.lookup(url)
+        if fixture is None:
+            fixture = await self._miss(request)
+        if fixture is None:
+            self.stats["misses"] += 1
+            return web.Response(status=404)
+
+        self.stats["served"] += 1
+        return await self._send(request, fixture)
+
+
+    async def _miss(self, request: web.Request) -> Optional[Fixture]:
+        if self._upstream_client is not None:
+            url: URL = URL(
+                self.upstream.rstrip("/") + request.raw_path, encoded=True
+            )
+
+            async def _read(
+                response: aiohttp.ClientResponse
+                ) -> Tuple[bytes, str]:
+                return await response.read(), response.content_type
+
+            try:
+                body, content_type = await self._upstream_client.request(
+                    url, _read
+                )
+            except aiohttp.client_exceptions.ClientResponseError as error:
+                getLibraryLogger().debug("not recording %s: %s", url, error)
+                return None
+            self.stats["recorded"] += 1
+            return self.store.add(url, body, 200, content_type)
+
+        if self.synthesize and request.path == RESULT_ENDPOINT \
+            and "id" in request.query:
+            self.stats["synthesized"] += 1
+            return Fixture(
+                str(request.url), 200,
+                build_result_page(
+                    request.query["id"],
+                    **(self.synthesize if isinstance(self.synthesize, dict)
+                       else {})
+                ).encode("utf-8"),
+                "text/html"
+            )
+        if self.synthesize and request.path == QUERY_ENDPOINT \
+            and "url" in request.query:
+            # the page and page size travel inside the search parameters
+            params: List[Tuple[str, str]] = urllib.parse.parse_qsl(
+                request.query["url"], keep_blank_values=True
+            )
+            options: Dict[str, str] = dict(params)
+            query_url: str = urllib.parse.urlencode([
+                (key, value) for key, value in params
+                if key not in ("page", "num")
+            ], safe="()")
+            self.stats["synthesized"] += 1
+            return Fixture(
+                str(request.url), 200,
+                json.dumps(build_query_page(
+                    query_url, int(options.get("page", 0)),
+                    int(options.get("num", 10))
+                )).encode("utf-8"),
+                "application/json"
+            )
+        return None
+
+
+    async def _send(
+        self,
+        request: web.Request,
+        fixture: Fixture
+        ) -> web.StreamResponse:
+        headers: Dict[str, str] = {"ETag": '"{}"'.format(
+            hashlib.blake2b(fixture.body, digest_size=8).hexdigest()
+        )}
+        if fixture.status == 200 \
+            and request.headers.get("If-None-Match") == headers["ETag"]:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+
+        self.stats["bytes"] += len(fixture.body)
+        if self.bandwidth is None:
+            return web.Response(
+                body=fixture.body, status=fixture.status,
+                content_type=fixture.content_type, charset="utf-8",
+                headers=headers
+            )
+
+        response: web.StreamResponse = web.StreamResponse(
+            status=fixture.status, headers=headers
+        )
+        response.content_type = fixture.content_type
+        response.charset = "utf-8"
+        response.content_length = len(fixture.body)
+        await response.prepare(request)
+        chunk_size: int = max(1, min(BANDWIDTH_CHUNK_SIZE, self.bandwidth))
+        for start in range(0, len(fixture.body), chunk_size):
+            chunk: bytes = fixture.body[start:start + chunk_size]
+            await asyncio.sleep(len(chunk) / self.bandwidth)
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+
+    pass # end of ReplayServer
+
+
+# method definitions ==========================================================
+async def _serve(server: ReplayServer) -> None:
+    async with server:
+        print("replaying {} fixtures on {}".format(
+            len(server.store), server.getBaseUrl()
+        ))
+        await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    r""" Functional Requirement - MAIN
+    - arguments:
+        - argv: command line arguments; 'sys.argv[1:]' when omitted
+    - returns:
+    - notes:
+        - ex: python -m py_google_patents.testing.replay
+        --fixtures research/api_sample_responses.json --latency 0.05
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="local stand-in server for 'patents.google.com'"
+    )
+    parser.add_argument("--fixtures", help="fixture file to replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=int, default=None)
+    parser.add_argument("--synthesize", action="store_true")
+    parser.add_argument("--record", metavar="PATH", default=None,
+        help="record misses from --upstream into PATH")
+    parser.add_argument("--upstream", default="https://patents.google.com")
+    parser.add_argument("--seed", type=int, default=None)
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    store: FixtureStore = FixtureStore.load(arguments.fixtures) \
+        if arguments.fixtures else FixtureStore()
+    server: ReplayServer = ReplayServer(
+        store, latency=arguments.latency, jitter=arguments.jitter,
+        error_rate=arguments.error_rate,
+        throttle_rate=arguments.throttle_rate,
+        bandwidth=arguments.bandwidth, synthesize=arguments.synthesize,
+        upstream=arguments.upstream if arguments.record else None,
+        record_path=arguments.record, seed=arguments.seed,
+        host=arguments.host, port=arguments.port
+    )
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        pass
+    return None
+
+
+if __name__ == "__main__":
+    main()
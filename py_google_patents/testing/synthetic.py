@@ -0,0 +1,232 @@
+r""" py_google_patents.testing.synthetic module """
+
+
+# importing standard modules ==================================================
+from typing import Any, Dict, List
+import html, random, re, zlib
+
+
+# module variables ============================================================
+_WORDS: List[str] = (
+    "apparatus method system engine motor controller battery vehicle hybrid "
+    "device assembly housing shaft rotor stator sensor signal circuit module "
+    "power torque clutch gear valve fuel electric combustion coupled "
+    "configured wherein comprising plurality first second output input"
+).split()
+
+_ID_URL_PATTERN = re.compile(r"patent/(?P<number>[^/]+)(?:/(?P<lang>\w+))?")
+
+
+# helper definitions ==========================================================
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize()
+
+
+def _date(rng: random.Random) -> str:
+    return "{:04d}-{:02d}-{:02d}".format(
+        rng.randint(1990, 2022), rng.randint(1, 12), rng.randint(1, 28)
+    )
+
+
+def _number(rng: random.Random) -> str:
+    return "{}{}{}".format(
+        rng.choice(("US", "EP", "CN", "JP", "WO")),
+        rng.randint(1000000, 99999999), rng.choice(("A", "A1", "B1", "B2"))
+    )
+
+
+def _publication_rows(rng: random.Random, itemprop: str, count: int) -> str:
+    rows: List[str] = []
+    for _ in range(count):
+        number: str = _number(rng)
+        rows.append(
+            '<tr itemprop="{}" itemscope repeat>'
+            '<td><a href="/patent/{}/en"><span itemprop="publicationNumber">{}'
+            '</span></a></td>'
+            '<td itemprop="priorityDate">{}</td>'
+            '<td itemprop="publicationDate">{}</td>'
+            '<td><span itemprop="assigneeOriginal">{} Corp</span></td>'
+            '<td itemprop="title">{}</td></tr>'.format(
+                itemprop, number, number, _date(rng), _date(rng),
+                rng.choice(_WORDS).capitalize(), _sentence(rng, 6)
+            )
+        )
+    return "\n".join(rows)
+
+
+# method definitions ==========================================================
+def build_result_page(
+    id_url: str,
+    claims: int = 20,
+    paragraphs: int = 60,
+    citations: int = 25,
+    cited_by: int = 25
+    ) -> str:
+    r""" Functional Requirement - BUILD RESULT PAGE
+    - arguments:
+        - id_url: the 'id' sent to the '/xhr/result' endpoint; ex:
+        'patent/US9145048B2/en'
+        - claims: number of claims
+        - paragraphs: number of description paragraphs
+        - citations: number of patent citations
+        - cited_by: number of citing publications
+    - returns:
+        - a 'str' object shaped like the html returned by the '/xhr/result'
+        endpoint, with every section 'parse_result_page' extracts
+    - notes:
+        - the content is random but deterministic: the same arguments always
+        produce the same page
+    """
+    match = _ID_URL_PATTERN.match(id_url)
+    number: str = match.group("number") if match else id_url
+    rng: random.Random = random.Random(zlib.crc32(id_url.encode("utf-8")))
+    title: str = html.escape(_sentence(rng, 8))
+
+    description: str = "\n".join(
+        '<div id="p-{0:04d}" num="{0:04d}" class="description-paragraph">'
+        '{1}.</div>'.format(index + 1, _sentence(rng, rng.randint(20, 80)))
+        for index in range(paragraphs)
+    )
+    claim_list: List[str] = [
+        '<div id="CLM-00001" num="00001" class="claim"><div class="claim-text">'
+        '1. An {} comprising {}.</div></div>'.format(
+            rng.choice(_WORDS), _sentence(rng, 30).lower()
+        )
+    ]
+    for index in range(2, claims + 1):
+        claim_list.append(
+            '<div class="claim-dependent"><div id="CLM-{0:05d}" num="{0:05d}" '
+            'class="claim"><div class="claim-text">{0}. The {1} of '
+            '<claim-ref idref="CLM-00001">claim 1</claim-ref>, wherein {2}.'
+            '</div></div></div>'.format(
+                index, rng.choice(_WORDS), _sentence(rng, 20).lower()
+            )
+        )
+    priority_date, filing_date, publication_date = sorted(
+        _date(rng) for _ in range(3)
+    )
+
+    return """<article class="result" itemscope itemtype="http://schema.org/ScholarlyArticle">
+  <span itemprop="title">{title}</span>
+  <dl>
+    <dd itemprop="publicationNumber">{number}</dd>
+    <dd itemprop="countryCode">{country}</dd>
+    <dd itemprop="inventor" repeat>{inventor}</dd>
+    <dd itemprop="assigneeOriginal" repeat>{assignee} Corp</dd>
+    <dd><time itemprop="priorityDate" datetime="{priority_date}">{priority_date}</time></dd>
+    <dd><time itemprop="filingDate" datetime="{filing_date}">{filing_date}</time></dd>
+    <dd><time itemprop="publicationDate" datetime="{publication_date}">{publication_date}</time></dd>
+  </dl>
+  <section>
+    <h2>Classifications</h2>
+    <ul itemprop="cpcs" itemscope repeat>
+      <li itemprop="cpcs" itemscope repeat>
+        <span itemprop="Code">B60K6/20</span>&mdash;<span itemprop="Description">{cpc}</span>
+        <meta itemprop="Leaf" content="true">
+        <meta itemprop="FirstCode" content="true">
+      </li>
+    </ul>
+  </section>
+  <section itemprop="abstract" itemscope>
+    <div itemprop="content" html><abstract><div class="abstract">{abstract}.</div></abstract></div>
+  </section>
+  <section itemprop="description" itemscope>
+    <div itemprop="content" html><div class="description">
+{description}
+    </div></div>
+  </section>
+  <section itemprop="claims" itemscope>
+    <div itemprop="content" html><div class="claims">
+{claims}
+    </div></div>
+  </section>
+  <section itemprop="application" itemscope>
+    <meta itemprop="applicationNumber" content="{country}{application}">
+    <dl>
+      <dd itemprop="events" itemscope repeat>
+        <time itemprop="date" datetime="{filing_date}">{filing_date}</time>
+        <span itemprop="title">Application filed</span>
+        <span itemprop="type">filed</span>
+      </dd>
+    </dl>
+  </section>
+  <section itemprop="family" itemscope>
+    <h2>ID={family_id}</h2>
+    <table>
+      <tr itemprop="applications" itemscope repeat>
+        <td><span itemprop="applicationNumber">{country}{application}</span><span itemprop="representativePublication">{number}</span></td>
+        <td itemprop="filingDate">{filing_date}</td>
+        <td itemprop="title">{title}</td>
+      </tr>
+    </table>
+    <table>
+{citations}
+    </table>
+    <table>
+{cited_by}
+    </table>
+  </section>
+</article>
+""".format(
+        title=title, number=html.escape(number), country=number[:2],
+        inventor=rng.choice(_WORDS).capitalize(),
+        assignee=rng.choice(_WORDS).capitalize(),
+        priority_date=priority_date, filing_date=filing_date,
+        publication_date=publication_date, cpc=_sentence(rng, 6),
+        abstract=_sentence(rng, 60), description=description,
+        claims="\n".join(claim_list), application=rng.randint(100000, 999999),
+        family_id=rng.randint(10000000, 99999999),
+        citations=_publication_rows(rng, "backwardReferencesOrig", citations),
+        cited_by=_publication_rows(rng, "forwardReferencesOrig", cited_by)
+    )
+
+
+def build_query_page(
+    query_url: str,
+    page: int = 0,
+    page_size: int = 10,
+    total_results: int = 1000
+    ) -> Dict[str, Any]:
+    r""" Functional Requirement - BUILD QUERY PAGE
+    - arguments:
+        - query_url: the search parameters, without the page and page size;
+        ex: 'q=(hybrid+AND+engine)'
+        - page: index of the page, from 0
+        - page_size: results per page
+        - total_results: number of documents matching the query
+    - returns:
+        - a 'dict' shaped like the json returned by the '/xhr/query'
+        endpoint; pages past the last one have no results
+    - notes:
+        - like the server, at most 100 pages are served
+        - the content is random but deterministic, and the documents of a
+        query are distinct across its pages
+    """
+    rng: random.Random = random.Random(zlib.crc32(query_url.encode("utf-8")))
+    offset: int = rng.randint(1000000, 9000000)
+    total_pages: int = min(100, -(-total_results // page_size))
+    first: int = page * page_size
+    count: int = max(0, min(page_size, total_results - first)) \
+        if page < total_pages else 0
+    results: List[Dict[str, Any]] = []
+    for rank in range(first, first + count):
+        number: str = "US{}B2".format(offset + rank)
+        results.append({
+            "id": "patent/{}/en".format(number),
+            "rank": rank,
+            "patent": {
+                "title": " <b>{}</b> {}".format(
+                    rng.choice(_WORDS).capitalize(), _sentence(rng, 5).lower()
+                ),
+                "publication_number": number,
+                "language": "en",
+                "publication_date": _date(rng),
+            },
+        })
+    return {"results": {
+        "total_num_results": total_results,
+        "total_num_pages": total_pages,
+        "many_results": False,
+        "num_page": page,
+        "cluster": [{"result": results}] if results else [],
+    }}
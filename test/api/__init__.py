@@ -0,0 +1 @@
+r""" test.api.__init__ module """
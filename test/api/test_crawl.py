@@ -0,0 +1,125 @@
+r""" test.api.test_crawl module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.crawl import CrawlEdge, PatentGraphCrawler
+from py_google_patents.testing.replay import ReplayServer
+
+
+# TEST definition =============================================================
+class TestPatentGraphCrawler(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'PatentGraphCrawler' against a replay server
+    synthesizing pages with two citations and two citing documents """
+
+    async def asyncSetUp(self) -> None:
+        self.server: ReplayServer = ReplayServer(synthesize={
+            "claims": 1, "paragraphs": 1, "citations": 2, "cited_by": 2
+        })
+        await self.server.start()
+        self.client = self.server.createClient()
+        await self.client.open()
+        self.directory = tempfile.TemporaryDirectory()
+        return None
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.stop()
+        self.directory.cleanup()
+        return None
+
+    async def _crawl(self, crawler: PatentGraphCrawler) -> List[CrawlEdge]:
+        return [edge async for edge in crawler.crawl()]
+
+    async def test_breadth_first_crawl(self) -> None:
+        crawler: PatentGraphCrawler = PatentGraphCrawler(
+            ["patent/US1B2/en", "patent/US1B2/de"], max_depth=2,
+            client=self.client, concurrency=4
+        )
+        edges: List[CrawlEdge] = await self._crawl(crawler)
+
+        # the seed, deduplicated across languages, and its 4 neighbours
+        self.assertEqual(crawler.stats["fetched"], 5)
+        self.assertEqual(self.server.stats["requests"], 5)
+        self.assertEqual(len(edges), 20)
+        self.assertEqual(edges[0].source, "US1B2")
+        self.assertEqual([edge.depth for edge in edges[:4]], [0] * 4)
+        self.assertEqual(
+            sorted(edge.relation for edge in edges[:4]),
+            ["cited_by", "cited_by", "cites", "cites"]
+        )
+        self.assertEqual(
+            {edge.source for edge in edges[4:]},
+            {edge.target for edge in edges[:4]}
+        )
+
+        bloom: PatentGraphCrawler = PatentGraphCrawler(
+            ["patent/US1B2/en"], max_depth=2, relations=["cites"],
+            client=self.client, expected_nodes=1000
+        )
+        cites: List[CrawlEdge] = await self._crawl(bloom)
+        self.assertEqual(bloom.stats["fetched"], 3)
+        cited = {edge.target for edge in cites if edge.depth == 0}
+        self.assertEqual(set(cites), {
+            edge for edge in edges if edge.relation == "cites"
+            and (edge.depth == 0 or edge.source in cited)
+        })
+        with self.assertRaises(ValueError):
+            PatentGraphCrawler(["patent/US1B2/en"], relations=["priority"])
+        return None
+
+    async def test_checkpoint_and_resume(self) -> None:
+        path: str = os.path.join(self.directory.name, "crawl.json")
+        full: List[CrawlEdge] = await self._crawl(PatentGraphCrawler(
+            ["patent/US1B2/en"], max_depth=3, client=self.client
+        ))
+
+        first: PatentGraphCrawler = PatentGraphCrawler(
+            ["patent/US1B2/en"], max_depth=3, client=self.client,
+            concurrency=2, checkpoint_path=path, checkpoint_every=2
+        )
+        edges: List[CrawlEdge] = []
+        async for edge in first.crawl():
+            edges.append(edge)
+            if first.stats["fetched"] == 5:
+                break
+        self.assertEqual(first.stats["checkpoints"], 2)
+
+        resumed: PatentGraphCrawler = PatentGraphCrawler(
+            ["patent/ignored/en"], max_depth=3, client=self.client,
+            checkpoint_path=path
+        )
+        self.assertGreater(resumed.getPendingCount(), 0)
+        edges += await self._crawl(resumed)
+
+        self.assertEqual(set(edges), set(full))
+        self.assertEqual(resumed.stats["fetched"], 21)
+        self.assertEqual(resumed.getPendingCount(), 0)
+        # a finished crawl resumes to nothing
+        self.assertEqual(await self._crawl(PatentGraphCrawler(
+            [], max_depth=3, client=self.client, checkpoint_path=path
+        )), [])
+        return None
+
+    async def test_failures_are_skipped(self) -> None:
+        self.server.synthesize = False
+        crawler: PatentGraphCrawler = PatentGraphCrawler(
+            ["patent/US1B2/en"], client=self.client
+        )
+        self.assertEqual(await self._crawl(crawler), [])
+        self.assertEqual(crawler.getFailures(), ["patent/US1B2/en"])
+        return None
+
+    pass # end of TestPatentGraphCrawler
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+r""" test.api.test_query module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+from unittest import mock
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.data import getQueryPatentDataMany, getQueryResults
+from py_google_patents.core.bulk import BulkItemResult
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.core import network
+from py_google_patents.core.network import build_query_endpoint_url
+from py_google_patents.models.response_models import GoogleParseQueryResult, \
+    PatentMetaData
+from py_google_patents.testing.replay import ReplayServer
+
+
+# module variables ============================================================
+QUERY_URL: str = "q=(hybrid+AND+engine)&oq=(hybrid+AND+engine)"
+
+
+# TEST definition =============================================================
+class TestQueryResults(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'getQueryResults' against a replay server synthesizing
+    the pages of a query matching 1000 documents """
+
+    async def asyncSetUp(self) -> None:
+        self.server: ReplayServer = ReplayServer(synthesize={
+            "claims": 1, "paragraphs": 1
+        })
+        await self.server.start()
+        self.client = self.server.createClient()
+        await self.client.open()
+        return None
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.stop()
+        return None
+
+    def test_build_query_endpoint_url(self) -> None:
+        self.assertEqual(
+            str(build_query_endpoint_url(QUERY_URL)),
+            "https://patents.google.com/xhr/query?url=q%3D(hybrid%2BAND%2B"
+            "engine)%26oq%3D(hybrid%2BAND%2Bengine)&exp=&tags="
+        )
+        self.assertTrue(
+            str(build_query_endpoint_url(QUERY_URL, 2, 25)).endswith(
+                "%26num%3D25%26page%3D2&exp=&tags="
+            )
+        )
+        return None
+
+    async def test_pagination(self) -> None:
+        results: List[PatentMetaData] = [
+            result async for result in getQueryResults(
+                GoogleParseQueryResult(query_url=QUERY_URL), self.client,
+                max_results=45, page_size=20
+            )
+        ]
+        self.assertEqual(len(results), 45)
+        self.assertEqual(len({result.id for result in results}), 45)
+        # only the pages holding the first 45 results are requested
+        self.assertEqual(self.server.stats["requests"], 3)
+
+        text: List[PatentMetaData] = [
+            result async for result in getQueryResults(
+                "(hybrid AND engine)", self.client, max_results=10
+            )
+        ]
+        self.assertEqual(len(text), 10)
+
+        # text is never mistaken for parameters, even with a '='
+        async def _first(query: str, raw_params: bool = False) -> str:
+            return [
+                result async for result in getQueryResults(
+                    query, self.client, max_results=1, raw_params=raw_params
+                )
+            ][0].id
+
+        self.assertEqual(
+            await _first("a=b"), await _first("q=a%3Db", raw_params=True)
+        )
+        self.assertNotEqual(
+            await _first("a=b"), await _first("a=b", raw_params=True)
+        )
+        return None
+
+    async def test_default_client(self) -> None:
+        async def _ids(client: network.AsyncNetworkClient = None) -> List[str]:
+            return [
+                result.id async for result in getQueryResults(
+                    "(hybrid AND engine)", client, max_results=3
+                )
+            ]
+
+        # without a client, one is opened on the default base url: point it
+        # at the replay server instead
+        with mock.patch.object(
+            network, "AsyncNetworkClient", self.server.createClient
+            ):
+            default: List[str] = await _ids()
+        # the text is encoded once, exactly as with a client
+        self.assertEqual(default, await _ids(self.client))
+        # encoding twice would have searched for the parameter string itself
+        self.assertNotEqual(
+            default, [
+                result.id async for result in getQueryResults(
+                    "q=(hybrid+AND+engine)", self.client, max_results=3
+                )
+            ]
+        )
+        return None
+
+    async def test_prefetch(self) -> None:
+        iterator = getQueryResults(
+            QUERY_URL, self.client, prefetch=3, raw_params=True
+        )
+        first: PatentMetaData = await iterator.__anext__()
+        self.assertTrue(first.id.startswith("patent/"))
+        # the pages after the first are downloading while it is consumed
+        for _ in range(200):
+            if self.server.stats["requests"] == 4:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.server.stats["requests"], 4)
+        await iterator.aclose()
+
+        count: int = 0
+        async for _ in getQueryResults(
+            QUERY_URL, self.client, prefetch=4, raw_params=True
+            ):
+            count += 1
+        # the server serves 100 pages of 10 results at most
+        self.assertEqual(count, 1000)
+        return None
+
+    async def test_query_patent_data_many(self) -> None:
+        items: List[BulkItemResult] = [
+            item async for item in getQueryPatentDataMany(
+                QUERY_URL, self.client, max_results=15, ordered=True,
+                executor=ParseExecutor("inline"), raw_params=True
+            )
+        ]
+        self.assertEqual(len(items), 15)
+        for item in items:
+            self.assertIsNone(item.error)
+            self.assertEqual(
+                item.result.publication_number, item.item.split("/")[1]
+            )
+        return None
+
+    pass # end of TestQueryResults
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+r""" test.api.test_sync module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, asyncio, concurrent.futures
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.sync import SyncClient
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+
+
+# TEST definition =============================================================
+class TestSyncClient(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'SyncClient' from worker threads, against a replay
+    server running on the test's event loop """
+
+    async def asyncSetUp(self) -> None:
+        store: FixtureStore = FixtureStore.load(os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "research", "api_sample_responses.json"
+        ))
+        self.server: ReplayServer = ReplayServer(
+            store, synthesize=True, latency=0.01
+        )
+        await self.server.start()
+        self.executor: ParseExecutor = ParseExecutor("inline")
+        self.client: SyncClient = SyncClient(
+            executor=self.executor, base_url=self.server.getBaseUrl()
+        )
+        return None
+
+    async def asyncTearDown(self) -> None:
+        await asyncio.to_thread(self.client.close)
+        await self.server.stop()
+        return None
+
+    async def test_threads_share_one_client(self) -> None:
+        def _call(index: int):
+            return self.client.get_patent("patent/US{}B2/en".format(index % 8))
+
+        with concurrent.futures.ThreadPoolExecutor(16) as pool:
+            results = await asyncio.gather(*[
+                asyncio.get_running_loop().run_in_executor(pool, _call, index)
+                for index in range(64)
+            ])
+        session = await asyncio.to_thread(
+            lambda: self.client.getClient()._session
+        )
+
+        self.assertEqual(
+            {result.publication_number for result in results},
+            {"US{}B2".format(index) for index in range(8)}
+        )
+        self.assertIs(session, self.client.getClient()._session)
+        self.assertLessEqual(self.server.stats["requests"], 64)
+        return None
+
+    async def test_recommendations_and_many(self) -> None:
+        first = await asyncio.to_thread(
+            self.client.get_recommendations, "us9145048"
+        )
+        second = await asyncio.to_thread(
+            self.client.get_recommendations, "us9145048"
+        )
+        items = await asyncio.to_thread(
+            self.client.get_patents_many,
+            ["patent/US1A/en", "patent/US2A/en", "patent/US3A/en"]
+        )
+
+        results = await asyncio.to_thread(
+            self.client.get_query_results, "(hybrid AND engine)", 12
+        )
+
+        self.assertEqual(first.results[0].result.number, "US9145048B2")
+        self.assertIs(first, second)
+        self.assertEqual(
+            [item.result.publication_number for item in items],
+            ["US1A", "US2A", "US3A"]
+        )
+        self.assertEqual(len(results), 12)
+        return None
+
+    async def test_timeout_and_close(self) -> None:
+        self.server.latency = 1.0
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            await asyncio.to_thread(
+                self.client.get_patent, "patent/US9A/en", timeout=0.05
+            )
+        await asyncio.to_thread(self.client.close)
+        with self.assertRaises(RuntimeError):
+            await asyncio.to_thread(self.client.get_patent, "patent/US9A/en")
+        return None
+
+    async def test_default_executor(self) -> None:
+        client: SyncClient = SyncClient(base_url=self.server.getBaseUrl())
+        patent = await asyncio.to_thread(
+            client.get_patent, "patent/US1B2/en"
+        )
+        executor: ParseExecutor = client._executor
+        await asyncio.to_thread(client.close)
+
+        self.assertEqual(patent.publication_number, "US1B2")
+        # a thread pool owned by the client, not the process pool default
+        self.assertEqual(executor.kind, "thread")
+        self.assertIsNone(executor._pool)
+        return None
+
+    pass # end of TestSyncClient
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+r""" test.api.test_typeahead module """
+
+
+# importing standard module ===================================================
+import sys, os, asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.typeahead import TypeaheadSession, \
+    narrow_recommendations
+from py_google_patents.core.data_parsers import \
+    parse_parse_endpoint_response_data
+from py_google_patents.core.network import build_parse_endpoint_url
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+
+
+# TEST definition =============================================================
+class TestTypeaheadSession(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'TypeaheadSession' against a replay server """
+
+    async def asyncSetUp(self) -> None:
+        store: FixtureStore = FixtureStore.load(os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "research", "api_sample_responses.json"
+        ))
+        store.add(build_parse_endpoint_url("US 9145048-B"), {
+            "error_no_patents_found": False,
+            "results": [{"result": {
+                "id": "patent/US9145048B2/en", "number": "US9145048B2",
+                "title": "Apparatus for hybrid engine control"
+            }}]
+        })
+        self.server: ReplayServer = ReplayServer(store, latency=0.01)
+        await self.server.start()
+        self.client = self.server.createClient()
+        await self.client.open()
+        return None
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.stop()
+        return None
+
+    async def test_debounce_and_local_filtering(self) -> None:
+        session: TypeaheadSession = TypeaheadSession(
+            self.client, debounce=0.05, local_filtering=True, memoize=False
+        )
+        text: str = "us9145048"
+        calls = []
+        for length in range(1, len(text) + 1):
+            calls.append(asyncio.ensure_future(session.query(text[:length])))
+            await asyncio.sleep(0.005)
+        responses = await asyncio.gather(*calls)
+
+        # only the keystroke the user paused on was sent
+        self.assertEqual(responses[:-1], [None] * (len(text) - 1))
+        self.assertEqual(
+            [item.result.number for item in responses[-1].results],
+            ["US9145048B2", "US6182754B1"]
+        )
+        self.assertEqual(self.server.stats["requests"], 1)
+
+        # the list holds a non-prefix match: the server is asked
+        longer = await session.query("US 9145048-B")
+        self.assertEqual(
+            [item.result.number for item in longer.results], ["US9145048B2"]
+        )
+        self.assertEqual(self.server.stats["requests"], 2)
+
+        # a pure prefix list is narrowed locally, without waiting
+        narrowed = await asyncio.wait_for(session.query("US9145048B2"), 0.01)
+        self.assertEqual(narrowed.results, longer.results)
+        # no cached patent matches: the server is asked
+        missing = await session.query("us914504856")
+        self.assertTrue(missing.error_no_patents_found)
+        self.assertEqual(self.server.stats["requests"], 3)
+        self.assertEqual(session.stats, {
+            "queries": 12, "local": 1, "cached": 0, "network": 3,
+            "superseded": 8
+        })
+        return None
+
+    async def test_cancel_in_flight(self) -> None:
+        self.server.latency = 0.5
+        session: TypeaheadSession = TypeaheadSession(
+            self.client, debounce=0.0, memoize=False
+        )
+        first = asyncio.ensure_future(session.query("us91"))
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.server.stats["requests"], 1)
+
+        self.server.latency = 0.0
+        second = await session.query("US200465")
+        self.assertIsNone(await first)
+        self.assertEqual(second.results[0].result.number, "US200465A")
+
+        # a cancelled caller is not mistaken for a superseded query
+        third = asyncio.ensure_future(session.query("us9145048"))
+        await asyncio.sleep(0)
+        third.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await third
+        return None
+
+    def test_narrow_recommendations(self) -> None:
+        queries = parse_parse_endpoint_response_data(
+            {"results": [{"query_url": "q=us91"}]}
+        )
+        empty = parse_parse_endpoint_response_data(
+            {"error_no_patents_found": True}
+        )
+        self.assertIsNone(narrow_recommendations(queries, "us91", "us914"))
+        self.assertIsNone(narrow_recommendations(empty, "us91", "us914"))
+
+        def patents(*numbers: str):
+            return parse_parse_endpoint_response_data({"results": [
+                {"result": {"id": "patent/{}/en".format(number),
+                            "number": number}}
+                for number in numbers
+            ]})
+
+        self.assertEqual(
+            narrow_recommendations(
+                patents("US9145048B2", "US9145049B2"), "us914504", "US9145048"
+            ).results,
+            patents("US9145048B2").results
+        )
+        # a non-prefix match, a possibly truncated list, a non-number text
+        self.assertIsNone(narrow_recommendations(
+            patents("US9145048B2", "US6182754B1"), "us9145048", "us9145048b"
+        ))
+        self.assertIsNone(narrow_recommendations(
+            patents(*["US91{}B2".format(index) for index in range(10)]),
+            "us91", "us910"
+        ))
+        self.assertIsNone(narrow_recommendations(
+            patents("US9145048B2"), "us9", "us9 hybrid"
+        ))
+        return None
+
+    pass # end of TestTypeaheadSession
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+r""" test.common.__init__ module """
@@ -0,0 +1,74 @@
+r""" test.common.test_config module """
+
+
+# importing standard module ===================================================
+from typing import Dict, Any
+import sys, os, io, json, logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.common.config import getLibraryLogger, enableLogging, \
+    disableLogging, LIB_LOGGER_NAME
+
+
+# TEST definition =============================================================
+class TestCommonConfig(unittest.TestCase):
+    r""" class to test the logging set up in 'py_google_patents.common.config' """
+
+    def tearDown(self) -> None:
+        disableLogging()
+        return None
+
+    def test_library_logger_is_silent_by_default(self) -> None:
+        logger: logging.Logger = getLibraryLogger()
+
+        self.assertEqual(logger.name, LIB_LOGGER_NAME)
+        self.assertIsNot(logger, logging.getLogger())
+        self.assertTrue(any(
+            isinstance(handler, logging.NullHandler)
+            for handler in logger.handlers
+        ))
+        self.assertEqual(logger.level, logging.NOTSET)
+        self.assertTrue(logger.propagate)
+        return None
+
+    def test_enable_logging(self) -> None:
+        stream: io.StringIO = io.StringIO()
+        enableLogging(logging.DEBUG, stream=stream)
+        enableLogging(logging.INFO, stream=stream)
+        getLibraryLogger().debug("dropped")
+        getLibraryLogger().info("kept %d", 1)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith("kept 1"))
+        return None
+
+    def test_structured_logging(self) -> None:
+        stream: io.StringIO = io.StringIO()
+        enableLogging(structured=True, stream=stream)
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            getLibraryLogger().getChild("network").debug(
+                "retrying %s", "url", exc_info=True,
+                extra={"attempt": 2, "delay": 0.5}
+            )
+
+        document: Dict[str, Any] = json.loads(stream.getvalue())
+        self.assertEqual(document["message"], "retrying url")
+        self.assertEqual(document["level"], "DEBUG")
+        self.assertEqual(document["logger"], LIB_LOGGER_NAME + ".network")
+        self.assertEqual((document["attempt"], document["delay"]), (2, 0.5))
+        self.assertIn("ValueError: broken", document["exception"])
+        return None
+
+    pass # end of TestCommonConfig
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+r""" test.core.test_archive module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.archive import PageArchive, train_dictionary
+from py_google_patents.core.data_parsers import \
+    parse_result_endpoint_response_data
+from py_google_patents.testing.synthetic import build_result_page
+
+
+# TEST definition =============================================================
+class TestPageArchive(unittest.TestCase):
+    r""" class to test 'PageArchive' """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pages: List[str] = [
+            build_result_page(
+                "patent/US{}B2/en".format(index), claims=5, paragraphs=10,
+                citations=5, cited_by=5
+            )
+            for index in range(30)
+        ]
+        cls.dictionary: bytes = train_dictionary(cls.pages[:20])
+        return None
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, "pages.pgar")
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    def _fill(self, dictionary: bytes = b"") -> None:
+        with PageArchive(self.path, "a", dictionary) as archive:
+            for index, page in enumerate(self.pages):
+                archive.add("patent/US{}B2/en".format(index), page)
+        return None
+
+    def test_round_trip_and_dictionary(self) -> None:
+        self._fill(self.dictionary)
+        with PageArchive(self.path) as archive:
+            self.assertEqual(len(archive), 30)
+            self.assertIn("US7B2", archive)
+            self.assertEqual(archive.get("patent/US7B2/de"), self.pages[7])
+            self.assertIsNone(archive.get("US99B2"))
+            self.assertEqual(
+                [page for _, page in archive.iterPages()], self.pages
+            )
+            with self.assertRaises(ValueError):
+                archive.add("US1B2", self.pages[1])
+            with_dictionary: int = archive.getStats()["stored_bytes"]
+
+        os.remove(self.path)
+        os.remove(self.path + ".idx")
+        self._fill()
+        with PageArchive(self.path) as archive:
+            self.assertEqual(archive.get("US29B2"), self.pages[29])
+            self.assertLess(with_dictionary, archive.getStats()["stored_bytes"])
+        return None
+
+    def test_append_supersede_and_recovery(self) -> None:
+        self._fill(self.dictionary)
+        with PageArchive(self.path, "a") as archive:
+            archive.add("US3B2", self.pages[4])
+            # readable before the archive is closed
+            self.assertEqual(archive.get("US3B2"), self.pages[4])
+            self.assertEqual(archive.keys()[-1], "US3B2")
+            self.assertEqual(len(archive), 30)
+
+        # the index lost its last lines and the data file has a partial record
+        with open(self.path + ".idx", "r+", encoding="utf-8") as file:
+            lines = file.readlines()
+            file.seek(0)
+            file.truncate()
+            file.writelines(lines[:25])
+            file.write(lines[25][:5])
+        with open(self.path, "ab") as file:
+            file.write(b"\x05\x00\xff\xff")
+
+        with PageArchive(self.path, "a") as archive:
+            self.assertEqual(len(archive), 30)
+            self.assertEqual(archive.get("US3B2"), self.pages[4])
+            self.assertEqual(archive.get("US29B2"), self.pages[29])
+            archive.add("US30B2", self.pages[0])
+        with PageArchive(self.path) as archive:
+            self.assertEqual(archive.get("US30B2"), self.pages[0])
+        return None
+
+    def test_iter_responses(self) -> None:
+        self._fill(self.dictionary)
+        expected = [
+            parse_result_endpoint_response_data(page) for page in self.pages
+        ]
+        with PageArchive(self.path) as archive:
+            inline = list(archive.iterResponses(chunk_size=7))
+            pooled = list(archive.iterResponses(processes=2, chunk_size=4))
+            claims = list(archive.iterResponses(sections=["claims"]))
+
+        self.assertEqual([response for _, response in inline], expected)
+        self.assertEqual(pooled, inline)
+        self.assertEqual(inline[0][0], "US0B2")
+        self.assertEqual(claims[0][1].claims, expected[0].claims)
+        self.assertEqual(claims[0][1].citations, [])
+        return None
+
+    pass # end of TestPageArchive
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
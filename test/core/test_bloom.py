@@ -0,0 +1,57 @@
+r""" test.core.test_bloom module """
+
+
+# importing standard module ===================================================
+import sys, os, json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.bloom import BloomFilter
+
+
+# TEST definition =============================================================
+class TestBloomFilter(unittest.TestCase):
+    r""" class to test 'BloomFilter' """
+
+    def test_membership_and_error_rate(self) -> None:
+        bloom: BloomFilter = BloomFilter(5000, 0.01)
+        self.assertTrue(all(bloom.add("US{}B2".format(n)) for n in range(1000)))
+        self.assertFalse(bloom.add("US0B2"))
+        self.assertEqual(len(bloom), 1000)
+        self.assertTrue(all("US{}B2".format(n) in bloom for n in range(1000)))
+
+        for n in range(1000, 5000):
+            bloom.add("US{}B2".format(n))
+        false_positives: int = sum(
+            "EP{}A1".format(n) in bloom for n in range(20000)
+        )
+        self.assertLess(false_positives / 20000, 0.02)
+        # about 9.6 bits per key at 1%
+        self.assertLess(bloom.getSizeInBytes(), 5000 * 10 // 8 + 1)
+        return None
+
+    def test_dump_and_load(self) -> None:
+        bloom: BloomFilter = BloomFilter(100)
+        bloom.add("US9145048B2")
+        loaded: BloomFilter = BloomFilter.load(
+            json.loads(json.dumps(bloom.dump()))
+        )
+        self.assertIn("US9145048B2", loaded)
+        self.assertNotIn("US6182754B1", loaded)
+        self.assertEqual(len(loaded), 1)
+
+        with self.assertRaises(ValueError):
+            BloomFilter(0)
+        with self.assertRaises(ValueError):
+            BloomFilter(10, 1.0)
+        return None
+
+    pass # end of TestBloomFilter
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
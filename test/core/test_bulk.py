@@ -0,0 +1,77 @@
+r""" test.core.test_bulk module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, asyncio, random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.bulk import BulkItemResult, bounded_map
+
+
+# TEST definition =============================================================
+class TestBoundedMap(unittest.IsolatedAsyncioTestCase):
+    r""" class to test methods defined in 'py_google_patents.core.bulk' module """
+
+    async def asyncSetUp(self) -> None:
+        self.in_flight: int = 0
+        self.max_in_flight: int = 0
+        return None
+
+    async def _work(self, item: int) -> int:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(random.random() / 200)
+            if item % 7 == 3:
+                raise ValueError(item)
+            return item * 2
+        finally:
+            self.in_flight -= 1
+
+    async def test_concurrency_cap_and_failures(self) -> None:
+        results: List[BulkItemResult] = [
+            result async for result in bounded_map(self._work, range(60), 5)
+        ]
+
+        self.assertEqual(len(results), 60)
+        self.assertLessEqual(self.max_in_flight, 5)
+        for result in results:
+            if result.item % 7 == 3:
+                self.assertFalse(result.ok)
+                self.assertIsInstance(result.error, ValueError)
+            else:
+                self.assertEqual(result.result, result.item * 2)
+        return None
+
+    async def test_ordered_with_async_iterable(self) -> None:
+        async def source():
+            for item in range(40):
+                yield item
+
+        indices: List[int] = [
+            result.index async for result in bounded_map(
+                self._work, source(), 8, ordered=True
+            )
+        ]
+        self.assertEqual(indices, list(range(40)))
+        return None
+
+    async def test_early_close_cancels_in_flight(self) -> None:
+        iterator = bounded_map(self._work, range(1000), 10)
+        async for _ in iterator:
+            break
+        await iterator.aclose()
+        self.assertEqual(self.in_flight, 0)
+        return None
+
+    pass # end of TestBoundedMap
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+r""" test.core.test_cache module """
+
+
+# importing standard module ===================================================
+import sys, os, tempfile, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.cache import DiskResponseCache, build_cache_key
+from py_google_patents.core.network import build_parse_endpoint_url, \
+    build_result_endpoint_url
+
+
+# TEST definition =============================================================
+class TestDiskResponseCache(unittest.TestCase):
+    r""" class to test methods defined in 'py_google_patents.core.cache' module """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    def test_key_normalization(self) -> None:
+        url = build_result_endpoint_url("patent/US9145048B2/en")
+        self.assertEqual(
+            build_cache_key(url),
+            build_cache_key(url.with_query({"exp": "", "id": "patent/US9145048B2/en"})
+                .with_host("localhost"))
+        )
+        self.assertNotEqual(
+            build_cache_key(url)[1],
+            build_cache_key(build_result_endpoint_url("patent/US9145048B2/fr"))[1]
+        )
+        return None
+
+    def test_hit_miss_and_ttl(self) -> None:
+        url = build_parse_endpoint_url("hybrid engine")
+        with DiskResponseCache(
+            self.directory.name, ttls={"/xhr/parse": 0.05}
+            ) as cache:
+            self.assertIsNone(cache.get(url))
+            cache.put(url, b'{"results": []}')
+            self.assertEqual(cache.get(url), b'{"results": []}')
+            time.sleep(0.06)
+            self.assertIsNone(cache.get(url))
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(cache.misses, 2)
+            self.assertEqual(cache.getTotalSize(), 0)
+        return None
+
+    def test_rewrite_keeps_total_size(self) -> None:
+        url = build_result_endpoint_url("patent/US9145048B2/en")
+        with DiskResponseCache(self.directory.name, max_bytes=300) as cache:
+            for _ in range(5):
+                cache.put(url, b"x" * 100)
+            self.assertEqual(cache.getTotalSize(), 100)
+            cache.put(url, b"y" * 40)
+            self.assertEqual(cache.getTotalSize(), 40)
+            self.assertEqual(cache.get(url), b"y" * 40)
+            self.assertEqual(cache.evictions, 0)
+        return None
+
+    def test_lru_eviction(self) -> None:
+        urls = [
+            build_result_endpoint_url("patent/US{}B2/en".format(number))
+            for number in range(5)
+        ]
+        with DiskResponseCache(self.directory.name, max_bytes=300) as cache:
+            for url in urls[:3]:
+                cache.put(url, b"x" * 100)
+            cache.get(urls[0])                  # urls[1] is now the oldest
+            cache.put(urls[3], b"y" * 100)
+
+            self.assertIsNone(cache.get(urls[1]))
+            self.assertIsNotNone(cache.get(urls[0]))
+            self.assertEqual(cache.getTotalSize(), 300)
+            self.assertEqual(cache.evictions, 1)
+
+        # a second instance (ex: another process) sees the same entries
+        with DiskResponseCache(self.directory.name, max_bytes=300) as cache:
+            self.assertEqual(cache.get(urls[3]), b"y" * 100)
+        return None
+
+    pass # end of TestDiskResponseCache
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
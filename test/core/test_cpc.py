@@ -0,0 +1,172 @@
+r""" test.core.test_cpc module """
+
+
+# importing standard module ===================================================
+import sys, os, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.cpc import CpcIndex, CpcVocabulary, \
+    cpc_prefix, cpc_sort_key
+from py_google_patents.core.data_parsers import \
+    parse_result_endpoint_response_data
+from py_google_patents.testing.synthetic import build_result_page
+
+
+# module variables ============================================================
+DOCUMENTS = [
+    ("US1", ["B60K6/20", "B60W20/00"], [True, False]),
+    ("US2", ["B60K6/445", "F02D41/00"], [False, True]),
+    ("US3", ["B60K60/00"], [True]),
+    ("US4", ["F02D41/00", "F02D41/0025", "B60L50/16"], [True, False, False]),
+    ("US5", [], []),
+]
+
+
+# TEST definition =============================================================
+class TestCoreCpc(unittest.TestCase):
+    r""" class to test methods defined in 'py_google_patents.core.cpc' module """
+
+    def test_sort_key(self) -> None:
+        self.assertEqual(cpc_sort_key("B60K6/20"), "B60K   6/20")
+        self.assertEqual(cpc_sort_key("b60k 6"), "B60K   6/")
+        self.assertEqual(cpc_sort_key("B60"), "B60")
+        self.assertFalse(cpc_sort_key("B60K60/00").startswith(
+            cpc_sort_key("B60K6")
+        ))
+        with self.assertRaises(ValueError):
+            cpc_sort_key("not a code")
+        self.assertEqual(
+            [cpc_prefix("B60K6/20", level) for level in (
+                "section", "class", "subclass", "group", "code"
+            )],
+            ["B", "B60", "B60K", "B60K6", "B60K6/20"]
+        )
+        return None
+
+    def test_vocabulary(self) -> None:
+        vocabulary: CpcVocabulary = CpcVocabulary(["B60K6/20"])
+        self.assertEqual(vocabulary.intern("F02D41/00"), 1)
+        self.assertEqual(vocabulary.intern("B60K6/20"), 0)
+        self.assertIs(
+            vocabulary.getCode(0), vocabulary.getCodes()[0]
+        )
+        self.assertIsNone(vocabulary.lookup("B60L50/16"))
+        self.assertEqual(len(vocabulary), 2)
+        return None
+
+    pass # end of TestCoreCpc
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestCpcIndex(unittest.TestCase):
+    r""" class to test 'CpcIndex' """
+
+    def setUp(self) -> None:
+        self.index: CpcIndex = CpcIndex()
+        for number, codes, first in DOCUMENTS:
+            self.index.addCodes(number, codes, first)
+        return None
+
+    def numbers(self, document_ids) -> list:
+        return self.index.getPublicationNumbers(document_ids)
+
+    def test_select(self) -> None:
+        self.assertEqual(
+            self.numbers(self.index.select("B60K6")), ["US1", "US2"]
+        )
+        self.assertEqual(
+            self.numbers(self.index.select("B60K")), ["US1", "US2", "US3"]
+        )
+        self.assertEqual(
+            self.numbers(self.index.select("B")), ["US1", "US2", "US3", "US4"]
+        )
+        self.assertEqual(self.numbers(self.index.select("B60K6/20")), ["US1"])
+        self.assertEqual(self.numbers(self.index.select("B60K6/2")), [])
+        self.assertEqual(self.numbers(self.index.select("H01")), [])
+        self.assertEqual(
+            self.numbers(self.index.select("F02D41", first_only=True)),
+            ["US2", "US4"]
+        )
+        self.assertEqual(
+            self.numbers(self.index.select("B60", first_only=True)),
+            ["US1", "US3"]
+        )
+        self.assertEqual(self.index.count("F02D41"), 2)
+        return None
+
+    def test_query(self) -> None:
+        self.assertEqual(
+            self.numbers(
+                self.index.query(["B60K6", "F02D"], exclude=["B60L"])
+            ),
+            ["US1", "US2"]
+        )
+        self.assertEqual(self.numbers(self.index.query([])), [])
+        return None
+
+    def test_count_by(self) -> None:
+        self.assertEqual(
+            self.index.countBy("subclass"),
+            {"B60K": 3, "B60L": 1, "B60W": 1, "F02D": 2}
+        )
+        self.assertEqual(
+            self.index.countBy("section", self.index.select("F02D")),
+            {"B": 2, "F": 2}
+        )
+        with self.assertRaises(ValueError):
+            self.index.countBy("family")
+        return None
+
+    def test_incremental_and_persistence(self) -> None:
+        self.index.select("B")
+        # codes new to the vocabulary re-rank the existing postings
+        self.index.addCodes("US6", ["A01B1/00", "B60K6/20"], [True, True])
+        self.assertEqual(
+            self.numbers(self.index.select("B60K6/20")), ["US1", "US6"]
+        )
+        self.assertEqual(self.index.getCodes(5), ["A01B1/00", "B60K6/20"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "cpc.npz")
+            self.index.save(path)
+            loaded: CpcIndex = CpcIndex.load(path)
+        self.assertEqual(len(loaded), 6)
+        for prefix in ("A", "B60K6", "F02D41/0025"):
+            numpy.testing.assert_array_equal(
+                loaded.select(prefix), self.index.select(prefix)
+            )
+        loaded.addCodes("US7", ["B60K6/20"])
+        self.assertEqual(
+            loaded.getPublicationNumbers(loaded.select("B60K6", True)),
+            ["US1", "US6"]
+        )
+        self.assertEqual(loaded.count("B60K6"), 4)
+        return None
+
+    def test_add_response(self) -> None:
+        response = parse_result_endpoint_response_data(
+            build_result_page("patent/US9145048B2/en")
+        )
+        index: CpcIndex = CpcIndex()
+        index.add(response)
+        self.assertEqual(
+            index.getPublicationNumbers(index.select("B60K6")),
+            ["US9145048B2"]
+        )
+        return None
+
+    pass # end of TestCpcIndex
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+r""" test.core.test_data_parsers module """
+
+
+# importing standard module ===================================================
+import sys, os, json, pickle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.data_parsers import \
+    parse_parse_endpoint_response_data, parse_query_endpoint_response_data, \
+    parse_result_endpoint_response_data
+from py_google_patents.core.html_parsers import ResultPageBuilder
+from py_google_patents.models.response_models import GoogleParseResponse, \
+    GooglePatentResponse, GoogleParsePatentResult, GoogleParseQueryResult, \
+    GoogleQueryResponse, LazyGooglePatentResponse
+
+
+# module variables ============================================================
+FIXTURES_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "fixtures"
+)
+
+
+# TEST definition =============================================================
+class TestCoreDataParsers(unittest.TestCase):
+    r""" class to test methods defined in 'py_google_patents.core.data_parsers' module """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with open(
+            os.path.join(FIXTURES_DIRECTORY, "result_US9145048B2.html"),
+            encoding="utf-8"
+            ) as file:
+            cls.result_page: str = file.read()
+        return None
+
+    def test_parse_parse_endpoint_response_data(self) -> None:
+        patents: GoogleParseResponse = parse_parse_endpoint_response_data({
+            "error_no_patents_found": False,
+            "results": [{"result": {
+                "id": "patent/US9145048B2/en", "number": "US9145048B2",
+                "title": "Apparatus for hybrid engine control"
+            }}]
+        })
+        self.assertIsInstance(patents.results[0], GoogleParsePatentResult)
+
+        queries: GoogleParseResponse = parse_parse_endpoint_response_data({
+            "error_no_patents_found": False,
+            "results": [{"query_url": "q=us91"}]
+        })
+        self.assertIsInstance(queries.results[0], GoogleParseQueryResult)
+        return None
+
+    def test_trusted_parse_endpoint_response_data(self) -> None:
+        with open(os.path.join(
+            os.path.dirname(FIXTURES_DIRECTORY), os.pardir, "research",
+            "api_sample_responses.json"
+            ), "rb") as file:
+            samples = [
+                sample["response"] for sample in json.load(file)
+                if "/xhr/parse" in sample["url"]
+            ]
+
+        for sample in samples:
+            with self.subTest(sample=sample):
+                validated: GoogleParseResponse = \
+                    parse_parse_endpoint_response_data(sample)
+                trusted: GoogleParseResponse = \
+                    parse_parse_endpoint_response_data(
+                        json.dumps(sample).encode("utf-8"), trusted=True
+                    )
+                self.assertEqual(trusted, validated)
+                self.assertEqual(trusted.json(), validated.json())
+
+        # unknown keys are dropped and missing fields take their defaults
+        trusted = parse_parse_endpoint_response_data({
+            "results": [{"result": {"id": "patent/US1A/en", "rank": 3}}],
+            "extra": True
+        }, trusted=True)
+        self.assertEqual(trusted.dict(), {
+            "error_no_patents_found": False,
+            "results": [{"result": {
+                "id": "patent/US1A/en", "number": None, "title": ""
+            }}]
+        })
+        return None
+
+    def test_parse_query_endpoint_response_data(self) -> None:
+        with open(os.path.join(
+            os.path.dirname(FIXTURES_DIRECTORY), os.pardir, "research",
+            "api_sample_responses.json"
+            ), "rb") as file:
+            sample = [
+                sample["response"] for sample in json.load(file)
+                if "/xhr/query" in sample["url"]
+            ][0]
+
+        response: GoogleQueryResponse = parse_query_endpoint_response_data(
+            json.dumps(sample).encode("utf-8")
+        )
+        self.assertEqual(response.total_num_results, 135831)
+        self.assertEqual(response.num_page, 0)
+        self.assertEqual(len(response.results), 10)
+        for result in response.results:
+            self.assertTrue(result.id.startswith("patent/"))
+            self.assertNotIn("<b>", result.title)
+            self.assertEqual(result.title, result.title.strip())
+
+        empty: GoogleQueryResponse = parse_query_endpoint_response_data({
+            "results": {"total_num_results": 0, "total_num_pages": 0}
+        })
+        self.assertEqual(empty.results, [])
+        return None
+
+    def test_parse_result_endpoint_response_data(self) -> None:
+        result: GooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page
+        )
+
+        self.assertEqual(result.publication_number, "US9145048B2")
+        self.assertEqual(
+            result.title,
+            "Apparatus for hybrid engine control and method of manufacture same"
+        )
+        self.assertEqual(result.inventors, ["Cole Ray", "Dana Lowe"])
+        self.assertEqual(result.priority_date, "2010-03-31")
+        self.assertTrue(result.abstract.startswith("An apparatus for hybrid"))
+
+        self.assertEqual(len(result.description), 5)
+        self.assertEqual(result.description[0], "CROSS-REFERENCE TO RELATED APPLICATIONS")
+        # the original text of machine translated paragraphs is dropped
+        self.assertEqual(result.description[-1], "Translated text.")
+
+        self.assertEqual([claim.number for claim in result.claims], [1, 2, 3])
+        self.assertEqual(result.claims[0].depends_on, [])
+        self.assertEqual(result.claims[2].depends_on, [1, 2])
+
+        self.assertEqual(result.application.application_number, "US13/076,026")
+        self.assertEqual(
+            [event.type for event in result.application.events],
+            ["priority", "filed", "granted"]
+        )
+
+        self.assertEqual(result.family.family_id, "44709789")
+        self.assertEqual(len(result.family.applications), 2)
+        self.assertEqual(
+            [member.id for member in result.family.members],
+            ["patent/CN102869554A/en", "patent/WO2011123690A1/en"]
+        )
+
+        leaves = [item.code for item in result.classifications if item.leaf]
+        self.assertEqual(leaves, ["B60K6/20", "Y02T10/62"])
+        self.assertTrue(result.classifications[2].first)
+
+        self.assertEqual(
+            [(item.publication_number, item.examiner_cited, item.family_to_family)
+             for item in result.citations],
+            [("US5301764A", True, False), ("US6182754B1", False, False),
+             ("JP2008062688A", False, True)]
+        )
+        self.assertEqual(
+            [item.publication_number for item in result.cited_by],
+            ["US2020267996A1"]
+        )
+        return None
+
+    def test_chunked_input_and_empty_page(self) -> None:
+        whole: GooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page
+        )
+        encoded: bytes = self.result_page.encode("utf-8")
+        builder: ResultPageBuilder = ResultPageBuilder()
+        for offset in range(0, len(encoded), 97):
+            builder.feed(encoded[offset:offset + 97])
+        self.assertEqual(builder.close(), whole)
+
+        empty: GooglePatentResponse = parse_result_endpoint_response_data(
+            " HTML DOCUMENT as string "
+        )
+        self.assertIsNone(empty.publication_number)
+        self.assertEqual(empty.claims, [])
+        return None
+
+    def test_section_selection(self) -> None:
+        encoded: bytes = self.result_page.encode("utf-8")
+        builder: ResultPageBuilder = ResultPageBuilder(["abstract", "claims"])
+        fed: int = 0
+        while not builder.isComplete():
+            builder.feed(encoded[fed:fed + 256])
+            fed += 256
+        result: GooglePatentResponse = builder.close()
+
+        # the family section was never read
+        self.assertLess(fed, encoded.index(b'itemprop="family"'))
+        self.assertEqual(result.publication_number, "US9145048B2")
+        self.assertEqual(len(result.claims), 3)
+        self.assertIsNotNone(result.abstract)
+        self.assertEqual(result.description, [])
+        self.assertEqual(result.classifications, [])
+
+        only_family: GooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page, sections=["family", "classifications"]
+        )
+        self.assertEqual(len(only_family.family.members), 2)
+        self.assertEqual(len(only_family.classifications), 4)
+        self.assertEqual(only_family.citations, [])
+        self.assertIsNone(only_family.abstract)
+
+        with self.assertRaises(ValueError):
+            ResultPageBuilder(["images"])
+        return None
+
+    def test_metadata_after_sections(self) -> None:
+        # move the title and the metadata list behind the claims
+        head_end: int = self.result_page.index("  <section>")
+        start: int = self.result_page.index("  <span itemprop=\"title\">")
+        metadata: str = self.result_page[start:head_end]
+        claims_end: int = self.result_page.index(
+            "</section>", self.result_page.index('itemprop="claims"')
+        ) + len("</section>\n")
+        page: str = self.result_page[:start] \
+            + self.result_page[head_end:claims_end] + metadata \
+            + self.result_page[claims_end:]
+        whole: GooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page
+        )
+
+        encoded: bytes = page.encode("utf-8")
+        builder: ResultPageBuilder = ResultPageBuilder(["abstract", "claims"])
+        fed: int = 0
+        while not builder.isComplete() and fed < len(encoded):
+            builder.feed(encoded[fed:fed + 256])
+            fed += 256
+        result: GooglePatentResponse = builder.close()
+        # reading stops after the metadata, not right after the claims
+        self.assertGreater(fed, encoded.index(b'itemprop="publicationNumber"'))
+        self.assertLess(fed, encoded.index(b'itemprop="family"'))
+        self.assertEqual(result.publication_number, "US9145048B2")
+        self.assertEqual(result.title, whole.title)
+        self.assertEqual(result.inventors, whole.inventors)
+        self.assertEqual(result.publication_date, whole.publication_date)
+        self.assertEqual(result.claims, whole.claims)
+
+        self.assertEqual(parse_result_endpoint_response_data(page), whole)
+        lazy: LazyGooglePatentResponse = parse_result_endpoint_response_data(
+            page, lazy=True
+        )
+        self.assertEqual(lazy.publication_number, "US9145048B2")
+        self.assertEqual(lazy.inventors, whole.inventors)
+        self.assertEqual(lazy.claims, whole.claims)
+        return None
+
+    def test_lazy_response(self) -> None:
+        eager: GooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page
+        )
+        lazy: LazyGooglePatentResponse = parse_result_endpoint_response_data(
+            self.result_page, lazy=True
+        )
+
+        self.assertEqual(lazy.publication_number, "US9145048B2")
+        self.assertEqual(len(lazy.getPendingSections()), 7)
+        self.assertEqual(lazy.claims, eager.claims)
+        self.assertNotIn("claims", lazy.getPendingSections())
+        self.assertIn("description", lazy.getPendingSections())
+        self.assertEqual(lazy.cited_by, eager.cited_by)
+
+        # serialization materializes everything, in the eager field order
+        self.assertEqual(lazy.json(), eager.json())
+        self.assertEqual(lazy.getPendingSections(), [])
+        self.assertEqual(
+            pickle.loads(pickle.dumps(
+                parse_result_endpoint_response_data(self.result_page, lazy=True)
+            )),
+            eager
+        )
+        return None
+
+    pass # end of TestCoreDataParsers
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+r""" test.core.test_executor module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, asyncio, concurrent.futures, multiprocessing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.executor import ParseExecutor, \
+    default_mp_context
+from py_google_patents.models.response_models import GooglePatentResponse
+
+
+# module variables ============================================================
+FIXTURES_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "fixtures"
+)
+
+
+# TEST definition =============================================================
+class TestParseExecutor(unittest.IsolatedAsyncioTestCase):
+    r""" class to test methods defined in 'py_google_patents.core.executor' module """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with open(
+            os.path.join(FIXTURES_DIRECTORY, "result_US9145048B2.html"),
+            encoding="utf-8"
+            ) as file:
+            cls.result_page: str = file.read()
+        return None
+
+    async def _parse_many(self, executor: ParseExecutor) -> None:
+        pages: List[str] = [
+            self.result_page.replace("US9145048B2", "US{}B2".format(number))
+            for number in range(20)
+        ]
+        results: List[GooglePatentResponse] = await asyncio.gather(
+            *[executor.parseResult(page) for page in pages]
+        )
+        self.assertEqual(
+            [result.publication_number for result in results],
+            ["US{}B2".format(number) for number in range(20)]
+        )
+        return None
+
+    async def test_kinds(self) -> None:
+        for kind in ("inline", "thread", "process"):
+            with self.subTest(kind=kind):
+                with ParseExecutor(kind, max_workers=2, batch_size=4) as executor:
+                    await self._parse_many(executor)
+        return None
+
+    async def test_large_documents_bypass_batching(self) -> None:
+        with ParseExecutor("thread", batch_bytes=1024) as executor:
+            result: GooglePatentResponse = await executor.parseResult(
+                self.result_page
+            )
+            self.assertEqual(len(executor._batches), 0)
+        self.assertEqual(len(result.claims), 3)
+        return None
+
+    async def test_loops_in_several_threads(self) -> None:
+        # ex: the default executor, shared by a 'SyncClient' loop thread and
+        # the callers' own loops
+        with ParseExecutor("thread", max_workers=2, batch_size=4) as executor:
+            def _run() -> None:
+                asyncio.run(self._parse_many(executor))
+                return None
+
+            with concurrent.futures.ThreadPoolExecutor(4) as pool:
+                await asyncio.gather(*[
+                    asyncio.get_running_loop().run_in_executor(pool, _run)
+                    for _ in range(4)
+                ])
+            await self._parse_many(executor)
+        return None
+
+    async def test_shutdown_fails_queued_documents(self) -> None:
+        executor: ParseExecutor = ParseExecutor(
+            "thread", batch_size=16, batch_delay=10.0
+        )
+        queued = asyncio.ensure_future(executor.parseResult(self.result_page))
+        await asyncio.sleep(0)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(queued, 1.0)
+        return None
+
+    def test_default_mp_context(self) -> None:
+        self.assertIn(
+            default_mp_context().get_start_method(), ("forkserver", "spawn")
+        )
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.assertEqual(
+                default_mp_context().get_start_method(), "forkserver"
+            )
+        return None
+
+    def test_unknown_kind(self) -> None:
+        with self.assertRaises(ValueError):
+            ParseExecutor("gpu")
+        return None
+
+    pass # end of TestParseExecutor
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+r""" test.core.test_export module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, gzip, json, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.data import exportPatentDataMany
+from py_google_patents.core.data_parsers import \
+    parse_result_endpoint_response_data
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.core.export import JsonlSink, ParquetSink, \
+    ResponseSink
+from py_google_patents.models.response_models import GooglePatentResponse
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+from py_google_patents.testing.synthetic import build_result_page
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# TEST definition =============================================================
+class TestCoreExport(unittest.TestCase):
+    r""" class to test methods defined in 'py_google_patents.core.export' module """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.responses: List[GooglePatentResponse] = [
+            parse_result_endpoint_response_data(build_result_page(
+                "patent/US{}B2/en".format(index), claims=3, paragraphs=4,
+                citations=2, cited_by=1
+            ))
+            for index in range(25)
+        ]
+        return None
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    def test_jsonl_sink(self) -> None:
+        path: str = os.path.join(self.directory.name, "patents.jsonl.gz")
+        with JsonlSink(path, buffer_size=4096) as sink:
+            for response in self.responses:
+                sink.write(response)
+            # part of the documents was written before closing
+            self.assertGreater(len(sink._buffer), 0)
+            self.assertLess(len(sink._buffer), len(self.responses))
+        self.assertEqual(sink.getCount(), 25)
+
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            written = [GooglePatentResponse(**json.loads(line)) for line in file]
+        self.assertEqual(written, self.responses)
+
+        with self.assertRaises(ValueError):
+            sink.write(self.responses[0])
+        with self.assertRaises(ValueError):
+            JsonlSink(path, compression="zip")
+
+        class IncompleteSink(ResponseSink):
+            pass
+
+        # a sink without '_writeRecord' fails before its first write
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+        return None
+
+    @unittest.skipIf(pyarrow is None, "requires pyarrow")
+    def test_parquet_sink(self) -> None:
+        path: str = os.path.join(self.directory.name, "patents.parquet")
+        with ParquetSink(path, row_group_size=10) as sink:
+            for response in self.responses:
+                sink.write(response)
+
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(
+            [
+                parquet_file.metadata.row_group(index).num_rows
+                for index in range(3)
+            ],
+            [10, 10, 5]
+        )
+        self.assertEqual(
+            [
+                GooglePatentResponse(**row)
+                for row in parquet_file.read().to_pylist()
+            ],
+            self.responses
+        )
+        numbers = pyarrow.parquet.read_table(
+            path, columns=["publication_number"]
+        ).column(0).to_pylist()
+        self.assertEqual(numbers[:2], ["US0B2", "US1B2"])
+        return None
+
+    pass # end of TestCoreExport
+
+
+class TestExportPatentDataMany(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'exportPatentDataMany' against a replay server """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    async def test_export_and_failures(self) -> None:
+        store: FixtureStore = FixtureStore()
+        store.add(
+            "/xhr/result?id=patent%2FUS9145048B2%2Fen&exp=",
+            build_result_page("patent/US9145048B2/en")
+        )
+        server: ReplayServer = ReplayServer(store)
+        await server.start()
+        path: str = os.path.join(self.directory.name, "patents.jsonl")
+        try:
+            client = server.createClient()
+            async with client:
+                with JsonlSink(path) as sink:
+                    failures = await exportPatentDataMany(
+                        ["patent/US9145048B2/en", "patent/US0A/en"], sink,
+                        client, executor=ParseExecutor("inline")
+                    )
+                    # flushed, not closed
+                    self.assertGreater(os.path.getsize(path), 0)
+        finally:
+            await server.stop()
+
+        self.assertEqual([item.item for item in failures], ["patent/US0A/en"])
+        with open(path, encoding="utf-8") as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            json.loads(lines[0])["publication_number"], "US9145048B2"
+        )
+        return None
+
+    pass # end of TestExportPatentDataMany
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
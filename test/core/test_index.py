@@ -0,0 +1,153 @@
+r""" test.core.test_index module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.common.config import getLibraryLogger
+from py_google_patents.core.data_parsers import \
+    parse_result_endpoint_response_data
+from py_google_patents.core.index import PatentIndex, _decode_postings, \
+    _encode_postings
+from py_google_patents.models.response_models import GoogleParseResponse, \
+    GooglePatentResponse
+from py_google_patents.testing.synthetic import build_result_page
+
+
+# module variables ============================================================
+FIXTURES_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "fixtures"
+)
+
+
+# TEST definition =============================================================
+class TestPatentIndex(unittest.TestCase):
+    r""" class to test 'PatentIndex' """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with open(
+            os.path.join(FIXTURES_DIRECTORY, "result_US9145048B2.html"),
+            encoding="utf-8"
+            ) as file:
+            cls.patent: GooglePatentResponse = \
+                parse_result_endpoint_response_data(file.read())
+        cls.synthetic: List[GooglePatentResponse] = [
+            parse_result_endpoint_response_data(build_result_page(
+                "patent/US{}A1/en".format(index), claims=3, paragraphs=1
+            ))
+            for index in range(40)
+        ]
+        return None
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    def test_postings_round_trip(self) -> None:
+        postings = [(0, 1), (5, 200), (130, 3), (100000, 1)]
+        encoded: bytes = _encode_postings(postings)
+        self.assertEqual(_decode_postings(encoded, 0, len(encoded)), postings)
+        return None
+
+    def test_search(self) -> None:
+        with PatentIndex(self.directory.name) as index:
+            self.assertEqual(index.addMany(self.synthetic[:20]), 20)
+            index.add(self.patent, "patent/US9145048B2/en")
+            self.assertEqual(index.search("hybrid"), [])    # not committed
+            index.commit()
+            self.assertEqual(len(index.search("us", limit=100)), 21)
+            self.assertEqual(index.addMany(self.synthetic), 20)
+            index.commit()
+            self.assertEqual(len(index), 41)
+
+            results = index.search("hybrid engine control")
+            self.assertEqual(results[0].number, "US9145048B2")
+            self.assertEqual(results[0].id, "patent/US9145048B2/en")
+            self.assertEqual(results[0].title, self.patent.title)
+
+            # the last word is a prefix, as typed in a search box
+            self.assertEqual(
+                [result.number for result in index.search("us914504")],
+                ["US9145048B2"]
+            )
+            self.assertEqual(index.search("us914504", prefix=False), [])
+            self.assertEqual(
+                index.search("cpc:b60k")[0].number, "US9145048B2"
+            )
+
+            # documents of both segments are found, cached results of the
+            # previous commit are dropped
+            numbers = {
+                result.number for result in index.search("us", limit=100)
+            }
+            self.assertEqual(len(numbers), 41)
+
+            # a truncated prefix expansion is reported, not silent
+            with self.assertLogs(getLibraryLogger(), "WARNING") as logs:
+                truncated = index.search("us", limit=100, max_expansions=5)
+            self.assertLess(len(truncated), 41)
+            self.assertIn("'us'", logs.output[0])
+            self.assertEqual(
+                len(index.search("us", limit=100, max_expansions=None)), 41
+            )
+
+            response: GoogleParseResponse = index.searchResponse("hybrid")
+            self.assertEqual(
+                GoogleParseResponse.parse_raw(response.json()), response
+            )
+            self.assertTrue(
+                index.searchResponse("zzzz").error_no_patents_found
+            )
+
+        # the index is read back from disk
+        with PatentIndex(self.directory.name) as index:
+            self.assertEqual(len(index), 41)
+            self.assertFalse(index.add(self.patent))
+            self.assertEqual(
+                index.search("hybrid engine control")[0].number,
+                "US9145048B2"
+            )
+        return None
+
+    def test_ranking_ignores_commit_boundaries(self) -> None:
+        documents: List[GooglePatentResponse] = [
+            GooglePatentResponse(
+                publication_number="US{}B2".format(number),
+                title="widget widget" if number == 1
+                else "widget" if number < 20 or number == 99
+                else "gear"
+            )
+            for number in list(range(1, 50)) + [99]
+        ]
+        rankings: List[List[str]] = []
+        for commits in ([documents], [documents[:-1], documents[-1:]]):
+            with tempfile.TemporaryDirectory() as directory:
+                with PatentIndex(directory) as index:
+                    for batch in commits:
+                        index.addMany(batch)
+                        index.commit()
+                    rankings.append([
+                        result.number
+                        for result in index.search("widget", limit=50)
+                    ])
+        self.assertEqual(rankings[0][0], "US1B2")
+        self.assertEqual(rankings[1], rankings[0])
+        return None
+
+    pass # end of TestPatentIndex
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+r""" test.core.test_memo module """
+
+
+# importing standard module ===================================================
+import sys, os, asyncio, concurrent.futures, gc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.data import getPatentDataMany, \
+    getTextRecommendations, RECOMMENDATIONS_CACHE, _PATENT_DATA_FLIGHTS
+from py_google_patents.core.memo import MemoryLRUCache, SingleFlight
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+
+
+# TEST definition =============================================================
+class TestMemoryLRUCache(unittest.TestCase):
+    r""" class to test 'MemoryLRUCache' """
+
+    def test_lru_and_ttl(self) -> None:
+        now = [0.0]
+        cache: MemoryLRUCache = MemoryLRUCache(
+            maxsize=2, ttl=10.0, clock=lambda: now[0]
+        )
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)                   # evicts "b", the least recent
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        now[0] = 11.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 1)
+        return None
+
+    def test_threads_share_one_cache(self) -> None:
+        now = [0.0]
+        cache: MemoryLRUCache = MemoryLRUCache(
+            maxsize=8, ttl=1.0, clock=lambda: now[0]
+        )
+
+        def _call(index: int) -> None:
+            for step in range(2000):
+                cache.put((index + step) % 16, step)
+                cache.get((index * step) % 16)
+                if step % 100 == 0:
+                    now[0] += 2.0           # expires entries under readers
+            return None
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            for future in [pool.submit(_call, index) for index in range(8)]:
+                future.result()
+        self.assertLessEqual(len(cache), 8)
+        self.assertEqual(cache.hits + cache.misses, 8 * 2000)
+        return None
+
+    pass # end of TestMemoryLRUCache
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'SingleFlight' """
+
+    async def test_concurrent_calls_are_coalesced(self) -> None:
+        flights: SingleFlight = SingleFlight()
+        calls = []
+
+        async def fetch(key: str) -> str:
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            if key == "bad":
+                raise ValueError(key)
+            return key.upper()
+
+        results = await asyncio.gather(
+            *[flights.do(key, lambda key=key: fetch(key))
+              for key in ["a", "b", "a", "a", "bad", "bad"]],
+            return_exceptions=True
+        )
+
+        self.assertEqual(results[:4], ["A", "B", "A", "A"])
+        self.assertIsInstance(results[4], ValueError)
+        self.assertIs(results[4], results[5])
+        self.assertEqual(sorted(calls), ["a", "b", "bad"])
+        self.assertEqual(flights.coalesced, 3)
+        self.assertEqual(flights.inFlight(), 0)
+
+        # once finished, a new call starts a new flight
+        self.assertEqual(await flights.do("a", lambda: fetch("a")), "A")
+        self.assertEqual(len(calls), 4)
+        return None
+
+    async def test_last_caller_cancels_the_call(self) -> None:
+        flights: SingleFlight = SingleFlight()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def fetch() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "a"
+
+        first = asyncio.ensure_future(flights.do("a", fetch))
+        second = asyncio.ensure_future(flights.do("a", fetch))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0.01)
+        # another caller still waits: the call goes on
+        self.assertFalse(cancelled.is_set())
+        self.assertEqual(flights.inFlight(), 1)
+        second.cancel()
+        await asyncio.sleep(0.01)
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(flights.inFlight(), 0)
+        for waiter in (first, second):
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+        return None
+
+    async def test_closing_a_batch_cancels_its_flights(self) -> None:
+        server: ReplayServer = ReplayServer(synthesize=True, latency=0.5)
+        await server.start()
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context)
+        )
+        try:
+            async with server.createClient() as client:
+                results = getPatentDataMany(
+                    ["patent/US{}B2/en".format(index) for index in range(8)],
+                    client, concurrency=8
+                )
+                task = asyncio.ensure_future(results.__anext__())
+                await asyncio.sleep(0.1)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                await results.aclose()
+                await asyncio.sleep(0)
+                self.assertEqual(_PATENT_DATA_FLIGHTS.inFlight(), 0)
+            gc.collect()
+            await asyncio.sleep(0.01)
+            self.assertEqual(errors, [])
+        finally:
+            await server.stop()
+        return None
+
+    async def test_flight_key_includes_memoize(self) -> None:
+        store: FixtureStore = FixtureStore.load(os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "research", "api_sample_responses.json"
+        ))
+        server: ReplayServer = ReplayServer(store, latency=0.05)
+        await server.start()
+        RECOMMENDATIONS_CACHE.clear()
+        try:
+            async with server.createClient() as client:
+                memoized, fresh = await asyncio.gather(
+                    getTextRecommendations("us9145048", client),
+                    getTextRecommendations("us9145048", client, memoize=False)
+                )
+            # the unmemoized call does not join the memoized one's flight
+            self.assertEqual(server.stats["requests"], 2)
+            self.assertIsNot(memoized, fresh)
+            self.assertEqual(memoized, fresh)
+        finally:
+            RECOMMENDATIONS_CACHE.clear()
+            await server.stop()
+        return None
+
+    pass # end of TestSingleFlight
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
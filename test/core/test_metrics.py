@@ -0,0 +1,151 @@
+r""" test.core.test_metrics module """
+
+
+# importing standard module ===================================================
+from typing import List, Tuple
+import sys, os, math, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.metrics import InMemoryMetrics, CallbackMetrics, \
+    Histogram, MetricsRecorder, get_metrics, set_metrics
+from py_google_patents.core.cache import DiskResponseCache
+from py_google_patents.core.throttle import RetryPolicy
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.core.data_parsers import \
+    parse_parse_endpoint_response_data
+from py_google_patents.api.data import getPatentData
+from py_google_patents.testing.replay import ReplayServer
+
+
+# TEST definition =============================================================
+class TestCoreMetrics(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'py_google_patents.core.metrics' """
+
+    def tearDown(self) -> None:
+        set_metrics(None)
+        return None
+
+    def test_histogram(self) -> None:
+        histogram: Histogram = Histogram((1.0, 2.0, 4.0))
+        for value in [0.5, 1.5, 1.5, 3.0, 10.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 16.5)
+        self.assertTrue(1.0 <= histogram.quantile(0.5) <= 2.0)
+        self.assertEqual(histogram.quantile(1.0), 10.0)
+        self.assertTrue(math.isnan(Histogram().quantile(0.5)))
+        return None
+
+    def test_prometheus_export(self) -> None:
+        metrics: InMemoryMetrics = InMemoryMetrics((0.1, 1.0))
+        metrics.observe("parse_seconds", 0.05, endpoint="/xhr/parse")
+        metrics.observe("parse_seconds", 0.5, endpoint="/xhr/parse")
+        metrics.increment("http_retries_total", endpoint="/xhr/result")
+        metrics.increment("http_retries_total", 2, endpoint="/xhr/parse")
+
+        text: str = metrics.toPrometheus()
+        self.assertIn("# TYPE py_google_patents_parse_seconds histogram", text)
+        self.assertIn(
+            'py_google_patents_parse_seconds_bucket{endpoint="/xhr/parse",'
+            'le="0.1"} 1', text
+        )
+        self.assertIn(
+            'py_google_patents_parse_seconds_bucket{endpoint="/xhr/parse",'
+            'le="+Inf"} 2', text
+        )
+        self.assertIn(
+            'py_google_patents_parse_seconds_count{endpoint="/xhr/parse"} 2',
+            text
+        )
+        self.assertIn("# TYPE py_google_patents_http_retries_total counter", text)
+        self.assertEqual(metrics.getCounter("http_retries_total"), 3)
+        self.assertEqual(
+            metrics.getCounter("http_retries_total", endpoint="/xhr/parse"), 2
+        )
+
+        metrics.gauge("concurrency_limit", 8)
+        metrics.gauge("concurrency_limit", 5)
+        text = metrics.toPrometheus()
+        self.assertIn("# TYPE py_google_patents_concurrency_limit gauge", text)
+        self.assertIn("py_google_patents_concurrency_limit 5", text)
+        self.assertEqual(metrics.getGauge("concurrency_limit"), 5)
+        self.assertEqual(metrics.snapshot()["gauges"][0]["value"], 5)
+        return None
+
+    def test_disabled_by_default(self) -> None:
+        self.assertIs(type(get_metrics()), MetricsRecorder)
+        self.assertFalse(get_metrics().enabled)
+
+        calls: List[Tuple] = []
+        set_metrics(CallbackMetrics(lambda *call: calls.append(call)))
+        parse_parse_endpoint_response_data({"error_no_patents_found": True})
+        self.assertEqual(calls[0][:2], ("observe", "parse_seconds"))
+        self.assertEqual(calls[0][3], {"endpoint": "/xhr/parse"})
+        return None
+
+    async def test_client_phase_timings(self) -> None:
+        metrics: InMemoryMetrics = InMemoryMetrics()
+        set_metrics(metrics)
+        with tempfile.TemporaryDirectory() as directory, \
+            DiskResponseCache(directory) as cache, \
+            ParseExecutor("process", max_workers=1) as executor:
+            async with ReplayServer(
+                synthesize=True, throttle_rate=0.5, seed=3
+                ) as server:
+                async with server.createClient(
+                    cache=cache,
+                    retry_policy=RetryPolicy(max_attempts=10, base_delay=0)
+                    ) as client:
+                    for _ in range(2):
+                        for index in range(4):
+                            await getPatentData(
+                                "patent/US{}B2/en".format(index), client,
+                                executor
+                            )
+
+        endpoint: str = "/xhr/result"
+        self.assertEqual(metrics.getCounter(
+            "cache_requests_total", result="hit"
+        ), 4)
+        self.assertEqual(metrics.getCounter(
+            "cache_requests_total", result="miss"
+        ), 4)
+        self.assertEqual(
+            metrics.getCounter("http_retries_total", reason="429"),
+            server.stats["throttled"]
+        )
+        self.assertEqual(
+            metrics.getCounter("http_responses_total", status="200"), 4
+        )
+        self.assertEqual(
+            metrics.getCounter("http_response_bytes_total"),
+            server.stats["bytes"]
+        )
+        self.assertEqual(
+            metrics.getHistogram("http_connect_seconds", endpoint=endpoint)\
+                .count, 1
+        )
+        self.assertEqual(metrics.getHistogram(
+            "http_ttfb_seconds", endpoint=endpoint
+        ).count, 4 + server.stats["throttled"])
+        self.assertEqual(metrics.getHistogram(
+            "http_request_seconds", endpoint=endpoint
+        ).count, 4)
+        # parsed in a worker process, recorded in this one
+        self.assertEqual(metrics.getHistogram(
+            "parse_seconds", endpoint=endpoint, mode="full"
+        ).count, 8)
+        return None
+
+    pass # end of TestCoreMetrics
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
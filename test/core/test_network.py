@@ -3,15 +3,26 @@ r""" test.core.test_network module """
 
 # importing standard module ===================================================
 from typing import List, Dict
-import sys, os, asyncio
+import sys, os, asyncio, tempfile
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import unittest, pprint as pp
 
 
+# importing third-party modules ===============================================
+import aiohttp
+from aiohttp import web
+
+
 # importing to test modules ===================================================
 from py_google_patents.core.network import http_get_parse_endpoint_response,\
-    http_get_result_endpoint_response
+    http_get_result_endpoint_response, AsyncNetworkClient
+from py_google_patents.core.throttle import RetryPolicy, \
+    AdaptiveConcurrencyLimiter
+from py_google_patents.core.metrics import InMemoryMetrics
+from py_google_patents.core.cache import DiskResponseCache
+from py_google_patents.common.error import CacheMissError
+from py_google_patents.core.html_parsers import ResultPageBuilder
 
 
 # TEST definition =============================================================
@@ -45,6 +56,166 @@ class TestCoreNetwork(unittest.IsolatedAsyncioTestCase):
     pass # end of TestCoreNetwork
 
 
+class TestAsyncNetworkClient(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'AsyncNetworkClient' against a local http server """
+
+    async def asyncSetUp(self) -> None:
+        self.peers: List[int] = []
+        self.streamed_chunks: int = 0
+        with open(os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            "fixtures", "result_US9145048B2.html"
+            ), "rb") as file:
+            self.result_page: bytes = file.read().replace(b"</article>", b"")
+
+        async def parse_handler(request: web.Request) -> web.Response:
+            self.peers.append(request.transport.get_extra_info("peername")[1])
+            return web.json_response(
+                {"error_no_patents_found": False, "echo": request.query["text"]}
+            )
+
+        async def result_handler(request: web.Request) -> web.Response:
+            self.peers.append(request.transport.get_extra_info("peername")[1])
+            if request.query["id"].startswith("throttled") \
+                and len(self.peers) < 3:
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            if request.query["id"].startswith("broken"):
+                return web.Response(status=503)
+            return web.Response(text="<article>{}</article>".format(
+                request.query["id"]
+            ), content_type="text/html")
+
+        async def stream_handler(request: web.Request) -> web.StreamResponse:
+            response: web.StreamResponse = web.StreamResponse()
+            await response.prepare(request)
+            await response.write(self.result_page)
+            try:
+                for _ in range(200):
+                    await response.write(b"<p>" + b"x" * 8192 + b"</p>")
+                    self.streamed_chunks += 1
+                    await asyncio.sleep(0.001)
+            except ConnectionResetError:
+                pass    # the client stopped reading
+            return response
+
+        app: web.Application = web.Application()
+        app.router.add_get("/stream/xhr/result", stream_handler)
+        app.router.add_get("/xhr/parse", parse_handler)
+        app.router.add_get("/xhr/result", result_handler)
+        self.runner: web.AppRunner = web.AppRunner(app)
+        await self.runner.setup()
+        site: web.TCPSite = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url: str = "http://127.0.0.1:{}".format(
+            self.runner.addresses[0][1]
+        )
+        return None
+
+    async def asyncTearDown(self) -> None:
+        await self.runner.cleanup()
+        return None
+
+    async def test_connections_are_reused(self) -> None:
+        async with AsyncNetworkClient(base_url=self.base_url) as client:
+            for item in ["a", "b", "c"]:
+                result: Dict = await http_get_parse_endpoint_response(
+                    "(hybrid AND {})".format(item), client
+                )
+                self.assertEqual(result["echo"], "(hybrid AND {})".format(item))
+            html: str = await http_get_result_endpoint_response(
+                "patent/US9145048B2/en", client
+            )
+
+        self.assertEqual(html, "<article>patent/US9145048B2/en</article>")
+        self.assertEqual(len(set(self.peers)), 1)
+        self.assertTrue(client.isClosed())
+        return None
+
+    async def test_retry_after_429(self) -> None:
+        async with AsyncNetworkClient(base_url=self.base_url) as client:
+            html: str = await client.getResultEndpointResponse("throttled/1")
+
+        self.assertEqual(html, "<article>throttled/1</article>")
+        self.assertEqual(len(self.peers), 3)
+        return None
+
+    async def test_retry_policy_gives_up(self) -> None:
+        policy: RetryPolicy = RetryPolicy(max_attempts=3, base_delay=0.001)
+        async with AsyncNetworkClient(
+            base_url=self.base_url, retry_policy=policy
+            ) as client:
+            with self.assertRaises(aiohttp.ClientResponseError) as context:
+                await client.getResultEndpointResponse("broken/1")
+
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual(len(self.peers), 3)
+        return None
+
+    async def test_concurrency_limiter(self) -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        metrics: InMemoryMetrics = InMemoryMetrics()
+        async with AsyncNetworkClient(
+            base_url=self.base_url, concurrency_limiter=limiter,
+            metrics=metrics
+            ) as client:
+            html: str = await client.getResultEndpointResponse("throttled/1")
+
+        self.assertEqual(html, "<article>throttled/1</article>")
+        self.assertEqual(
+            [reason for _, _, reason in limiter.getHistory()],
+            ["initial", "drop", "drop", "increase"]
+        )
+        self.assertEqual(limiter.getInFlight(), 0)
+        self.assertIsNotNone(limiter.getBaselineLatency())
+        self.assertEqual(metrics.getGauge("concurrency_limit"), 2)
+        self.assertEqual(
+            metrics.getCounter(
+                "concurrency_limit_changes_total", reason="drop"
+            ), 2
+        )
+        return None
+
+    async def test_response_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            cache: DiskResponseCache = DiskResponseCache(directory)
+            async with AsyncNetworkClient(
+                base_url=self.base_url, cache=cache
+                ) as client:
+                first: str = await client.getResultEndpointResponse("patent/1")
+                second: str = await client.getResultEndpointResponse("patent/1")
+
+            cache.offline = True
+            async with AsyncNetworkClient(
+                base_url=self.base_url, cache=cache
+                ) as client:
+                third: str = await client.getResultEndpointResponse("patent/1")
+                with self.assertRaises(CacheMissError):
+                    await client.getResultEndpointResponse("patent/2")
+            cache.close()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+        self.assertEqual(len(self.peers), 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        return None
+
+    async def test_stream_stops_once_sections_are_complete(self) -> None:
+        async with AsyncNetworkClient(
+            base_url=self.base_url + "/stream"
+            ) as client:
+            result = await client.streamResultEndpointResponse(
+                "patent/US9145048B2/en",
+                lambda: ResultPageBuilder(["claims", "family"])
+            )
+
+        self.assertEqual(len(result.claims), 3)
+        self.assertEqual(result.family.family_id, "44709789")
+        self.assertLess(self.streamed_chunks, 200)
+        return None
+
+    pass # end of TestAsyncNetworkClient
+
+
 # main ========================================================================
 if __name__ == "__main__":
     unittest.main()
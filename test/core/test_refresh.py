@@ -0,0 +1,179 @@
+r""" test.core.test_refresh module """
+
+
+# importing standard module ===================================================
+from typing import Dict, List
+import sys, os, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing to test modules ===================================================
+from py_google_patents.api.data import refreshPatentDataMany
+from py_google_patents.core.bulk import BulkItemResult
+from py_google_patents.core.executor import ParseExecutor
+from py_google_patents.core.refresh import FingerprintStore, hash_content
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+from py_google_patents.testing.synthetic import build_result_page
+
+
+# module variables ============================================================
+ID_URLS: List[str] = ["patent/US{}B2/en".format(index) for index in range(3)]
+
+
+def result_url(id_url: str) -> str:
+    return "/xhr/result?id={}&exp=".format(id_url.replace("/", "%2F"))
+
+
+# TEST definition =============================================================
+class TestFingerprintStore(unittest.TestCase):
+    r""" class to test 'FingerprintStore' """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, "fp.sqlite3")
+        return None
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return None
+
+    def test_update(self) -> None:
+        with FingerprintStore(self.path) as store:
+            self.assertEqual(store.update(ID_URLS[0], b"a", '"1"'), "new")
+            # a new body is only remembered once 'put'
+            self.assertIsNone(store.get(ID_URLS[0]))
+            store.put(ID_URLS[0], store.build(b"a", '"1"'))
+
+            self.assertEqual(store.update(ID_URLS[0], b"a", '"2"'), "unchanged")
+            self.assertEqual(store.get(ID_URLS[0]).etag, '"2"')
+            # validators omitted by a 304 are kept
+            self.assertEqual(store.update(ID_URLS[0], None), "not_modified")
+            self.assertEqual(store.get(ID_URLS[0]).etag, '"2"')
+            self.assertEqual(store.update(ID_URLS[0], b"b"), "changed")
+            self.assertEqual(
+                store.get(ID_URLS[0]).content_hash, hash_content(b"a")
+            )
+
+        with FingerprintStore(self.path) as store:
+            self.assertEqual(list(store), ID_URLS[:1])
+            self.assertTrue(store.delete(ID_URLS[0]))
+            self.assertEqual(len(store), 0)
+        return None
+
+    pass # end of TestFingerprintStore
+
+
+class TestRefreshPatentDataMany(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'refreshPatentDataMany' against a replay server """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FingerprintStore(
+            os.path.join(self.directory.name, "fp.sqlite3")
+        )
+        return None
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.directory.cleanup()
+        return None
+
+    async def _refresh(
+        self,
+        server: ReplayServer,
+        id_urls: List[str],
+        changed_only: bool = True
+        ) -> Dict[str, BulkItemResult]:
+        async with server.createClient() as client:
+            return {
+                result.item: result
+                async for result in refreshPatentDataMany(
+                    id_urls, self.store, client,
+                    executor=ParseExecutor("inline"),
+                    changed_only=changed_only
+                )
+            }
+
+    async def test_refresh(self) -> None:
+        fixtures: FixtureStore = FixtureStore()
+        for id_url in ID_URLS:
+            fixtures.add(result_url(id_url), build_result_page(id_url))
+        server: ReplayServer = ReplayServer(fixtures)
+        await server.start()
+        try:
+            results = await self._refresh(server, ID_URLS + ["patent/US0A/en"])
+            self.assertEqual(
+                sorted(results), sorted(ID_URLS + ["patent/US0A/en"])
+            )
+            self.assertIsInstance(results["patent/US0A/en"].error, Exception)
+            for id_url in ID_URLS:
+                self.assertEqual(results[id_url].result.status, "new")
+                self.assertEqual(
+                    results[id_url].result.response.publication_number,
+                    id_url.split("/")[1]
+                )
+            self.assertEqual(len(self.store), 3)
+
+            # nothing changed: no body is downloaded, nothing is reported
+            served: int = server.stats["bytes"]
+            self.assertEqual(await self._refresh(server, ID_URLS), {})
+            self.assertEqual(server.stats["not_modified"], 3)
+            self.assertEqual(server.stats["bytes"], served)
+
+            fixtures.add(
+                result_url(ID_URLS[1]), build_result_page(ID_URLS[1], claims=9)
+            )
+            results = await self._refresh(server, ID_URLS, changed_only=False)
+            self.assertEqual(
+                {
+                    id_url: item.result.status
+                    for id_url, item in results.items()
+                },
+                {
+                    ID_URLS[0]: "not_modified", ID_URLS[1]: "changed",
+                    ID_URLS[2]: "not_modified"
+                }
+            )
+            self.assertEqual(len(results[ID_URLS[1]].result.response.claims), 9)
+            self.assertEqual(await self._refresh(server, ID_URLS), {})
+        finally:
+            await server.stop()
+        return None
+
+    async def test_fingerprint_deleted_during_refresh(self) -> None:
+        class VanishingStore(FingerprintStore):
+            # another refresher deletes each fingerprint right after it is read
+            def get(self, id_url: str):
+                fingerprint = super().get(id_url)
+                if fingerprint is not None:
+                    self.delete(id_url)
+                return fingerprint
+
+        fixtures: FixtureStore = FixtureStore()
+        fixtures.add(result_url(ID_URLS[0]), build_result_page(ID_URLS[0]))
+        server: ReplayServer = ReplayServer(fixtures)
+        await server.start()
+        try:
+            await self._refresh(server, ID_URLS[:1])
+            self.store.close()
+            self.store = VanishingStore(self.store.path)
+            results = await self._refresh(server, ID_URLS[:1])
+            self.assertEqual(server.stats["not_modified"], 1)
+            self.assertIsNone(results[ID_URLS[0]].error)
+            self.assertEqual(results[ID_URLS[0]].result.status, "new")
+            self.assertEqual(
+                results[ID_URLS[0]].result.response.publication_number,
+                "US0B2"
+            )
+        finally:
+            await server.stop()
+        return None
+
+    pass # end of TestRefreshPatentDataMany
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+r""" test.core.test_throttle module """
+
+
+# importing standard module ===================================================
+import sys, os, asyncio, math, random, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing third-party modules ===============================================
+from aiohttp.client_exceptions import ClientResponseError, \
+    ServerDisconnectedError
+from multidict import CIMultiDict
+
+
+# importing to test modules ===================================================
+from py_google_patents.core.throttle import TokenBucketRateLimiter, \
+    RetryPolicy, AdaptiveConcurrencyLimiter, parse_retry_after
+
+
+# TEST definition =============================================================
+class TestTokenBucketRateLimiter(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'TokenBucketRateLimiter' """
+
+    async def test_rate_is_enforced(self) -> None:
+        limiter: TokenBucketRateLimiter = TokenBucketRateLimiter(200, burst=5)
+        started: float = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(25)])
+        elapsed: float = time.monotonic() - started
+
+        # 5 tokens come from the burst, the other 20 at 200 per second
+        self.assertGreaterEqual(elapsed, 0.09)
+        return None
+
+    async def test_defer_pauses_bucket(self) -> None:
+        limiter: TokenBucketRateLimiter = TokenBucketRateLimiter(1000, burst=5)
+        limiter.defer(0.05)
+        started: float = time.monotonic()
+        await limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.045)
+        return None
+
+    pass # end of TestTokenBucketRateLimiter
+
+
+class TestRetryPolicy(unittest.TestCase):
+    r""" class to test 'RetryPolicy' """
+
+    def _response_error(self, status: int, **headers) -> ClientResponseError:
+        return ClientResponseError(
+            None, (), status=status, headers=CIMultiDict(headers)
+        )
+
+    def test_retryable_errors(self) -> None:
+        policy: RetryPolicy = RetryPolicy(max_attempts=3)
+        self.assertTrue(policy.shouldRetry(self._response_error(429), 1))
+        self.assertTrue(policy.shouldRetry(ServerDisconnectedError(), 2))
+        self.assertFalse(policy.shouldRetry(ServerDisconnectedError(), 3))
+        self.assertFalse(policy.shouldRetry(self._response_error(404), 1))
+        self.assertFalse(policy.shouldRetry(ValueError(), 1))
+        return None
+
+    def test_delays(self) -> None:
+        policy: RetryPolicy = RetryPolicy(
+            base_delay=1.0, max_delay=5.0, jitter=False
+        )
+        self.assertEqual(
+            [policy.computeDelay(attempt) for attempt in range(1, 6)],
+            [1.0, 2.0, 4.0, 5.0, 5.0]
+        )
+        self.assertEqual(
+            policy.computeDelay(1, self._response_error(429, **{
+                "Retry-After": "7"
+            })),
+            7.0
+        )
+        jittered: RetryPolicy = RetryPolicy(base_delay=1.0)
+        self.assertTrue(0 <= jittered.computeDelay(3) <= 4.0)
+        return None
+
+    def test_parse_retry_after(self) -> None:
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        return None
+
+    pass # end of TestRetryPolicy
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'AdaptiveConcurrencyLimiter' """
+
+    def setUp(self) -> None:
+        self.now: float = 0.0
+        self.limiter: AdaptiveConcurrencyLimiter = AdaptiveConcurrencyLimiter(
+            initial_limit=4, max_limit=16, clock=lambda: self.now
+        )
+        return None
+
+    async def _round(self, latency: float) -> None:
+        # as many requests as the limit allows, answered together
+        slots: int = self.limiter.getLimit()
+        for _ in range(slots):
+            await self.limiter.acquire()
+        for _ in range(slots):
+            self.limiter.release(latency)
+        self.now += latency
+        return None
+
+    def reasons(self) -> list:
+        return [reason for _, _, reason in self.limiter.getHistory()]
+
+    async def test_increase_while_latency_is_flat(self) -> None:
+        for _ in range(40):
+            await self._round(0.01)
+        self.assertEqual(self.limiter.getLimit(), 16)
+        self.assertEqual(set(self.reasons()), {"initial", "increase"})
+
+        # a client using few of its slots does not inflate the limit
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        for _ in range(40):
+            await limiter.acquire()
+            limiter.release(0.01)
+        self.assertEqual(limiter.getLimit(), 4)
+        return None
+
+    async def test_decrease(self) -> None:
+        while self.limiter.getLimit() < 8:
+            await self._round(0.01)
+
+        await self.limiter.acquire()
+        self.assertEqual(self.limiter.release(dropped=True), "drop")
+        self.assertEqual(self.limiter.getLimit(), 5)
+        # failures of the same round trip count once
+        await self.limiter.acquire()
+        self.assertIsNone(self.limiter.release(dropped=True))
+        self.now += 1.0
+        await self.limiter.acquire()
+        self.limiter.release(None)
+        self.assertEqual(self.limiter.getLimit(), 5)
+
+        await self.limiter.acquire()
+        self.assertEqual(self.limiter.release(0.2), "latency")
+        self.assertEqual(self.limiter.getLimit(), 3)
+        self.assertEqual(self.reasons()[-2:], ["drop", "latency"])
+        self.assertAlmostEqual(self.limiter.getBaselineLatency(), 0.01, 2)
+        self.assertEqual(self.limiter.getInFlight(), 0)
+        return None
+
+    async def test_noisy_flat_latency(self) -> None:
+        # a saturated client facing latency that does not depend on its load
+        rng: random.Random = random.Random(7)
+        for sigma in (0.3, 0.6):
+            with self.subTest(sigma=sigma):
+                limiter = AdaptiveConcurrencyLimiter(
+                    initial_limit=16, max_limit=64, clock=lambda: self.now
+                )
+                cuts: int = 0
+                for _ in range(3000):
+                    while limiter.getInFlight() < limiter.getLimit():
+                        await limiter.acquire()
+                    cuts += limiter.release(
+                        rng.lognormvariate(math.log(0.2), sigma)
+                    ) == "latency"
+                    self.now += 0.2 / limiter.getLimit()
+                self.assertGreaterEqual(limiter.getLimit(), 16)
+                self.assertLessEqual(cuts, 5)
+        return None
+
+    async def test_waiters(self) -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+        order: list = []
+
+        async def _wait(name: str) -> None:
+            await limiter.acquire()
+            order.append(name)
+            return None
+
+        first = asyncio.ensure_future(_wait("first"))
+        cancelled = asyncio.ensure_future(_wait("cancelled"))
+        last = asyncio.ensure_future(_wait("last"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        limiter.release()
+        await first
+        limiter.release()
+        await last
+        self.assertEqual(order, ["first", "last"])
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(limiter.getInFlight(), 1)
+        return None
+
+    def test_is_drop(self) -> None:
+        def _error(status: int) -> ClientResponseError:
+            return ClientResponseError(None, (), status=status)
+
+        self.assertTrue(self.limiter.isDrop(_error(429)))
+        self.assertTrue(self.limiter.isDrop(asyncio.TimeoutError()))
+        self.assertFalse(self.limiter.isDrop(_error(404)))
+        self.assertFalse(self.limiter.isDrop(ServerDisconnectedError()))
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=2)
+        return None
+
+    pass # end of TestAdaptiveConcurrencyLimiter
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
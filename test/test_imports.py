@@ -0,0 +1,65 @@
+r""" test.test_imports module """
+
+
+# importing standard module ===================================================
+from typing import List
+import sys, os, json, subprocess
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import unittest
+
+
+# TEST definition =============================================================
+class TestLazyImports(unittest.TestCase):
+    r""" class checking that the network and html stacks are only imported
+    on first use; each case runs in a fresh interpreter """
+
+    heavy_modules: List[str] = ["aiohttp", "yarl", "lxml", "bs4", "html5lib"]
+
+    def loaded_after(self, code: str, modules: List[str] = None) -> List[str]:
+        output: bytes = subprocess.check_output([
+            sys.executable, "-c",
+            "import sys, json\n{}\nprint(json.dumps([name for name in {!r} "
+            "if name in sys.modules]))".format(
+                code, modules or self.heavy_modules
+            )
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return json.loads(output.decode("utf-8").splitlines()[-1])
+
+    def test_package_import(self) -> None:
+        self.assertEqual(self.loaded_after(
+            "import py_google_patents\n"
+            "assert 'getPatentData' in dir(py_google_patents)",
+            self.heavy_modules + ["pydantic"]
+        ), [])
+        return None
+
+    def test_api_import(self) -> None:
+        self.assertEqual(
+            self.loaded_after("import py_google_patents.api.data"), []
+        )
+        self.assertEqual(self.loaded_after(
+            "from py_google_patents.core.data_parsers import "
+            "parse_parse_endpoint_response_data\n"
+            "parse_parse_endpoint_response_data("
+            "{'error_no_patents_found': True})"
+        ), [])
+        return None
+
+    def test_stacks_load_on_first_use(self) -> None:
+        self.assertEqual(self.loaded_after(
+            "from py_google_patents.core.data_parsers import "
+            "parse_result_endpoint_response_data\n"
+            "parse_result_endpoint_response_data('<article></article>')"
+        ), ["lxml"])
+        self.assertIn("aiohttp", self.loaded_after(
+            "import py_google_patents\npy_google_patents.AsyncNetworkClient"
+        ))
+        return None
+
+    pass # end of TestLazyImports
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+r""" test.testing.__init__ module """
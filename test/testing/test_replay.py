@@ -0,0 +1,136 @@
+r""" test.testing.test_replay module """
+
+
+# importing standard module ===================================================
+from typing import Dict
+import sys, os, asyncio, tempfile, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import unittest
+
+
+# importing third-party modules ===============================================
+import aiohttp
+
+
+# importing to test modules ===================================================
+from py_google_patents.testing.replay import FixtureStore, ReplayServer
+from py_google_patents.testing.synthetic import build_result_page
+from py_google_patents.core.throttle import RetryPolicy
+from py_google_patents.core.html_parsers import parse_result_page
+from py_google_patents.api.data import getTextRecommendations, getPatentData
+
+
+# TEST definition =============================================================
+class TestReplayServer(unittest.IsolatedAsyncioTestCase):
+    r""" class to test 'py_google_patents.testing.replay' against the
+    recorded samples in 'research/api_sample_responses.json' """
+
+    samples_path: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        "research", "api_sample_responses.json"
+    )
+
+    async def test_replays_recorded_samples(self) -> None:
+        store: FixtureStore = FixtureStore.load(self.samples_path)
+        async with ReplayServer(store) as server:
+            async with server.createClient() as client:
+                found = await getTextRecommendations(
+                    "us9145048", client, memoize=False
+                )
+                missing = await getTextRecommendations(
+                    "us914504856", client, memoize=False
+                )
+                with self.assertRaises(aiohttp.ClientResponseError) as context:
+                    await client.getParseEndpointResponse("not recorded")
+
+        self.assertEqual(len(found.results), 2)
+        self.assertEqual(found.results[0].result.number, "US9145048B2")
+        self.assertTrue(missing.error_no_patents_found)
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(server.stats["served"], 2)
+        self.assertEqual(server.stats["misses"], 1)
+        return None
+
+    async def test_synthesized_result_pages(self) -> None:
+        page: str = build_result_page("patent/US1234567B2/en", claims=5)
+        self.assertEqual(page, build_result_page("patent/US1234567B2/en", 5))
+
+        async with ReplayServer(synthesize=True) as server:
+            async with server.createClient() as client:
+                result = await getPatentData(
+                    "patent/US1234567B2/en", client, lazy=True
+                )
+
+        self.assertEqual(result.publication_number, "US1234567B2")
+        self.assertEqual(len(result.claims), 20)
+        self.assertEqual(result, parse_result_page(
+            build_result_page("patent/US1234567B2/en")
+        ))
+        return None
+
+    async def test_fault_injection_is_retried(self) -> None:
+        async with ReplayServer(
+            synthesize=True, throttle_rate=0.3, error_rate=0.2, seed=7
+            ) as server:
+            async with server.createClient(
+                retry_policy=RetryPolicy(max_attempts=20, base_delay=0.001)
+                ) as client:
+                pages = await asyncio.gather(*[
+                    client.getResultEndpointResponse("patent/US{}A/en".format(i))
+                    for i in range(20)
+                ])
+
+        stats: Dict[str, int] = server.stats
+        self.assertEqual(len(pages), 20)
+        self.assertGreater(stats["throttled"], 0)
+        self.assertGreater(stats["errors"], 0)
+        self.assertEqual(
+            stats["requests"], stats["served"] + stats["throttled"] + stats["errors"]
+        )
+        return None
+
+    async def test_bandwidth_cap(self) -> None:
+        store: FixtureStore = FixtureStore()
+        store.add("/xhr/result?id=patent%2Fbig&exp=", "x" * 40000)
+        async with ReplayServer(store, bandwidth=200000) as server:
+            async with server.createClient() as client:
+                started: float = time.monotonic()
+                body: str = await client.getResultEndpointResponse("patent/big")
+                elapsed: float = time.monotonic() - started
+
+        self.assertEqual(len(body), 40000)
+        self.assertGreaterEqual(elapsed, 0.19)
+        return None
+
+    async def test_record_mode(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "recorded.json")
+            async with ReplayServer(synthesize=True) as upstream:
+                async with ReplayServer(
+                    upstream=upstream.getBaseUrl(), record_path=path,
+                    unix_path=os.path.join(directory, "replay.sock")
+                    ) as recorder:
+                    async with recorder.createClient() as client:
+                        recorded: str = await client.getResultEndpointResponse(
+                            "patent/US1A/en"
+                        )
+
+            async with ReplayServer(FixtureStore.load(path)) as server:
+                async with server.createClient() as client:
+                    replayed: str = await client.getResultEndpointResponse(
+                        "patent/US1A/en"
+                    )
+
+        self.assertEqual(recorder.stats["recorded"], 1)
+        self.assertEqual(upstream.stats["synthesized"], 1)
+        self.assertEqual(recorded, replayed)
+        self.assertEqual(server.stats["served"], 1)
+        return None
+
+    pass # end of TestReplayServer
+
+
+# main ========================================================================
+if __name__ == "__main__":
+    unittest.main()